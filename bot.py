@@ -1,14 +1,31 @@
 # bot.py
+import time
+IMPORT_STARTED_AT = time.perf_counter()  # для отчёта о длительности импорта при запуске
 import asyncio
+import signal
 from telegram import Update, BotCommand
-from telegram.ext import Application, CommandHandler, MessageHandler, filters, CallbackContext
+from telegram.ext import Application, CommandHandler, CallbackContext, ContextTypes, TypeHandler
+from telegram.error import TelegramError
 import config as cfg
 from handlers.response_handler import ResponseHandler
 from handlers.translation_handler import TranslationHandlers
 from handlers.voice_handler import VoiceHandlers
 from handlers.speech_handler import SpeechHandler
 from handlers.image_handler import ImageHandler
+from handlers.interpreter_handler import InterpreterHandler
+from handlers.admin_handler import AdminHandler
+from services.background_jobs import BackgroundJobQueue
+from services.audio_preprocessor import AudioPreprocessor
+from services.telegram_rate_limiter import TelegramRateLimiter
+from services.health_server import HealthServer
+from services.loop_monitor import LoopLagMonitor
+from services.user_sessions import UserSession, SessionManager
+from services.media_storage import get_media_storage
+from services.inflight_requests import get_inflight_requests
+from database.database import close_database
 from utils.logger import setup_logger
+from utils.startup_utils import StartupTimer
+from handlers.router import MessageRouter
 
 logger = setup_logger(__name__)
 
@@ -17,17 +34,30 @@ class AsyaAssistantBot:
 
     def __init__(self):
         """Инициализирует бота и необходимые компоненты."""
-        self.app = Application.builder().token(cfg.TELEGRAM_BOT_TOKEN).connect_timeout(30).read_timeout(60).build()
-        self.translation_handlers = TranslationHandlers()
+        self.app = (Application.builder().token(cfg.TELEGRAM_BOT_TOKEN).connect_timeout(30).read_timeout(60)
+                    .rate_limiter(TelegramRateLimiter()).context_types(ContextTypes(user_data=UserSession)).build())
+        self.job_queue = BackgroundJobQueue()
+        self.audio_preprocessor = AudioPreprocessor()
+        self.translation_handlers = TranslationHandlers(self.job_queue)
         self.response_handlers = ResponseHandler()
-        self.image_handlers = ImageHandler()
-        self.speech_handlers = SpeechHandler()
+        self.image_handlers = ImageHandler(self.job_queue)
+        self.speech_handlers = SpeechHandler(self.job_queue, self.audio_preprocessor)
+        self.interpreter_handlers = InterpreterHandler(self.job_queue, self.audio_preprocessor)
         self.voice_handlers = VoiceHandlers()
+        self.admin_handlers = AdminHandler()
+        self.health = HealthServer(cfg.HEALTH_HOST, cfg.HEALTH_PORT)
+        self.loop_monitor = LoopLagMonitor(cfg.LOOP_LAG_THRESHOLD, cfg.LOOP_MONITOR_INTERVAL)
+        # Диагностика не публикуется на общедоступном порту здоровья
+        self.debug_server = HealthServer(cfg.DEBUG_HOST, cfg.DEBUG_PORT)
+        self.debug_server.reports["/debug/loop"] = self.loop_monitor.report
+        self.sessions = SessionManager()
 
 
 
     def setup_handlers(self):
         """Настраивает обработчики команд и сообщений бота."""
+        # Вытесненные сессии восстанавливаются до того, как обновление попадёт в обработчики
+        self.app.add_handler(TypeHandler(Update, self.sessions.touch), group=-1)
         # Обработчики команд
         self.app.add_handler(CommandHandler("start", self.start))
         self.app.add_handler(CommandHandler("help", self.help_command))
@@ -35,36 +65,40 @@ class AsyaAssistantBot:
         self.app.add_handler(self.translation_handlers.get_conversation_handler())
         self.app.add_handler(self.image_handlers.get_handler())
         self.app.add_handler(self.speech_handlers.get_handler())
+        self.app.add_handler(self.interpreter_handlers.get_handler())
 
 
 
         # Добавляем обработчик команды /voice (из VoiceHandlers.get_handlers())
         for handler in self.voice_handlers.get_handlers():
             self.app.add_handler(handler)
+        for handler in self.admin_handlers.get_handlers():
+            self.app.add_handler(handler)
 
-        # Обработчик для выбора голоса (если сообщение совпадает с названием голоса)
-        self.app.add_handler(MessageHandler(
-            filters.TEXT & filters.Regex(f"^({'|'.join(cfg.VOICES_GPT.keys())})$"),
-            self.voice_handlers.voice_selected
-        ))
-        # Обработчик для генерации аудио (если текст не является командой и не совпадает с названием голоса)
-        self.app.add_handler(MessageHandler(
-            filters.TEXT & ~filters.COMMAND &
-            ~filters.Regex(f"^({'|'.join(cfg.VOICES_GPT.keys())})$") &
-            ~filters.Regex(f"^({'|'.join(cfg.SUPPORTED_LANGUAGES_FREE)})$") &
-            filters.Regex("^/talk$") &
-            filters.Regex("^/translate$") &
-            filters.Regex("^/image$") &
-            filters.Regex("^/speech$") ,
-            self.voice_handlers.generate_voice
-        ))
-
-        self.app.add_handler(MessageHandler(
-            filters.VOICE & filters.AUDIO & ~filters.COMMAND,
-            self.speech_handlers.speech_service
-        ))
+        # Сообщения вне диалогов обрабатывает один маршрутизатор (регистрируется последним)
+        self.app.add_handler(self.build_router().get_handler())
 
+    def build_router(self) -> MessageRouter:
+        """Собирает таблицу маршрутов для сообщений вне диалогов.
 
+        Returns:
+            MessageRouter: Router with all routes registered.
+        """
+        router = MessageRouter()
+        # /cancel вне диалогов отменяет фоновые задачи пользователя
+        router.add_command("cancel", self.cancel_jobs)
+        # Кнопка с названием голоса: голос сохраняется, следующий текст озвучивается
+        router.add_texts(cfg.VOICES_GPT.keys(), self.voice_handlers.voice_selected, mode="voice")
+        router.add_mode("voice", self.voice_handlers.generate_voice)
+        # Кнопка языка: язык запоминается, следующий текст переводится
+        router.add_texts(cfg.SUPPORTED_LANGUAGES_FULL.keys(), self.translation_handlers.select_default_language,
+                         mode="translate")
+        router.add_mode("translate", self.translation_handlers.translate_message)
+        if cfg.SPEECH_OUTSIDE_DIALOG:
+            # Медиа вне /speech распознаются только по явной настройке: это платные запросы к Whisper
+            for kind in ("voice", "audio", "video", "video_note"):
+                router.add_media(kind, self.speech_handlers.process_speech)
+        return router
 
     async def start(self, update: Update, context: CallbackContext) -> None:
         """Обрабатывает команду /start."""
@@ -76,6 +110,7 @@ class AsyaAssistantBot:
             "🖼 /image - Генерация изображений.\n"   
             "🎙 /speech - Распознавание речи.\n"
             "🔊 /voice - Озвучивание текста.\n"
+            "🗣 /interpret - Голосовой перевод: голосовое сообщение → перевод → озвучка.\n"
             "❌ /cancel-Отменяет действия и осуществляет 🔚 выход из диалогов.\n"
             "ℹ️ /help - Помощь."
         )
@@ -87,17 +122,118 @@ class AsyaAssistantBot:
         help_text = (
             "ℹ️ **Помощь**\n\n"
             "Я твой языковой помощник! Вот что я умею:\n\n"
-            "💬 /talk - Общение с ассистентом.\n"
-            "📖 /translate - Перевод текста.\n"
+            "💬 /talk - Общение с ассистентом. Выбор модели: /talk gpt-4o, /talk gpt-4o-mini, /talk auto.\n"
+            "📖 /translate - Перевод текста. Одной командой: /translate EN текст; можно отправить документ .txt, .md, .srt.\n"
             "🖼 /image - Генерация изображений.\n"   
-            "🎙 /speech - Распознавание речи.\n"
+            "🎙 /speech - Распознавание речи из голосовых, аудио, видео и видеосообщений (до 20 MB).\n"
             "🔊 /voice - Озвучивание текста.\n"
+            "🗣 /interpret - Голосовой перевод: голосовое сообщение → перевод → озвучка.\n"
             "❌ /cancel-Отменяет действия и осуществляет 🔚 выход из диалогов.\n"
             "ℹ️ /help - Помощь."
             "💬 **Связаться с поддержкой**: [Написать в поддержку](https://t.me/i_VAN_79)"
         )
         await update.message.reply_text(help_text, parse_mode="Markdown", disable_web_page_preview=True)
 
+    async def cancel_jobs(self, update: Update, context: CallbackContext) -> None:
+        """Отменяет фоновые задачи пользователя в чате (распознавание речи, генерация изображений) и его запросы."""
+        cancelled = self.job_queue.cancel_user(update.effective_chat.id, update.effective_user.id)
+        cancelled += get_inflight_requests().cancel(update.effective_chat.id, update.effective_user.id)
+        if cancelled:
+            await update.message.reply_text(f"❌ Отменено фоновых задач: {cancelled}.")
+        else:
+            await update.message.reply_text("ℹ️ Нет активных задач для отмены.")
+
+    async def warm_up(self) -> None:
+        """Выполняет отложенную подготовку после запуска polling, не задерживая приём сообщений.
+
+        Устанавливает команды бота, проверяет ffmpeg, создаёт сервисы (импорт openai)
+        и заранее устанавливает соединения с OpenAI и DeepL. Ошибки только логируются:
+        при первом запросе сервисы будут созданы заново.
+        """
+        timer = StartupTimer()
+        with timer.phase("команды бота"):
+            try:
+                await self.set_bot_commands()
+            except TelegramError as e:
+                logger.warning(f"Не удалось установить команды бота: {e}")
+        with timer.phase("ffmpeg"):
+            try:
+                logger.info(f"FFmpeg: {cfg.FFMPEG_PATH}, FFprobe: {cfg.FFPROBE_PATH}")
+            except FileNotFoundError as e:
+                logger.error(f"{e} Распознавание и голосовой перевод недоступны.")
+        with timer.phase("сервисы"):
+            try:
+                await asyncio.to_thread(self.build_services)
+            except Exception as e:
+                logger.warning(f"Не удалось заранее создать сервисы: {e}")
+                return
+        with timer.phase("соединения"):
+            await self.check_upstreams()
+        timer.report("Прогрев")
+
+    async def check_upstreams(self) -> None:
+        """Проверяет OpenAI и DeepL бесплатными запросами и обновляет статус в эндпоинтах здоровья.
+        Заодно поддерживает соединения с API открытыми."""
+        checks = {
+            "openai": lambda: self.response_handlers.response_service.warm_up(),
+            "deepl": lambda: self.translation_handlers.translator.warm_up(),
+        }
+        results = await asyncio.gather(
+            *(asyncio.wait_for(asyncio.to_thread(check), cfg.HEALTH_CHECK_TIMEOUT) for check in checks.values()),
+            return_exceptions=True
+        )
+        for name, result in zip(checks, results):
+            if isinstance(result, Exception):
+                logger.warning(f"{name} недоступен: {result!r}")
+                self.health.set_upstream(name, False, repr(result))
+            else:
+                self.health.set_upstream(name, True)
+
+    async def monitor_upstreams(self) -> None:
+        """Периодически проверяет внешние API."""
+        while True:
+            await asyncio.sleep(cfg.HEALTH_CHECK_INTERVAL)
+            await self.check_upstreams()
+
+    async def shutdown(self, timeout: float = cfg.SHUTDOWN_TIMEOUT) -> None:
+        """Плавно останавливает бота, не теряя уже оплаченные запросы.
+
+        Снимает готовность, прекращает получать обновления, дожидается обработки уже
+        полученных сообщений и выполняющихся фоновых задач (не дольше `timeout` секунд),
+        затем закрывает пул ffmpeg и сбрасывает базу данных на диск.
+
+        Args:
+            timeout (float): Drain deadline in seconds.
+        """
+        logger.info(f"Остановка бота: ожидаем завершения текущих запросов (не дольше {timeout:.0f} с)...")
+        self.health.draining = True
+        deadline = asyncio.get_running_loop().time() + timeout
+        await self.app.updater.stop()
+
+        async def stop_application():
+            remaining = deadline - asyncio.get_running_loop().time()
+            try:
+                await asyncio.wait_for(self.app.stop(), max(remaining, 0))
+            except asyncio.TimeoutError:
+                logger.warning("Не дождались обработки всех обновлений.")
+
+        await asyncio.gather(stop_application(),
+                             self.job_queue.drain(deadline - asyncio.get_running_loop().time()))
+        await self.app.shutdown()
+        self.audio_preprocessor.shutdown()
+        self.sessions.flush(self.app)
+        close_database()
+        await self.loop_monitor.stop()
+        await self.debug_server.stop()
+        await self.health.stop()
+        logger.info("Бот остановлен.")
+
+    def build_services(self) -> None:
+        """Создаёт сервисы обработчиков (и импортирует их зависимости); выполняется в отдельном потоке."""
+        _ = (self.response_handlers.response_service, self.translation_handlers.translation_memory,
+             self.voice_handlers.voice_service, self.image_handlers.image_generator,
+             self.speech_handlers.speech_service, self.interpreter_handlers.pipeline)
+
     async def set_bot_commands(self):
         """Устанавливает команды для быстрого выбора в Telegram."""
         commands = [
@@ -107,6 +243,7 @@ class AsyaAssistantBot:
             BotCommand("image", "Генерация изображений"),
             BotCommand("speech", "Распознавание речи"),
             BotCommand("voice", "Озвучивание текста"),
+            BotCommand("interpret", "Голосовой перевод"),
             BotCommand("cancel", "Отменяет действия"),
             BotCommand("help", "Помощь и техподдержка")
         ]
@@ -116,20 +253,56 @@ class AsyaAssistantBot:
 
 
 async def main():
-    bot = AsyaAssistantBot()
-    bot.setup_handlers()
-    await bot.app.initialize()
-    await bot.set_bot_commands()
-    # Удаляем webhook, если он был установлен ранее
-    await bot.app.bot.delete_webhook(drop_pending_updates=True)
-    await bot.app.start()
-    await bot.app.updater.start_polling()
+    timer = StartupTimer(IMPORT_STARTED_AT)
+    timer.mark("импорт", IMPORT_STARTED_AT)
+    with timer.phase("обработчики"):
+        bot = AsyaAssistantBot()
+        bot.setup_handlers()
+    # Liveness доступен сразу, readiness — после запуска polling
+    await bot.health.start()
+    await bot.debug_server.start()
+    if cfg.LOOP_MONITOR_ENABLED:
+        bot.loop_monitor.start()
+    with timer.phase("Telegram"):
+        await bot.app.initialize()
+        # Удаляем webhook, если он был установлен ранее
+        await bot.app.bot.delete_webhook(drop_pending_updates=True)
+    with timer.phase("очередь задач"):
+        await bot.app.start()
+        await bot.job_queue.start(bot.app.bot)
+    with timer.phase("polling"):
+        await bot.app.updater.start_polling()
+    bot.health.ready = True
     logger.info("Бот запущен и готов к работе.")
+    timer.report()
+
+    # Сервисы, соединения и команды бота готовятся в фоне, когда бот уже принимает сообщения
+    bot.app.create_task(bot.warm_up())
+
+    if cfg.IMAGE_PREWARM_PROMPTS and cfg.IMAGE_CACHE_CHAT_ID:
+        bot.app.create_task(bot.image_handlers.prewarm(bot.app.bot, cfg.IMAGE_PREWARM_PROMPTS))
+
+    monitor = asyncio.create_task(bot.monitor_upstreams())
+    janitor = asyncio.create_task(bot.sessions.run_janitor(bot.app))
+    # Удаляет временные файлы, оставшиеся после аварийных остановок
+    media_janitor = asyncio.create_task(get_media_storage().run_janitor())
+
+    # SIGTERM (оркестратор) и SIGINT (Ctrl+C) запускают плавную остановку
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(sig, stop_event.set)
+        except NotImplementedError:
+            signal.signal(sig, lambda *_: loop.call_soon_threadsafe(stop_event.set))
 
     try:
-        await asyncio.Event().wait()
-    except KeyboardInterrupt:
-        await bot.app.stop()
+        await stop_event.wait()
+    finally:
+        monitor.cancel()
+        janitor.cancel()
+        media_janitor.cancel()
+        await bot.shutdown()
 
 
 if __name__ == "__main__":
@@ -10,25 +10,21 @@ load_dotenv()
 # Telegram
 TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
 
+# Пулы ключей: дополнительные ключи провайдера через запятую (DEEPL_API_KEYS, OPENAI_API_KEYS) идут в пуле
+# после DEEPL_API_KEY / OPENAI_API_KEY; веса ключей в порядке пула (DEEPL_API_KEY_WEIGHTS,
+# OPENAI_API_KEY_WEIGHTS через запятую, по умолчанию 1)
 # DeepL
-DEEPL_API_KEY_FREE = os.getenv("DEEPL_API_KEY")
+DEEPL_API_KEYS = [os.getenv("DEEPL_API_KEY", "")] + os.getenv("DEEPL_API_KEYS", "").split(",")
+DEEPL_API_KEYS = list(dict.fromkeys(key.strip() for key in DEEPL_API_KEYS if key.strip()))
+DEEPL_API_KEY_FREE = next(iter(DEEPL_API_KEYS), None)
+DEEPL_API_KEY_WEIGHTS = [float(w) for w in os.getenv("DEEPL_API_KEY_WEIGHTS", "").split(",") if w.strip()]
 DEEPL_API_FREE_URL = os.getenv("DEEPL_API_URL", "https://api-free.deepl.com/v2/translate")
 
 # OpenAI
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-
-
-
-
-FFMPEG_PATH = shutil.which("ffmpeg")
-FFPROBE_PATH = shutil.which("ffprobe")
-
-if not FFMPEG_PATH:
-    raise FileNotFoundError("FFmpeg не найден. Пожалуйста, установите FFmpeg.")
-
-if not FFPROBE_PATH:
-    raise FileNotFoundError("FFprobe не найден. Пожалуйста, установите FFprobe.")
-
+OPENAI_API_KEYS = [os.getenv("OPENAI_API_KEY", "")] + os.getenv("OPENAI_API_KEYS", "").split(",")
+OPENAI_API_KEYS = list(dict.fromkeys(key.strip() for key in OPENAI_API_KEYS if key.strip()))
+OPENAI_API_KEY = next(iter(OPENAI_API_KEYS), None)
+OPENAI_API_KEY_WEIGHTS = [float(w) for w in os.getenv("OPENAI_API_KEY_WEIGHTS", "").split(",") if w.strip()]
 
 # Проверяем необходимые переменные окружения
 required_env_vars = ["TELEGRAM_BOT_TOKEN", "DEEPL_API_KEY_FREE", "OPENAI_API_KEY"]
@@ -67,6 +63,15 @@ IMAGE_MODELS_GPT = {
     }
 }
 
+# Пресеты генерации изображений: от самого дешёвого и быстрого к самому качественному
+IMAGE_PRESETS = {
+    "preview": {"model": "dall-e-2", "quality": "standard", "size": "512x512"},
+    "standard": {"model": "dall-e-3", "quality": "standard", "size": "1024x1024"},
+    "hd": {"model": "dall-e-3", "quality": "hd", "size": "1024x1024"},
+}
+IMAGE_DEFAULT_PRESET = os.getenv("IMAGE_DEFAULT_PRESET", "preview")
+IMAGE_MAX_BATCH = int(os.getenv("IMAGE_MAX_BATCH", 4))  # максимум изображений за один запрос (только dall-e-2)
+
 # Список доступных голосов GPT
 VOICES_GPT = {
     "alloy": "alloy",
@@ -128,6 +133,156 @@ SUPPORTED_LANGUAGES_FULL = {
     "🇸🇪 Svenska": "SV",  # Шведский
 }
 
+# Уровни обслуживания: премиум открывает полный список языков, модели повышенного качества
+# (tts-1-hd, dall-e-3 hd) и приоритет в очередях к внешним API (0 — самый высокий).
+# PREMIUM_USER_IDS — постоянный премиум (ID через запятую); остальным уровень выдаёт администратор (/tier)
+PREMIUM_USER_IDS = {int(user_id) for user_id in os.getenv("PREMIUM_USER_IDS", "").split(",") if user_id.strip()}
+TIERS = {
+    "free": {"priority": 1, "languages": SUPPORTED_LANGUAGES_FREE, "tts_model": "tts-1",
+             "image_presets": ("preview", "standard")},
+    "premium": {"priority": 0, "languages": SUPPORTED_LANGUAGES_FULL, "tts_model": "tts-1-hd",
+                "image_presets": tuple(IMAGE_PRESETS)},
+}
+
+# Очереди к внешним API: одновременных интерактивных запросов (/talk, /voice, перевод текста) и на сколько
+# секунд раньше встаёт в очередь запрос уровнем приоритета выше (более долгое ожидание уравнивает запросы)
+UPSTREAM_CONCURRENCY = int(os.getenv("UPSTREAM_CONCURRENCY", 8))
+PRIORITY_HEADSTART = float(os.getenv("PRIORITY_HEADSTART", 30))
+
+# Локальная база данных (SQLite)
+DATABASE_PATH = os.getenv("DATABASE_PATH", "data/asya.db")
+
+# Кэш изображений: file_id Telegram хранится в БД, сами изображения — на диске (LRU)
+IMAGE_CACHE_DIR = os.getenv("IMAGE_CACHE_DIR", "static/image_cache")
+IMAGE_CACHE_MAX_BYTES = int(os.getenv("IMAGE_CACHE_MAX_BYTES", 200 * 1024 * 1024))  # 0 — не хранить на диске
+# Чат-хранилище, куда отправляются изображения при прогреве кэша, и описания для прогрева (через ";")
+IMAGE_CACHE_CHAT_ID = os.getenv("IMAGE_CACHE_CHAT_ID")
+IMAGE_PREWARM_PROMPTS = [p.strip() for p in os.getenv("IMAGE_PREWARM_PROMPTS", "").split(";") if p.strip()]
+
+# Временные медиафайлы (скачанные аудио, документы, озвучка): каталог, общий лимит в байтах,
+# сколько секунд задача ждёт свободного места и через сколько секунд забытые файлы удаляются.
+# MEDIA_TMPFS=1 размещает файлы в оперативной памяти (/dev/shm), если она доступна
+MEDIA_DIR = os.getenv("MEDIA_DIR", "static/media")
+MEDIA_TMPFS = os.getenv("MEDIA_TMPFS", "0") == "1"
+MEDIA_QUOTA_BYTES = int(os.getenv("MEDIA_QUOTA_BYTES", 512 * 1024 * 1024))
+MEDIA_WAIT_TIMEOUT = float(os.getenv("MEDIA_WAIT_TIMEOUT", 120))
+MEDIA_ORPHAN_AGE = float(os.getenv("MEDIA_ORPHAN_AGE", 3600))
+MEDIA_SWEEP_INTERVAL = float(os.getenv("MEDIA_SWEEP_INTERVAL", 600))
+
+# Фоновая очередь задач (распознавание речи, генерация изображений)
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", 4))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", 3))  # сколько раз задача запускается после сбоев/перезапусков
+
+# Подготовка аудио перед распознаванием (ffmpeg в пуле процессов)
+AUDIO_WORKERS = int(os.getenv("AUDIO_WORKERS", 2))  # одновременно работающих процессов ffmpeg
+AUDIO_SAMPLE_RATE = int(os.getenv("AUDIO_SAMPLE_RATE", 16000))
+AUDIO_BITRATE = os.getenv("AUDIO_BITRATE", "24k")  # битрейт Opus
+AUDIO_TRIM_SILENCE = os.getenv("AUDIO_TRIM_SILENCE", "1") == "1"
+
+# Распознавание длинных записей частями (для вывода текста по мере готовности), секунды
+TRANSCRIPTION_CHUNK_SECONDS = int(os.getenv("TRANSCRIPTION_CHUNK_SECONDS", 120))
+# Распознавание голосовых, аудио и видео, отправленных вне диалога /speech (каждое — платный запрос
+# к Whisper); по умолчанию такие сообщения игнорируются
+SPEECH_OUTSIDE_DIALOG = os.getenv("SPEECH_OUTSIDE_DIALOG", "0") == "1"
+
+# Кэш расшифровок по file_unique_id Telegram: записей в памяти, записей в БД, срок хранения в днях
+TRANSCRIPT_CACHE_MEMORY_ENTRIES = int(os.getenv("TRANSCRIPT_CACHE_MEMORY_ENTRIES", 128))
+TRANSCRIPT_CACHE_MAX_ENTRIES = int(os.getenv("TRANSCRIPT_CACHE_MAX_ENTRIES", 5000))
+TRANSCRIPT_CACHE_TTL = float(os.getenv("TRANSCRIPT_CACHE_TTL_DAYS", 30)) * 86400
+
+# Память переводов: минимальная схожесть предложений (Жаккар по триграммам) и число хранимых предложений
+TRANSLATION_MEMORY_THRESHOLD = float(os.getenv("TRANSLATION_MEMORY_THRESHOLD", 0.9))
+TRANSLATION_MEMORY_MAX_ENTRIES = int(os.getenv("TRANSLATION_MEMORY_MAX_ENTRIES", 20000))
+
+# Перевод документов (.txt, .md, .srt): максимальный размер файла, символов в одном запросе к DeepL,
+# одновременных запросов
+DOCUMENT_MAX_SIZE = int(os.getenv("DOCUMENT_MAX_SIZE", 1024 * 1024))  # байты
+DOCUMENT_BATCH_CHARS = int(os.getenv("DOCUMENT_BATCH_CHARS", 5000))
+DOCUMENT_TRANSLATION_CONCURRENCY = int(os.getenv("DOCUMENT_TRANSLATION_CONCURRENCY", 3))
+
+# Семантический кэш ответов /talk (включается SEMANTIC_CACHE_ENABLED=1): минимальная косинусная близость
+# вопросов, число хранимых ответов, срок хранения в днях, максимальная длина кэшируемого вопроса
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "0") == "1"
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", 0.8))
+SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", 2000))
+SEMANTIC_CACHE_TTL = float(os.getenv("SEMANTIC_CACHE_TTL_DAYS", 7)) * 86400
+SEMANTIC_CACHE_MAX_PROMPT = int(os.getenv("SEMANTIC_CACHE_MAX_PROMPT", 300))  # символов
+
+# Выбор модели для /talk: быстрая и сильная модели, длина сообщения (символов), начиная с которой
+# нужна сильная модель; время ожидания ответа до переключения на другую модель и
+# средняя задержка, при которой модель считается медленной (секунды)
+ROUTER_FAST_MODEL = os.getenv("ROUTER_FAST_MODEL", "gpt-4o-mini")
+ROUTER_STRONG_MODEL = os.getenv("ROUTER_STRONG_MODEL", "gpt-4o")
+ROUTER_LONG_MESSAGE = int(os.getenv("ROUTER_LONG_MESSAGE", 400))
+ROUTER_TIMEOUT = float(os.getenv("ROUTER_TIMEOUT", 30))
+ROUTER_SLOW_SECONDS = float(os.getenv("ROUTER_SLOW_SECONDS", 15))
+
+# Конвейер «голос → перевод → голос» (/interpret): длина фрагмента аудио в секундах
+PIPELINE_SEGMENT_SECONDS = int(os.getenv("PIPELINE_SEGMENT_SECONDS", 30))
+
+# Лимиты исходящих сообщений Telegram (запросов в секунду): всего, в личный чат, в группу
+TELEGRAM_GLOBAL_RATE = float(os.getenv("TELEGRAM_GLOBAL_RATE", 30))
+TELEGRAM_CHAT_RATE = float(os.getenv("TELEGRAM_CHAT_RATE", 1))
+TELEGRAM_GROUP_RATE = float(os.getenv("TELEGRAM_GROUP_RATE", 20 / 60))
+TELEGRAM_MAX_RETRIES = int(os.getenv("TELEGRAM_MAX_RETRIES", 3))  # повторов после RetryAfter
+
+# Плавная остановка и эндпоинты здоровья (/healthz, /readyz); HEALTH_PORT=0 отключает HTTP-сервер
+SHUTDOWN_TIMEOUT = float(os.getenv("SHUTDOWN_TIMEOUT", 60))  # секунды на завершение текущих запросов
+HEALTH_HOST = os.getenv("HEALTH_HOST", "0.0.0.0")
+HEALTH_PORT = int(os.getenv("HEALTH_PORT", 8080))
+HEALTH_CHECK_INTERVAL = float(os.getenv("HEALTH_CHECK_INTERVAL", 60))  # проверка OpenAI и DeepL, секунды
+HEALTH_CHECK_TIMEOUT = float(os.getenv("HEALTH_CHECK_TIMEOUT", 10))
+
+# Сессии пользователей: через сколько секунд бездействия сессия вытесняется из памяти в БД
+# и как часто это проверяется
+SESSION_IDLE_SECONDS = float(os.getenv("SESSION_IDLE_SECONDS", 1800))
+SESSION_SWEEP_INTERVAL = float(os.getenv("SESSION_SWEEP_INTERVAL", 300))
+# Сколько записей об уровнях и настройках пользователей держится в памяти (давно не использованные
+# вытесняются и при следующем обращении читаются из БД)
+USER_CACHE_ENTRIES = int(os.getenv("USER_CACHE_ENTRIES", 10000))
+
+# Монитор задержки цикла событий: порог блокировки (мс) и период измерения (секунды);
+# отчёт с гистограммой и блокирующими местами — GET /debug/loop на порту DEBUG_PORT
+LOOP_MONITOR_ENABLED = os.getenv("LOOP_MONITOR_ENABLED", "1") == "1"
+LOOP_LAG_THRESHOLD = float(os.getenv("LOOP_LAG_THRESHOLD_MS", 100)) / 1000
+LOOP_MONITOR_INTERVAL = float(os.getenv("LOOP_MONITOR_INTERVAL", 0.05))
+
+# Диагностические отчёты (/debug/...) содержат ID пользователей и стеки вызовов, поэтому отдаются
+# отдельным сервером без авторизации: по умолчанию выключен (DEBUG_PORT=0) и слушает только localhost
+DEBUG_HOST = os.getenv("DEBUG_HOST", "127.0.0.1")
+DEBUG_PORT = int(os.getenv("DEBUG_PORT", 0))
+
+# Администраторы (ID пользователей Telegram через запятую): команды /profile и /memory
+ADMIN_USER_IDS = {int(user_id) for user_id in os.getenv("ADMIN_USER_IDS", "").split(",") if user_id.strip()}
+PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL", 0.01))  # период срезов CPU-профиля, секунды
+PROFILE_MAX_SECONDS = float(os.getenv("PROFILE_MAX_SECONDS", 60))
+
+# Пулы ключей API: сколько секунд отдыхает ключ, упёршийся в лимит (если сервер не назвал время сброса),
+# и ключ, отклонённый как недействительный или без оплаченной квоты
+CREDENTIAL_COOLDOWN = float(os.getenv("CREDENTIAL_COOLDOWN", 20))
+CREDENTIAL_DISABLE_SECONDS = float(os.getenv("CREDENTIAL_DISABLE_SECONDS", 3600))
+
+# Политика повторных запросов к внешним API (OpenAI, DeepL)
+API_RETRY_MAX_ATTEMPTS = int(os.getenv("API_RETRY_MAX_ATTEMPTS", 4))  # всего попыток, включая первую
+API_RETRY_BASE_DELAY = float(os.getenv("API_RETRY_BASE_DELAY", 1.0))  # секунды
+API_RETRY_MAX_DELAY = float(os.getenv("API_RETRY_MAX_DELAY", 20.0))  # секунды
+API_RETRY_DEADLINE = float(os.getenv("API_RETRY_DEADLINE", 60.0))  # общий бюджет ожидания, секунды
+
+# Пути к ffmpeg/ffprobe ищутся в PATH при первом обращении (cfg.FFMPEG_PATH), а не при импорте конфигурации
+_BINARIES = {"FFMPEG_PATH": ("ffmpeg", "FFmpeg"), "FFPROBE_PATH": ("ffprobe", "FFprobe")}
+
+
+def __getattr__(name):
+    if name in _BINARIES:
+        binary, title = _BINARIES[name]
+        path = os.getenv(name) or shutil.which(binary)
+        if not path:
+            raise FileNotFoundError(f"{title} не найден. Пожалуйста, установите {title}.")
+        globals()[name] = path
+        return path
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 # Настройки логирования
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
 LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
@@ -1 +1,119 @@
+# database/database.py
+import os
+import sqlite3
+import threading
+from typing import Any, Iterable, Optional
+import config as cfg
+from utils.logger import setup_logger
 
+logger = setup_logger(__name__)
+
+
+class Database:
+    """Тонкая обёртка над SQLite для локального хранения состояния бота."""
+
+    def __init__(self, path: str = cfg.DATABASE_PATH):
+        """Открывает (или создаёт) файл базы данных.
+
+        Args:
+            path (str): Path to the SQLite database file.
+        """
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+
+    def execute(self, sql: str, params: Iterable[Any] = ()) -> int:
+        """Executes a modifying statement and commits it.
+
+        Args:
+            sql (str): SQL statement.
+            params (Iterable[Any]): Statement parameters.
+
+        Returns:
+            int: Number of affected rows.
+        """
+        with self._lock, self._conn:
+            return self._conn.execute(sql, tuple(params)).rowcount
+
+    def insert(self, sql: str, params: Iterable[Any] = ()) -> int:
+        """Executes an INSERT statement and commits it.
+
+        Args:
+            sql (str): SQL statement.
+            params (Iterable[Any]): Statement parameters.
+
+        Returns:
+            int: ID of the inserted row.
+        """
+        with self._lock, self._conn:
+            return self._conn.execute(sql, tuple(params)).lastrowid
+
+    def executescript(self, script: str) -> None:
+        """Executes several statements at once (used for schema creation).
+
+        Args:
+            script (str): SQL script.
+        """
+        with self._lock, self._conn:
+            self._conn.executescript(script)
+
+    def fetchone(self, sql: str, params: Iterable[Any] = ()) -> Optional[sqlite3.Row]:
+        """Returns the first row of a query or None.
+
+        Args:
+            sql (str): SQL query.
+            params (Iterable[Any]): Query parameters.
+
+        Returns:
+            Optional[sqlite3.Row]: Row or None.
+        """
+        with self._lock:
+            return self._conn.execute(sql, tuple(params)).fetchone()
+
+    def fetchall(self, sql: str, params: Iterable[Any] = ()) -> list:
+        """Returns all rows of a query.
+
+        Args:
+            sql (str): SQL query.
+            params (Iterable[Any]): Query parameters.
+
+        Returns:
+            list[sqlite3.Row]: Rows.
+        """
+        with self._lock:
+            return self._conn.execute(sql, tuple(params)).fetchall()
+
+    def close(self) -> None:
+        """Checkpoints the WAL into the main file and closes the connection."""
+        with self._lock:
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            self._conn.close()
+        logger.info(f"База данных {self.path} закрыта.")
+
+
+_database: Optional[Database] = None
+
+
+def get_database() -> Database:
+    """Returns the shared Database instance, creating it on first use.
+
+    Returns:
+        Database: Shared database.
+    """
+    global _database
+    if _database is None:
+        _database = Database()
+    return _database
+
+
+def close_database() -> None:
+    """Closes the shared Database instance, if it was opened."""
+    global _database
+    if _database is not None:
+        _database.close()
+        _database = None
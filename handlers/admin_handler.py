@@ -0,0 +1,174 @@
+# handlers/admin_handler.py
+import asyncio
+from telegram import Update
+from telegram.ext import CommandHandler, CallbackContext
+from utils.logger import setup_logger
+from services.profiler import SamplingProfiler, MemoryProfiler, ProfilerError, deep_sizeof
+from services.user_tiers import get_user_tiers
+from services.credential_pool import get_credential_pool
+import config as cfg
+
+logger = setup_logger(__name__)
+
+DEFAULT_PROFILE_SECONDS = 10
+
+
+class AdminHandler:
+    """Команды администраторов (ADMIN_USER_IDS): CPU-профиль, снимки памяти, уровни обслуживания и ключи API."""
+
+    def __init__(self):
+        """Инициализирует профилировщики."""
+        self.cpu_profiler = SamplingProfiler(cfg.PROFILE_INTERVAL)
+        self.memory_profiler = MemoryProfiler()
+
+    def get_handlers(self) -> list:
+        """Returns handlers for /profile, /memory, /tier and /keys."""
+        return [CommandHandler("profile", self.profile), CommandHandler("memory", self.memory),
+                CommandHandler("tier", self.tier), CommandHandler("keys", self.keys)]
+
+    @staticmethod
+    async def check_admin(update: Update) -> bool:
+        """Проверяет, что команду отправил администратор.
+
+        Args:
+            update (Update): Telegram update.
+
+        Returns:
+            bool: True for administrators.
+        """
+        if update.effective_user.id in cfg.ADMIN_USER_IDS:
+            return True
+        logger.warning(f"Пользователь {update.effective_user.id} пытался вызвать команду администратора.")
+        await update.message.reply_text("⛔️ Команда доступна только администраторам.")
+        return False
+
+    async def profile(self, update: Update, context: CallbackContext) -> None:
+        """Снимает CPU-профиль процесса: `/profile [секунды]`.
+
+        Args:
+            update (Update): Telegram update.
+            context (CallbackContext): Telegram context.
+        """
+        if not await self.check_admin(update):
+            return
+        try:
+            seconds = float(context.args[0]) if context.args else DEFAULT_PROFILE_SECONDS
+        except ValueError:
+            await update.message.reply_text("❌ Укажите длительность в секундах: /profile 10")
+            return
+        seconds = min(max(seconds, 1), cfg.PROFILE_MAX_SECONDS)
+        await update.message.reply_text(f"⏱ Профилирую {seconds:.0f} с...")
+        try:
+            # Срезы снимаются из отдельного потока, цикл событий продолжает работать
+            result = await asyncio.to_thread(self.cpu_profiler.profile, seconds)
+        except ProfilerError as e:
+            await update.message.reply_text(f"❌ {e}")
+            return
+        report = self.cpu_profiler.format_report(result, seconds)
+        await update.message.reply_document(document=report.encode("utf-8"), filename="cpu_profile.txt",
+                                            caption=f"📊 CPU-профиль за {seconds:.0f} с")
+        logger.info(f"CPU-профиль ({seconds:.0f} с) отправлен администратору {update.effective_user.id}.")
+
+    async def memory(self, update: Update, context: CallbackContext) -> None:
+        """Снимки памяти: `/memory start` — базовый снимок, `/memory` — сравнение с ним, `/memory stop`.
+
+        Args:
+            update (Update): Telegram update.
+            context (CallbackContext): Telegram context.
+        """
+        if not await self.check_admin(update):
+            return
+        action = context.args[0].lower() if context.args else "diff"
+        if action == "start":
+            self.memory_profiler.start()
+            await update.message.reply_text("📸 Базовый снимок памяти сохранён. Сравнение: /memory, остановка: "
+                                            "/memory stop")
+            return
+        if action == "stop":
+            self.memory_profiler.stop()
+            await update.message.reply_text("⏹ Отслеживание памяти остановлено.")
+            return
+        try:
+            report = await asyncio.to_thread(self.memory_profiler.diff_report)
+        except ProfilerError as e:
+            await update.message.reply_text(f"❌ {e} Начните с /memory start")
+            return
+        # Обход всех сессий занимает заметное время и не должен блокировать цикл событий
+        report += "\n\n" + await asyncio.to_thread(self.format_user_data, context)
+        await update.message.reply_document(document=report.encode("utf-8"), filename="memory_diff.txt",
+                                            caption="🧠 Рост памяти с базового снимка")
+
+    @staticmethod
+    def format_user_data(context: CallbackContext, top: int = 15) -> str:
+        """Оценивает память, занятую сессиями пользователей (user_data), — главный подозреваемый в утечке.
+
+        Args:
+            context (CallbackContext): Telegram context.
+            top (int): Number of users and keys in the report.
+
+        Returns:
+            str: Report section.
+        """
+        user_data = context.application.user_data
+        by_user, by_key = {}, {}
+        for user_id, session in list(user_data.items()):
+            by_user[user_id] = deep_sizeof(session)
+            for key, value in session.to_dict().items():
+                by_key[key] = by_key.get(key, 0) + deep_sizeof(value)
+        lines = [f"== user_data: {len(user_data)} пользователей, ~{sum(by_user.values()) / 1024:.1f} KiB ==",
+                 "По ключам:"]
+        lines.extend(f"    {size / 1024:10.1f} KiB  {key}"
+                     for key, size in sorted(by_key.items(), key=lambda item: item[1], reverse=True)[:top])
+        lines.append("Крупнейшие пользователи:")
+        lines.extend(f"    {size / 1024:10.1f} KiB  {user_id}"
+                     for user_id, size in sorted(by_user.items(), key=lambda item: item[1], reverse=True)[:top])
+        return "\n".join(lines)
+
+    async def tier(self, update: Update, context: CallbackContext) -> None:
+        """Показывает или назначает уровень обслуживания: `/tier <user_id> [free|premium] [дней]`.
+
+        Args:
+            update (Update): Telegram update.
+            context (CallbackContext): Telegram context.
+        """
+        if not await self.check_admin(update):
+            return
+        args = context.args or []
+        usage = "❌ Формат: /tier <user_id> [free|premium] [дней]"
+        if not args or not args[0].isdigit():
+            await update.message.reply_text(usage)
+            return
+        user_id = int(args[0])
+        tiers = get_user_tiers()
+        if len(args) > 1:
+            try:
+                days = float(args[2]) if len(args) > 2 else None
+                tiers.set(user_id, args[1].lower(), days)
+            except ValueError:
+                await update.message.reply_text(usage)
+                return
+            logger.info(f"Администратор {update.effective_user.id} изменил уровень пользователя {user_id}.")
+        await update.message.reply_text(f"👤 {user_id}: уровень {tiers.get(user_id)}")
+
+    async def keys(self, update: Update, context: CallbackContext) -> None:
+        """Показывает использование ключей API по пулам: запросы, ошибки, 429, остаток лимитов и паузы.
+
+        Args:
+            update (Update): Telegram update.
+            context (CallbackContext): Telegram context.
+        """
+        if not await self.check_admin(update):
+            return
+        lines = []
+        for provider in ("openai", "deepl"):
+            for item in get_credential_pool(provider).stats():
+                line = (f"🔑 {item['name']} (вес {item['weight']:g}): запросов {item['requests']}, "
+                        f"ошибок {item['errors']}, 429: {item['rate_limited']}")
+                if item["remaining_requests"] is not None:
+                    line += f", осталось запросов {item['remaining_requests']}"
+                if item["remaining_tokens"] is not None:
+                    line += f", токенов {item['remaining_tokens']}"
+                if item["cooldown"]:
+                    line += f", ⏸ пауза {item['cooldown']:.0f} с"
+                lines.append(line)
+        await update.message.reply_text("\n".join(lines))
@@ -1,12 +1,18 @@
 # handlers/image_handler.py
 import asyncio
-import logging
+from functools import cached_property
+from typing import Union
 
-from telegram import Update
+import httpx
+from telegram import Update, Bot, InputMediaPhoto
 from telegram.ext import CommandHandler, MessageHandler, filters, CallbackContext, ConversationHandler
 from utils.logger import setup_logger
-from telegram.error import TimedOut
+from telegram.error import BadRequest
 from services.image_generator import ImageGenerator,ImageGenerationError
+from services.image_cache import ImageCache
+from services.background_jobs import BackgroundJobQueue, Job, JobError
+from services.user_tiers import get_user_tiers
+import config as cfg
 
 logger = setup_logger(__name__)
 
@@ -16,9 +22,21 @@ WAITING_FOR_IMAGE_DESCRIPTION = 1
 class ImageHandler:
     """Handles image generation requests using OpenAI image API."""
 
-    def __init__(self):
-        """Инициализирует обработчики генерации изображений."""
-        self.image_generator = ImageGenerator()
+    def __init__(self, job_queue: BackgroundJobQueue):
+        """Инициализирует обработчики генерации изображений.
+
+        Args:
+            job_queue (BackgroundJobQueue): Queue that runs image generation jobs.
+        """
+        self.image_cache = ImageCache()
+        self.tiers = get_user_tiers()
+        self.job_queue = job_queue
+        self.job_queue.register("image", self.run_image_job)
+
+    @cached_property
+    def image_generator(self) -> ImageGenerator:
+        """Сервис генерации изображений OpenAI."""
+        return ImageGenerator()
 
     def get_handler(self):
         """Returns a ConversationHandler for /image command."""
@@ -39,6 +57,9 @@ class ImageHandler:
     async def start_image_generation(self, update: Update, context: CallbackContext) -> int:
         """Prompts the user to enter an image description.
 
+        Accepts optional arguments: `/image [preset] [count]`, e.g. `/image hd` or `/image preview 4`.
+        The chosen preset and count are remembered for the user.
+
                Args:
                    update (Update): Telegram update.
                    context (CallbackContext): Telegram context.
@@ -46,11 +67,59 @@ class ImageHandler:
                Returns:
                    int: Next conversation state.
                """
-        await update.message.reply_text("🖼 Введите описание изображения, которое хотите создать:")
+        args = context.args or []
+        if args:
+            preset = args[0].lower()
+            if preset not in cfg.IMAGE_PRESETS:
+                await update.message.reply_text(
+                    f"❌ Неизвестный режим «{preset}». Доступны: {', '.join(cfg.IMAGE_PRESETS)}."
+                )
+                return ConversationHandler.END
+            allowed = self.tiers.features(update.effective_user.id)["image_presets"]
+            if preset not in allowed:
+                await update.message.reply_text(
+                    f"⭐️ Режим «{preset}» доступен на премиум-уровне. Доступны: {', '.join(allowed)}."
+                )
+                return ConversationHandler.END
+            context.user_data.image_preset = preset
+            count = 1
+            if len(args) > 1 and args[1].isdigit():
+                count = min(max(int(args[1]), 1), cfg.IMAGE_MAX_BATCH)
+            if cfg.IMAGE_PRESETS[preset]["model"] == "dall-e-3":
+                count = 1  # dall-e-3 создаёт только одно изображение за запрос
+            context.user_data.image_count = count
+
+        settings = self.get_image_settings(update, context)
+        price = ImageGenerator.get_image_price(settings["model"], settings["quality"], settings["size"])
+        await update.message.reply_text(
+            f"🖼 Введите описание изображения, которое хотите создать:\n"
+            f"⚙️ Режим: {settings['preset']} ({settings['model']}, {settings['quality']}, {settings['size']}), "
+            f"изображений: {settings['n']}, ~${price * settings['n']:.3f}"
+        )
         return WAITING_FOR_IMAGE_DESCRIPTION
 
+    def get_image_settings(self, update: Update, context: CallbackContext) -> dict:
+        """Returns image generation settings chosen by the user or the cost-aware defaults.
+
+        A preset that is no longer available to the user's tier falls back to the default one.
+
+        Args:
+            update (Update): Telegram update.
+            context (CallbackContext): Telegram context.
+
+        Returns:
+            dict: Preset name, model, quality, size and image count.
+        """
+        preset = context.user_data.image_preset or cfg.IMAGE_DEFAULT_PRESET
+        if preset not in self.tiers.features(update.effective_user.id)["image_presets"]:
+            preset = cfg.IMAGE_DEFAULT_PRESET
+        settings = dict(cfg.IMAGE_PRESETS[preset], preset=preset)
+        settings["n"] = context.user_data.image_count
+        return settings
+
     async def generate_image_response(self, update: Update, context: CallbackContext) -> int:
         """Обрабатывает текстовый запрос пользователя и отправляет сгенерированное изображение.
+        Одиночные изображения отдаются из кэша, серии (n > 1) отправляются одной медиагруппой.
          Args:
             update (Update): Telegram update.
             context (CallbackContext): Telegram context.
@@ -59,30 +128,137 @@ class ImageHandler:
             int: Conversation end state.
         """
         prompt = update.message.text
-        await update.message.reply_text(f"🖼 Генерирую изображение... для описания:\n{prompt}")
+        settings = self.get_image_settings(update, context)
+
+        if settings["n"] == 1:
+            key = self.image_cache.make_key(prompt, settings["model"], settings["size"], settings["quality"])
+            file_id = self.image_cache.get_file_id(key)
+            if file_id:
+                try:
+                    await update.message.reply_photo(photo=file_id, caption=self.get_caption(settings))
+                    logger.info(f"Изображение из кэша отправлено пользователю {update.effective_user.id}.")
+                    return WAITING_FOR_IMAGE_DESCRIPTION
+                except BadRequest as e:
+                    logger.warning(f"Telegram не принял file_id из кэша, запись удалена: {e}")
+                    self.image_cache.forget(key)
+
+        await self.job_queue.submit(
+            "image", update, {"prompt": prompt, "settings": settings},
+            status_text=f"🖼 Генерирую изображение... для описания:\n{prompt}"
+        )
+        return WAITING_FOR_IMAGE_DESCRIPTION#ConversationHandler.END
+
+    @staticmethod
+    def get_caption(settings: dict) -> str:
+        """Returns the caption for generated images with an upgrade hint for previews.
+
+        Args:
+            settings (dict): Image generation settings.
+
+        Returns:
+            str: Caption text.
+        """
+        caption = "🖼 Ваше сгенерированное изображение"
+        if settings["preset"] == "preview":
+            caption += "\n💡 Черновое качество. Для лучшего качества: /image standard или /image hd"
+        return caption
+
+    async def run_image_job(self, job: Job) -> None:
+        """Генерирует изображение (или серию изображений) и отправляет результат пользователю.
+        Выполняется в фоновой очереди. Серии (n > 1) отправляются одной медиагруппой и не кэшируются.
+
+        Args:
+            job (Job): Background job with `prompt` and `settings` in the payload.
+
+        Raises:
+            JobError: If image generation fails.
+        """
+        prompt = job.payload["prompt"]
+        settings = job.payload["settings"]
+        caption = self.get_caption(settings)
         try:
-            image_url = self.image_generator.generate_image(prompt)
-            await update.message.reply_photo(photo=image_url, caption="🖼 Ваше сгенерированное изображение")
-            logger.info(f"Изображение отправлено пользователю {update.effective_user.id}.")
+            if settings["n"] > 1:
+                image_urls = await asyncio.to_thread(
+                    self.image_generator.generate_images, prompt, model=settings["model"],
+                    size=settings["size"], quality=settings["quality"], n=settings["n"]
+                )
+                media = [InputMediaPhoto(media=url, caption=caption if i == 0 else None)
+                         for i, url in enumerate(image_urls)]
+                await job.bot.send_media_group(chat_id=job.chat_id, media=media,
+                                               reply_to_message_id=job.reply_to_message_id)
+                logger.info(f"Серия изображений ({len(image_urls)}) отправлена пользователю {job.user_id}.")
+            else:
+                key = self.image_cache.make_key(prompt, settings["model"], settings["size"], settings["quality"])
+                photo = await self.obtain_photo(prompt, key, settings)
+                message = await job.bot.send_photo(chat_id=job.chat_id, photo=photo, caption=caption,
+                                                   reply_to_message_id=job.reply_to_message_id)
+                self.image_cache.store_file_id(key, prompt, message.photo[-1].file_id)
+                logger.info(f"Изображение отправлено пользователю {job.user_id}.")
+            await job.report("✅ Изображение готово!")
         except ImageGenerationError as e:
-            logger.error(f"Ошибка генерации изображения для {update.effective_user.id}: {str(e)}")
-            await update.message.reply_text("❌ Произошла ошибка при генерации изображения. Попробуйте позже.")
-        return WAITING_FOR_IMAGE_DESCRIPTION#ConversationHandler.END
+            logger.error(f"Ошибка генерации изображения для {job.user_id}: {str(e)}")
+            raise JobError("❌ Произошла ошибка при генерации изображения. Попробуйте позже.")
 
-    async def cancel_generate_image(self, update: Update, context: CallbackContext):
-        """Отменяет генерацию изображения и выходит из состояния."""
+    async def obtain_photo(self, prompt: str, key: str, settings: dict) -> Union[bytes, str]:
+        """Возвращает изображение из дискового кэша или генерирует новое.
+
+        Args:
+            prompt (str): Image description.
+            key (str): Image cache key.
+            settings (dict): Model, size and quality of the image.
+
+        Returns:
+            Union[bytes, str]: Image bytes or, if the disk cache is disabled, the image URL.
+        """
+        photo = self.image_cache.get_bytes(key)
+        if photo is not None:
+            return photo
+        image_url = await asyncio.to_thread(
+            self.image_generator.generate_image, prompt,
+            model=settings["model"], size=settings["size"], quality=settings["quality"]
+        )
+        if self.image_cache.max_bytes <= 0:
+            return image_url
         try:
-            await update.message.reply_text(
-                "❌ Генерация изображения отменена.\n"
-                "🔚 Вы вышли из диалога.\n"
-                "Выберите команду /image или /start ,любую другую команду для начала диалога "
-            )
-        except TimedOut:
-            logging.error("Ошибка: Telegram API не ответил вовремя. Повторная отправка...")
-            await asyncio.sleep(2)  # Даем немного времени
+            async with httpx.AsyncClient(timeout=60) as client:
+                response = await client.get(image_url)
+                response.raise_for_status()
+        except httpx.HTTPError as e:
+            logger.warning(f"Не удалось скачать изображение для кэша, отправляем ссылку: {e}")
+            return image_url
+        self.image_cache.store_bytes(key, response.content)
+        return response.content
+
+    async def prewarm(self, bot: Bot, prompts: list) -> None:
+        """Прогревает кэш: генерирует изображения для частых описаний и сохраняет их file_id.
+
+        Изображения отправляются в чат-хранилище `cfg.IMAGE_CACHE_CHAT_ID`.
+
+        Args:
+            bot (Bot): Telegram bot.
+            prompts (list): Image descriptions to pre-generate.
+        """
+        settings = cfg.IMAGE_PRESETS[cfg.IMAGE_DEFAULT_PRESET]
+        for prompt in prompts:
+            key = self.image_cache.make_key(prompt, settings["model"], settings["size"], settings["quality"])
+            if self.image_cache.get_file_id(key):
+                continue
             try:
-                await update.message.reply_text("⚠️ Произошла задержка. Повторная попытка...")
+                photo = await self.obtain_photo(prompt, key, settings)
+                message = await bot.send_photo(chat_id=cfg.IMAGE_CACHE_CHAT_ID, photo=photo, caption=prompt)
+                self.image_cache.store_file_id(key, prompt, message.photo[-1].file_id)
+                logger.info(f"Кэш изображений прогрет для описания: {prompt[:50]}")
             except Exception as e:
-                logging.error(f"Ошибка при повторной отправке сообщения: {e}")
+                logger.error(f"Ошибка прогрева кэша изображений для '{prompt[:50]}': {e}")
 
+    async def cancel_generate_image(self, update: Update, context: CallbackContext):
+        """Отменяет генерацию изображения и выходит из состояния."""
+        # Фоновые задачи отменяются только явной командой /cancel, а не переходом в другой диалог
+        if update.message.text.startswith("/cancel"):
+            self.job_queue.cancel_user(update.effective_chat.id, update.effective_user.id, "image")
+        await update.message.reply_text(
+            "❌ Генерация изображения отменена.\n"
+            "🔚 Вы вышли из диалога.\n"
+            "Выберите команду /image или /start ,любую другую команду для начала диалога "
+        )
         return ConversationHandler.END
@@ -0,0 +1,203 @@
+# handlers/interpreter_handler.py
+from functools import cached_property
+from telegram import Update, ReplyKeyboardMarkup, ReplyKeyboardRemove
+from telegram.ext import CommandHandler, MessageHandler, filters, CallbackContext, ConversationHandler
+from utils.logger import setup_logger
+from services.speech_to_text import SpeechToTextService, SpeechToTextError
+from services.translator import DeepLTranslator, TranslationError
+from services.voices import VoicesService, VoicesError
+from services.voice_pipeline import VoiceTranslationPipeline
+from services.audio_preprocessor import AudioPreprocessor, AudioPreprocessingError
+from services.background_jobs import BackgroundJobQueue, Job, JobError
+from services.media_storage import get_media_storage, MediaStorageError
+from services.user_preferences import get_user_preferences
+from services.user_tiers import get_user_tiers
+from handlers.speech_handler import MAX_FILE_SIZE, MAX_DURATION
+from handlers.translation_handler import PREMIUM_LANGUAGE_TEXT, TARGET_LANG_KEY
+import config as cfg
+
+logger = setup_logger(__name__)
+
+# Состояния диалога
+SELECT_INTERPRET_LANGUAGE, WAITING_FOR_INTERPRET_VOICE = range(2)
+
+DEFAULT_VOICE = "alloy"
+
+
+class InterpreterHandler:
+    """Handles voice-to-voice translation: Whisper → DeepL → TTS in one command."""
+
+    def __init__(self, job_queue: BackgroundJobQueue, audio_preprocessor: AudioPreprocessor):
+        """Инициализирует обработчики голосового перевода.
+
+        Args:
+            job_queue (BackgroundJobQueue): Queue that runs interpretation jobs.
+            audio_preprocessor (AudioPreprocessor): Shared ffmpeg process pool.
+        """
+        self.audio_preprocessor = audio_preprocessor
+        self.tiers = get_user_tiers()
+        self.preferences = get_user_preferences()
+        self.job_queue = job_queue
+        self.job_queue.register("interpret", self.run_interpret_job)
+
+    @cached_property
+    def pipeline(self) -> VoiceTranslationPipeline:
+        """Конвейер Whisper → DeepL → TTS."""
+        return VoiceTranslationPipeline(SpeechToTextService(), DeepLTranslator(), VoicesService())
+
+    def get_handler(self):
+        """Returns a ConversationHandler for /interpret command."""
+        return ConversationHandler(
+            entry_points=[CommandHandler("interpret", self.start_interpret)],
+            states={
+                SELECT_INTERPRET_LANGUAGE: [MessageHandler(filters.TEXT & ~filters.COMMAND, self.select_language)],
+                WAITING_FOR_INTERPRET_VOICE: [
+                    MessageHandler(filters.VOICE | filters.AUDIO, self.process_voice),
+                    MessageHandler(filters.COMMAND, self.cancel_interpret)
+                ],
+            },
+            fallbacks=[CommandHandler("cancel", self.cancel_interpret)],
+        )
+
+    async def start_interpret(self, update: Update, context: CallbackContext) -> int:
+        """Предлагает выбрать язык, на который будет переведено голосовое сообщение.
+
+        Args:
+            update (Update): Telegram update.
+            context (CallbackContext): Telegram context.
+
+        Returns:
+            int: Next conversation state.
+        """
+        keyboard = [[key] for key in self.tiers.languages(update.effective_user.id).keys()]
+        reply_markup = ReplyKeyboardMarkup(keyboard, resize_keyboard=True, one_time_keyboard=True)
+        await update.message.reply_text("🌐 Выберите язык, на который озвучить ваше голосовое сообщение:",
+                                        reply_markup=reply_markup)
+        return SELECT_INTERPRET_LANGUAGE
+
+    async def select_language(self, update: Update, context: CallbackContext) -> int:
+        """Сохраняет язык перевода (общий с /translate язык по умолчанию) и просит отправить голосовое сообщение.
+
+        Args:
+            update (Update): Telegram update.
+            context (CallbackContext): Telegram context.
+
+        Returns:
+            int: Next conversation state.
+        """
+        selected_language = update.message.text
+        languages = self.tiers.languages(update.effective_user.id)
+        if selected_language not in languages:
+            if selected_language in cfg.SUPPORTED_LANGUAGES_FULL:
+                await update.message.reply_text(PREMIUM_LANGUAGE_TEXT)
+            else:
+                await update.message.reply_text("❌ Пожалуйста, выберите язык из предложенного списка.")
+            return SELECT_INTERPRET_LANGUAGE
+        self.preferences.set(update.effective_user.id, TARGET_LANG_KEY, languages[selected_language])
+        voice = context.user_data.voice or DEFAULT_VOICE
+        await update.message.reply_text(
+            f"🎙 Отправьте голосовое сообщение или аудиофайл — я переведу его и озвучу голосом 🔊 {voice}.\n"
+            "Перевод приходит по частям, по мере готовности.",
+            reply_markup=ReplyKeyboardRemove()
+        )
+        return WAITING_FOR_INTERPRET_VOICE
+
+    async def process_voice(self, update: Update, context: CallbackContext) -> int:
+        """Ставит голосовое сообщение в очередь на перевод.
+
+        Args:
+            update (Update): Telegram update.
+            context (CallbackContext): Telegram context.
+
+        Returns:
+            int: Next conversation state.
+        """
+        audio_obj = update.message.voice or update.message.audio
+        if audio_obj.file_size and audio_obj.file_size > MAX_FILE_SIZE:
+            await update.message.reply_text(
+                "❌ Файл слишком большой (более 25 MB). Пожалуйста, отправьте файл меньшего размера."
+            )
+            return WAITING_FOR_INTERPRET_VOICE
+        extension = "mp3" if update.message.audio and "mp" in (audio_obj.mime_type or "") else "ogg"
+        await self.job_queue.submit(
+            "interpret", update,
+            {
+                "file_id": audio_obj.file_id,
+                "extension": extension,
+                "file_size": audio_obj.file_size,
+                "target_lang": self.preferences.get(update.effective_user.id, TARGET_LANG_KEY),
+                "voice": cfg.VOICES_GPT.get(context.user_data.voice, DEFAULT_VOICE),
+                "tts_model": self.tiers.features(update.effective_user.id)["tts_model"],
+            },
+            status_text="⌛️ Голосовое сообщение поставлено в очередь на перевод..."
+        )
+        return WAITING_FOR_INTERPRET_VOICE
+
+    async def run_interpret_job(self, job: Job) -> None:
+        """Скачивает аудио, делит его на фрагменты и прогоняет их через конвейер перевода.
+        Озвученные фрагменты отправляются пользователю по мере готовности.
+
+        Args:
+            job (Job): Background job with `file_id`, `extension`, `target_lang` and `voice` in the payload.
+
+        Raises:
+            JobError: If the audio cannot be processed.
+        """
+        file_id = job.payload["file_id"]
+        reserve = 2 * (job.payload.get("file_size") or MAX_FILE_SIZE)
+        try:
+            async with get_media_storage().workspace("interpret", reserve) as workspace:
+                audio_file_path = workspace.file(f"{file_id}.{job.payload['extension']}")
+                await job.report("⬇️ Скачиваю аудио...")
+                audio_file = await job.bot.get_file(file_id)
+                await audio_file.download_to_drive(audio_file_path)
+
+                duration = await self.audio_preprocessor.get_duration(audio_file_path)
+                if duration > MAX_DURATION:
+                    raise JobError(f"❌ Аудиофайл слишком длинный ({duration:.1f} сек.). "
+                                   f"Максимум {MAX_DURATION} сек.")
+
+                await job.report("🎛 Подготавливаю аудио...")
+                prepared_file_path = await self.audio_preprocessor.prepare(audio_file_path)
+                segments = await self.audio_preprocessor.split(prepared_file_path,
+                                                               cfg.PIPELINE_SEGMENT_SECONDS)
+                total = len(segments)
+                await job.report(f"🔄 Перевожу и озвучиваю: 0/{total}")
+
+                async def deliver(index: int, text: str, translation: str, audio: bytes) -> None:
+                    if audio:
+                        await job.bot.send_voice(chat_id=job.chat_id, voice=audio, caption=translation[:1024],
+                                                 reply_to_message_id=job.reply_to_message_id)
+                    await job.report(f"🔄 Перевожу и озвучиваю: {index + 1}/{total}")
+
+                await self.pipeline.run(segments, job.payload["target_lang"], job.payload["voice"], deliver,
+                                        tts_model=job.payload.get("tts_model", "tts-1"))
+                await job.report(f"✅ Перевод озвучен: {total}/{total}")
+                logger.info(f"Голосовой перевод ({total} фрагм.) отправлен пользователю {job.user_id}.")
+        except AudioPreprocessingError as e:
+            logger.error(f"Ошибка обработки аудио у {job.user_id}: {str(e)}")
+            raise JobError("❌ Ошибка при обработке аудиофайла. Попробуйте позже.")
+        except (SpeechToTextError, TranslationError, VoicesError) as e:
+            logger.error(f"Ошибка голосового перевода у {job.user_id}: {str(e)}")
+            raise JobError("❌ Ошибка при переводе голосового сообщения. Попробуйте позже.")
+        except MediaStorageError as e:
+            logger.error(f"Нет места для аудио пользователя {job.user_id}: {str(e)}")
+            raise JobError("⏳ Сервер сейчас перегружен. Попробуйте отправить голосовое сообщение чуть позже.")
+
+    async def cancel_interpret(self, update: Update, context: CallbackContext) -> int:
+        """Завершает диалог голосового перевода.
+
+        Args:
+            update (Update): Telegram update.
+            context (CallbackContext): Telegram context.
+
+        Returns:
+            int: Conversation end state.
+        """
+        # Фоновые задачи отменяются только явной командой /cancel, а не переходом в другой диалог
+        if update.message.text.startswith("/cancel"):
+            self.job_queue.cancel_user(update.effective_chat.id, update.effective_user.id, "interpret")
+        await update.message.reply_text("🔚 Вы вышли из диалога. \n"
+                                        "Выберите команду /interpret или /start ,любую другую команду для начала диалога ",
+                                        reply_markup=ReplyKeyboardRemove())
+        return ConversationHandler.END
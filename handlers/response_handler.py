@@ -1,8 +1,13 @@
 # handlers/response_handler.py
+from functools import cached_property
 from telegram import Update
 from telegram.ext import CommandHandler, MessageHandler, filters, CallbackContext, ConversationHandler
 from utils.logger import setup_logger
 from services.response_from_assistant import ResponseAssistantAll, ResponseAssistantError
+from services.inflight_requests import get_inflight_requests, RequestCancelled
+from services.priority_scheduler import get_upstream_scheduler
+from services.user_tiers import get_user_tiers
+import config as cfg
 
 logger = setup_logger(__name__)
 
@@ -12,9 +17,10 @@ WAITING_FOR_MESSAGE = 1
 class ResponseHandler:
     """Handles conversation with the AI for text generation."""
 
-    def __init__(self):
-        """Инициализирует обработчики общения с AI."""
-        self.response_service = ResponseAssistantAll()
+    @cached_property
+    def response_service(self) -> ResponseAssistantAll:
+        """Сервис генерации текста (OpenAI Chat Completions)."""
+        return ResponseAssistantAll()
 
     def get_handler(self):
         """Returns a ConversationHandler for /talk command."""
@@ -22,8 +28,13 @@ class ResponseHandler:
             entry_points=[CommandHandler("talk", self.start_talking)],
             states={
                 WAITING_FOR_MESSAGE: [
-                    MessageHandler(filters.TEXT & ~filters.COMMAND, self.generate_response),
+                    MessageHandler(filters.TEXT & ~filters.COMMAND, self.generate_response, block=False),
                     MessageHandler(filters.COMMAND, self.cancel_talk)  # Добавляем выход из диалога
+                ],
+                # Пока ответ генерируется, новое сообщение вытесняет запрос, а команда его отменяет
+                ConversationHandler.WAITING: [
+                    MessageHandler(filters.TEXT & ~filters.COMMAND, self.generate_response, block=False),
+                    MessageHandler(filters.COMMAND, self.cancel_talk)
                 ]
             },
             fallbacks=[CommandHandler("cancel", self.cancel_talk)]
@@ -39,7 +50,18 @@ class ResponseHandler:
                Returns:
                    int: Next conversation state.
                """
-        await update.message.reply_text("💬 Напишите что-нибудь, и я отвечу!")
+        if context.args:
+            choice = context.args[0].lower()
+            if choice == "auto":
+                context.user_data.model = None
+            elif choice in cfg.MODELS_GPT:
+                context.user_data.model = choice
+            else:
+                await update.message.reply_text(f"❌ Неизвестная модель. Доступны: auto, {', '.join(cfg.MODELS_GPT)}.")
+                return ConversationHandler.END
+        model = context.user_data.model or "выбирается автоматически"
+        await update.message.reply_text(f"💬 Напишите что-нибудь, и я отвечу!\n🤖 Модель: {model} "
+                                        f"(сменить: /talk gpt-4o, /talk gpt-4o-mini, /talk auto)")
         return WAITING_FOR_MESSAGE
 
     async def generate_response(self, update: Update, context: CallbackContext):
@@ -54,13 +76,20 @@ class ResponseHandler:
                """
         user_message = update.message.text
         try:
-            response = await self.response_service.text_generation(update, context, user_message)
+            # Запрос выполняется отдельной задачей: его отменяют /cancel и следующее сообщение пользователя в /talk
+            request = self.response_service.text_generation(update, context, user_message,
+                                                            model=context.user_data.model)
+            priority = get_user_tiers().priority(update.effective_user.id)
+            response = await get_inflight_requests().run(update.effective_chat.id, update.effective_user.id, "talk",
+                                                         get_upstream_scheduler().run(request, priority))
 
             await update.message.reply_text(response, parse_mode="Markdown")
             logger.info(f"Ответ отправлен пользователю {update.effective_user.id}.")
         except ResponseAssistantError as e:
             logger.error(f"Ошибка генерации текста для {update.effective_user.id}: {str(e)}")
             await update.message.reply_text("❌ Произошла ошибка. Попробуйте позже.")
+        except RequestCancelled:
+            logger.info(f"Запрос пользователя {update.effective_user.id} отменён, ответ не отправляется.")
         return WAITING_FOR_MESSAGE #ConversationHandler.END
 
     async def cancel_talk(self, update: Update, context: CallbackContext):
@@ -73,6 +102,10 @@ class ResponseHandler:
                Returns:
                    int: Conversation end state.
                """
+        # Запрос к ассистенту отменяется только явной командой /cancel, а не переходом в другой диалог
+        if update.message.text.startswith("/cancel"):
+            if get_inflight_requests().cancel(update.effective_chat.id, update.effective_user.id, "talk"):
+                await update.message.reply_text("❌ Запрос к ассистенту отменён.")
         await update.message.reply_text("🔚 Вы вышли из диалога. \n"
                                         "Выберите команду /talk или /start ,любую другую команду для начала диалога ")
         return ConversationHandler.END
@@ -0,0 +1,129 @@
+# handlers/router.py
+from typing import Awaitable, Callable, Iterable, Optional
+from telegram import Update
+from telegram.ext import CallbackContext, MessageHandler, filters
+from utils.logger import setup_logger
+from services.user_sessions import UserSession
+
+logger = setup_logger(__name__)
+
+Callback = Callable[[Update, CallbackContext], Awaitable[object]]
+
+# Вложения, которые маршрутизируются по типу (атрибут сообщения -> фильтр), в порядке проверки
+MEDIA_FILTERS = {
+    "voice": filters.VOICE,
+    "audio": filters.AUDIO,
+    "video": filters.VIDEO,
+    "video_note": filters.VIDEO_NOTE,
+}
+
+
+class MessageRouter:
+    """Маршрутизатор сообщений, не попавших в диалоги.
+
+    Вместо цепочки Regex-фильтров на каждое сообщение используется один обработчик
+    и словари: точные совпадения текста (названия голосов, языков), таблица команд,
+    режим пользователя и тип вложения. Поиск маршрута — O(1) независимо от их числа.
+    """
+
+    def __init__(self):
+        """Инициализирует пустые таблицы маршрутов."""
+        self.commands: dict = {}
+        self.texts: dict = {}  # текст -> (callback, режим после ответа)
+        self.modes: dict = {}
+        self.media: dict = {}
+
+    def add_command(self, command: str, callback: Callback) -> None:
+        """Registers a command handled outside conversations (e.g. global /cancel).
+
+        Args:
+            command (str): Command name without the slash.
+            callback (Callback): Handler coroutine.
+        """
+        self.commands[command.lower()] = callback
+
+    def add_texts(self, texts: Iterable[str], callback: Callback, mode: Optional[str] = None) -> None:
+        """Registers exact-match texts (e.g. reply keyboard buttons).
+
+        Args:
+            texts (Iterable[str]): Texts to match exactly.
+            callback (Callback): Handler coroutine.
+            mode (Optional[str]): Mode the user switches to after the handler.
+        """
+        for text in texts:
+            self.texts[text] = (callback, mode)
+
+    def add_mode(self, mode: str, callback: Callback) -> None:
+        """Registers the handler for free text in a given user mode; the mode is one-shot.
+
+        Args:
+            mode (str): Mode name.
+            callback (Callback): Handler coroutine.
+        """
+        self.modes[mode] = callback
+
+    def add_media(self, kind: str, callback: Callback) -> None:
+        """Registers the handler for an attachment type.
+
+        Args:
+            kind (str): Message attribute, one of MEDIA_FILTERS.
+            callback (Callback): Handler coroutine.
+        """
+        if kind not in MEDIA_FILTERS:
+            raise ValueError(f"Неизвестный тип вложения: {kind}")
+        self.media[kind] = callback
+
+    def resolve(self, update: Update, context: CallbackContext) -> Optional[Callback]:
+        """Finds the handler for a message.
+
+        Args:
+            update (Update): Telegram update.
+            context (CallbackContext): Telegram context.
+
+        Returns:
+            Optional[Callback]: Handler coroutine or None if the message is not routed.
+        """
+        message = update.effective_message
+        # Режим пользователя (например, «следующий текст озвучить») хранится в сессии
+        session = context.user_data if context.user_data is not None else UserSession()
+        text = message.text
+        if text is None:
+            for kind, callback in self.media.items():
+                if getattr(message, kind, None):
+                    return callback
+            return None
+
+        if text.startswith("/"):
+            session.mode = None
+            command, *args = text.split()
+            callback = self.commands.get(command[1:].split("@", 1)[0].lower())
+            if callback is not None:
+                context.args = args
+            return callback
+
+        route = self.texts.get(text.strip())
+        if route is not None:
+            callback, mode = route
+            session.mode = mode
+            return callback
+
+        mode, session.mode = session.mode, None
+        return self.modes.get(mode)
+
+    async def route(self, update: Update, context: CallbackContext) -> None:
+        """Dispatches a message to its handler.
+
+        Args:
+            update (Update): Telegram update.
+            context (CallbackContext): Telegram context.
+        """
+        callback = self.resolve(update, context)
+        if callback is not None:
+            await callback(update, context)
+
+    def get_handler(self) -> MessageHandler:
+        """Returns the single MessageHandler that feeds the router; register it after all conversations."""
+        message_filter = filters.TEXT
+        for kind in self.media:
+            message_filter |= MEDIA_FILTERS[kind]
+        return MessageHandler(message_filter, self.route)
@@ -1,50 +1,118 @@
 # handlers/speech_handler.py
-import os
 import asyncio
-from telegram import Update
+import os
+from functools import cached_property
+from typing import Optional
+from telegram import Update, Bot
 from telegram.ext import CommandHandler, MessageHandler, filters, CallbackContext, ConversationHandler
 from utils.logger import setup_logger
-from utils.file_utils import ensure_directory, get_abs_path
+from utils.file_utils import stream_telegram_file
 from services.speech_to_text import SpeechToTextService, SpeechToTextError
-from pydub import AudioSegment
+from services.background_jobs import BackgroundJobQueue, Job, JobError
+from services.audio_preprocessor import AudioPreprocessor, AudioPreprocessingError
+from services.transcript_cache import TranscriptCache
+from services.media_storage import get_media_storage, MediaStorageError
+from utils.subtitle_utils import to_srt, to_vtt, to_text
 import config as cfg
 
-# Указываем `pydub`, где искать ffmpeg и ffprobe
-AudioSegment.converter = cfg.FFMPEG_PATH
-AudioSegment.ffprobe = cfg.FFPROBE_PATH
-AudioSegment.ffmpeg = cfg.FFMPEG_PATH
-
 
 logger = setup_logger(__name__)
 
 MAX_FILE_SIZE = 25 * 1024 * 1024  # 25 MB
+# Bot API позволяет ботам скачивать файлы не больше 20 MB (getFile)
+TELEGRAM_DOWNLOAD_LIMIT = 20 * 1024 * 1024
 MAX_DURATION = 5400 # максимум 5400 секунд (90 минут)
 WAITING_FOR_VOICE = 1
+MESSAGE_LIMIT = 4000  # запас до лимита Telegram в 4096 символов
+TRANSCRIPT_HEADER = "📝 Распознанный текст:\n"
+# Форматы файлов расшифровки: /speech srt vtt txt
+EXPORT_FORMATS = {"txt": to_text, "srt": to_srt, "vtt": to_vtt}
+
+
+class TranscriptWriter:
+    """Показывает расшифровку по мере готовности, редактируя сообщение (и начиная новое у лимита)."""
+
+    def __init__(self, bot: Bot, chat_id: int, reply_to_message_id: int):
+        """Инициализирует вывод расшифровки.
+
+        Args:
+            bot (Bot): Telegram bot.
+            chat_id (int): Chat ID.
+            reply_to_message_id (int): Message with the original audio.
+        """
+        self.bot = bot
+        self.chat_id = chat_id
+        self.reply_to_message_id = reply_to_message_id
+        self.message = None
+        self.text = ""
+
+    async def append(self, text: str) -> None:
+        """Appends recognized text and updates the transcript message.
+
+        Args:
+            text (str): Newly recognized text.
+        """
+        for piece in self.split_text(text.strip(), MESSAGE_LIMIT - len(TRANSCRIPT_HEADER)):
+            if self.message is not None and len(self.text) + len(piece) + 1 > MESSAGE_LIMIT:
+                self.message = None
+            if self.message is None:
+                self.text = f"{TRANSCRIPT_HEADER}{piece}"
+                self.message = await self.bot.send_message(chat_id=self.chat_id, text=self.text,
+                                                           reply_to_message_id=self.reply_to_message_id)
+            else:
+                self.text = f"{self.text} {piece}"
+                await self.message.edit_text(self.text)
+
+    @staticmethod
+    def split_text(text: str, limit: int) -> list:
+        """Splits text into pieces no longer than `limit`, preferring word boundaries.
+
+        Args:
+            text (str): Text to split.
+            limit (int): Maximum piece length.
+
+        Returns:
+            list[str]: Non-empty pieces.
+        """
+        pieces = []
+        while len(text) > limit:
+            cut = text.rfind(" ", 0, limit + 1)
+            if cut <= 0:
+                cut = limit
+            pieces.append(text[:cut].strip())
+            text = text[cut:].strip()
+        if text:
+            pieces.append(text)
+        return pieces
 
-def get_audio_duration(file_path: str) -> float:
-    """Returns the duration of an audio file in seconds.
-
-    Args:
-        file_path (str): Path to the audio file.
-
-    Returns:
-        float: Duration in seconds.
-    """
-    audio = AudioSegment.from_file(file_path)
-    return len(audio) / 1000
 
 class SpeechHandler:
     """Handles speech recognition using OpenAI Whisper API."""
 
-    def __init__(self):
-        self.speech_service = SpeechToTextService()
+    def __init__(self, job_queue: BackgroundJobQueue, audio_preprocessor: AudioPreprocessor):
+        """Инициализирует обработчики распознавания речи.
+
+        Args:
+            job_queue (BackgroundJobQueue): Queue that runs transcription jobs.
+            audio_preprocessor (AudioPreprocessor): Shared ffmpeg process pool.
+        """
+        self.transcript_cache = TranscriptCache()
+        self.audio_preprocessor = audio_preprocessor
+        self.job_queue = job_queue
+        self.job_queue.register("speech", self.run_speech_job)
+
+    @cached_property
+    def speech_service(self) -> SpeechToTextService:
+        """Whisper transcription service."""
+        return SpeechToTextService()
 
     def get_handler(self):
         conv_handler = ConversationHandler(
             entry_points=[CommandHandler("speech", self.start_speech)],
             states={
                 WAITING_FOR_VOICE: [
-                    MessageHandler(filters.VOICE | filters.AUDIO, self.process_speech),
+                    MessageHandler(filters.VOICE | filters.AUDIO | filters.VIDEO | filters.VIDEO_NOTE
+                                   | filters.Document.AUDIO | filters.Document.VIDEO, self.process_speech),
                     MessageHandler(filters.COMMAND, self.cancel_speech)
                 ]
             },
@@ -62,7 +130,14 @@ class SpeechHandler:
                Returns:
                    int: Next conversation state.
                """
-        await update.message.reply_text("🎙 Отправьте голосовое сообщение, и я его расшифрую.")
+        formats = [arg.lower() for arg in (context.args or []) if arg.lower() in EXPORT_FORMATS]
+        context.user_data.speech_formats = formats
+        text = "🎙 Отправьте голосовое сообщение, аудио или видео, и я его расшифрую."
+        if formats:
+            text += f"\n📎 Расшифровка будет приложена в форматах: {', '.join(formats)}."
+        else:
+            text += "\n💡 Файлы с таймкодами: /speech srt vtt txt"
+        await update.message.reply_text(text)
         return WAITING_FOR_VOICE
 
     async def process_speech(self, update: Update, context: CallbackContext) -> int:
@@ -78,6 +153,8 @@ class SpeechHandler:
 
         audio_obj = None
         expected_extension = "ogg"  # по умолчанию для голосовых сообщений
+        stream = False
+        document = update.message.document
 
         if update.message.voice:
             audio_obj = update.message.voice
@@ -97,78 +174,186 @@ class SpeechHandler:
                 expected_extension = "mp3"
             else:
                 expected_extension = "ogg"
+        elif update.message.video or update.message.video_note or (
+                document and (document.mime_type or "").startswith(("audio/", "video/"))):
+            # Видео, видеосообщения и аудио, отправленное файлом: звук извлекается потоково, без скачивания на диск
+            audio_obj = update.message.video or update.message.video_note or document
+            file_name = getattr(audio_obj, "file_name", None) or ""
+            expected_extension = os.path.splitext(file_name)[1].lstrip(".").lower() or "mp4"
+            stream = True
         else:
-            await update.message.reply_text("❌ Пожалуйста, отправьте голосовое сообщение или аудиофайл.")
+            await update.message.reply_text("❌ Пожалуйста, отправьте голосовое сообщение, аудио или видео.")
             return WAITING_FOR_VOICE
 
-        if audio_obj.file_size > MAX_FILE_SIZE:
+        if stream and (audio_obj.file_size or 0) > TELEGRAM_DOWNLOAD_LIMIT:
+            await update.message.reply_text(
+                "❌ Файл слишком большой: Telegram позволяет ботам скачивать файлы до 20 MB. "
+                "Пожалуйста, отправьте файл меньшего размера или только звук."
+            )
+            return WAITING_FOR_VOICE
+        if (audio_obj.file_size or 0) > MAX_FILE_SIZE:
             await update.message.reply_text(
                 "❌ Файл слишком большой (более 25 MB). Пожалуйста, отправьте файл меньшего размера."
             )
             return WAITING_FOR_VOICE
+        if (getattr(audio_obj, "duration", None) or 0) > MAX_DURATION:
+            await update.message.reply_text(f"❌ Запись слишком длинная. Максимум {MAX_DURATION // 60} минут.")
+            return WAITING_FOR_VOICE
 
-        # Формируем абсолютный путь для файла
-        audio_dir = get_abs_path("static/audio_file")
-        ensure_directory(audio_dir)
-        audio_file_path = os.path.join(audio_dir, f"{audio_obj.file_id}.{expected_extension}")
+        await self.job_queue.submit(
+            "speech", update,
+            {"file_id": audio_obj.file_id, "file_unique_id": audio_obj.file_unique_id,
+             "extension": expected_extension, "file_size": audio_obj.file_size, "stream": stream,
+             "formats": list(context.user_data.speech_formats)},
+            status_text="⌛️ Аудио поставлено в очередь на обработку..."
+        )
+        return WAITING_FOR_VOICE
 
+    async def run_speech_job(self, job: Job) -> None:
+        """Скачивает аудио, проверяет длительность, распознаёт речь и отправляет результат.
+        Выполняется в фоновой очереди; после перезапуска бота файл скачивается заново по file_id.
+
+        Повторно присланный файл (например, пересланное голосовое) берётся из кэша расшифровок
+        без скачивания и распознавания. Звук из видео сначала извлекается потоково (`stream` в задаче).
+
+        Args:
+            job (Job): Background job with `file_id`, `file_unique_id`, `extension` and `stream` in the payload.
+
+        Raises:
+            JobError: If the audio cannot be processed.
+        """
+        # Задачи, поставленные до появления кэша, не содержат file_unique_id
+        cache_key = None
+        if job.payload.get("file_unique_id"):
+            cache_key = self.transcript_cache.make_key(job.payload["file_unique_id"])
+            segments = self.transcript_cache.get(cache_key)
+            if segments is not None:
+                logger.info(f"Расшифровка для {job.user_id} взята из кэша.")
+                await TranscriptWriter(job.bot, job.chat_id, job.reply_to_message_id).append(to_text(segments))
+                await self.send_exports(job, segments)
+                await job.report("✅ Аудио обработано!")
+                return
 
         try:
-            # Получаем объект файла
-            audio_obj = await audio_obj.get_file()
-            # Скачиваем файл
-            await audio_obj.download_to_drive(audio_file_path)
-            logger.info(f"Файл скачивается в: {audio_file_path}")
-
-            # Информируем пользователя о длительной операции
-            status_msg = await update.message.reply_text("⌛️ Обработка аудио, пожалуйста, подождите...")
-            # Увеличиваем задержку, чтобы убедиться, что файл создан
-            await asyncio.sleep(25)
-
-
-            # Проверяем нахождение аудио файла по пути
-            if not os.path.exists(audio_file_path):
-                logger.error(f"Файл не найден по пути: {audio_file_path}")
-                await update.message.reply_text("❌ Не удалось скачать аудиофайл.")
-                return WAITING_FOR_VOICE
+            segments = None
+            if job.payload.get("stream"):
+                segments = await self.transcribe_stream(job)
+                if segments:
+                    await TranscriptWriter(job.bot, job.chat_id, job.reply_to_message_id).append(to_text(segments))
+            if segments is None:
+                segments = await self.transcribe_file(job)
+
+            if not segments:
+                raise JobError("🤷 Речь в аудио не распознана.")
+            if cache_key:
+                self.transcript_cache.put(cache_key, segments)
+            await self.send_exports(job, segments)
+            await job.report("✅ Аудио обработано!")
+            logger.info(f"Распознанная речь отправлена пользователю {job.user_id}.")
+
+        except AudioPreprocessingError as e:
+            logger.error(f"Ошибка чтения аудиофайла у {job.user_id}: {str(e)}")
+            raise JobError("❌ Ошибка при обработке аудиофайла. Попробуйте позже.")
+        except SpeechToTextError as e:
+            logger.error(f"Ошибка распознавания речи у {job.user_id}: {str(e)}")
+            raise JobError("❌ Ошибка при распознавании речи. Попробуйте позже.")
+        except MediaStorageError as e:
+            logger.error(f"Нет места для аудио пользователя {job.user_id}: {str(e)}")
+            raise JobError("⏳ Сервер сейчас перегружен. Попробуйте отправить аудио чуть позже.")
+
+    async def transcribe_stream(self, job: Job) -> Optional[list]:
+        """Извлекает звук из видео или файла потоково (скачивание → ffmpeg → память) и распознаёт его
+        одним запросом, не записывая ничего на диск.
+
+        Args:
+            job (Job): Background job with `file_id` in the payload.
+
+        Returns:
+            Optional[list[dict]]: Transcript segments, or None if the file has to be processed from disk
+            (the container cannot be read from a pipe or the audio is too large for one request).
+        """
+        await job.report("⬇️ Извлекаю звук...")
+        media_file = await job.bot.get_file(job.payload["file_id"])
+        try:
+            audio = await self.audio_preprocessor.extract_audio(stream_telegram_file(media_file), MAX_DURATION)
+        except AudioPreprocessingError as e:
+            # Например, MP4 с индексом (moov) в конце файла нельзя прочитать из канала
+            logger.warning(f"Потоковое извлечение звука не удалось, обрабатываем файл с диска: {e}")
+            return None
+        if len(audio) > MAX_FILE_SIZE:
+            logger.info(f"Извлечённый звук больше лимита Whisper ({len(audio)} байт), делим файл на части.")
+            return None
+        await job.report("🎙 Распознаю речь...")
+        return await asyncio.to_thread(self.speech_service.transcribe_bytes, audio)
+
+    async def transcribe_file(self, job: Job) -> list:
+        """Скачивает файл во временный каталог, сжимает и распознаёт его по частям,
+        показывая текст по мере готовности.
+
+        Args:
+            job (Job): Background job with `file_id`, `extension` and `file_size` in the payload.
+
+        Returns:
+            list[dict]: Transcript segments.
+
+        Raises:
+            JobError: If the audio is too long.
+        """
+        file_id = job.payload["file_id"]
+        # Исходный файл, его сжатая копия и фрагменты живут во временном каталоге задачи;
+        # резерв — исходный размер плюс сжатая копия, которая не больше исходного файла
+        reserve = 2 * (job.payload.get("file_size") or MAX_FILE_SIZE)
+        async with get_media_storage().workspace("speech", reserve) as workspace:
+            audio_file_path = workspace.file(f"{file_id}.{job.payload['extension']}")
+            await job.report("⬇️ Скачиваю аудио...")
+            audio_file = await job.bot.get_file(file_id)
+            await audio_file.download_to_drive(audio_file_path)
+            logger.info(f"Файл скачан в: {audio_file_path}")
 
             # Проверяем продолжительность аудио не более 90 минут
-            duration = get_audio_duration(audio_file_path)
+            duration = await self.audio_preprocessor.get_duration(audio_file_path)
             if duration > MAX_DURATION:
-                await update.message.reply_text(
-                    f"❌ Аудиофайл слишком длинный ({duration:.1f} сек.). Максимум {MAX_DURATION} сек.")
-                return WAITING_FOR_VOICE
-
-
-            recognized_text = self.speech_service.transcribe_audio(audio_file_path)
-            await status_msg.edit_text("✅ Аудио обработано!")
-            await update.message.reply_text(f"📝 Распознанный текст:\n{recognized_text}")
-            logger.info(f"Распознанная речь отправлена пользователю {update.effective_user.id}.")
-
-            text_dir = get_abs_path("static/recognized_text_file")
-            ensure_directory(text_dir)
-            text_file_path = os.path.join(text_dir, f"{audio_obj.file_id}.txt")
-            with open(text_file_path, "w", encoding="utf-8") as f:
-                f.write(recognized_text)
-            #
-            # with open(text_file_path, "rb") as doc:
-            #     await update.message.reply_document(document=doc, filename=f"{audio_obj.file_id}.txt")
-
-            # Удаление файла после обработки
-            os.remove(audio_file_path)
-            logger.info(f"Аудиофайл {audio_file_path} удалён.")
-
-            os.remove(text_file_path)
-            logger.info(f"Текстовый файл {text_file_path} удалён.")
-
-        except SpeechToTextError as e:
-            logger.error(f"Ошибка распознавания речи у {update.effective_user.id}: {str(e)}")
-            await update.message.reply_text("❌ Ошибка при распознавании речи. Попробуйте позже.")
-        except Exception as e:
-            logger.error(f"Ошибка обработки аудиофайла: {str(e)}")
-            await update.message.reply_text("❌ Ошибка при обработке аудиофайла. Попробуйте позже.")
-
-        return WAITING_FOR_VOICE
+                raise JobError(f"❌ Аудиофайл слишком длинный ({duration:.1f} сек.). Максимум {MAX_DURATION} сек.")
+
+            # Сжимаем аудио (моно, 16 кГц, Opus) — загрузка в Whisper становится в разы меньше
+            await job.report("🎛 Подготавливаю аудио...")
+            try:
+                prepared_file_path = await self.audio_preprocessor.prepare(audio_file_path)
+            except AudioPreprocessingError as e:
+                logger.warning(f"Не удалось подготовить аудио, отправляем исходный файл: {e}")
+                prepared_file_path = None
+
+            # Распознаём по частям, чтобы пользователь видел текст, не дожидаясь конца записи
+            chunks = [prepared_file_path or audio_file_path]
+            if prepared_file_path:
+                chunks = await self.audio_preprocessor.split(prepared_file_path, cfg.TRANSCRIPTION_CHUNK_SECONDS)
+
+            writer = TranscriptWriter(job.bot, job.chat_id, job.reply_to_message_id)
+            segments = []
+            offset = 0.0
+            for index, chunk in enumerate(chunks, start=1):
+                await job.report(f"🎙 Распознаю речь: {index}/{len(chunks)}...")
+                chunk_segments = await asyncio.to_thread(self.speech_service.transcribe_segments, chunk, offset)
+                segments.extend(chunk_segments)
+                await writer.append(to_text(chunk_segments))
+                if index < len(chunks):
+                    offset += await self.audio_preprocessor.get_duration(chunk)
+        return segments
+
+    @staticmethod
+    async def send_exports(job: Job, segments: list) -> None:
+        """Sends the transcript as files in the formats requested with /speech.
+        Files are rendered in memory and never written to disk.
+
+        Args:
+            job (Job): Background job with optional `formats` in the payload.
+            segments (list[dict]): Transcript segments.
+        """
+        for export_format in job.payload.get("formats", []):
+            render = EXPORT_FORMATS[export_format]
+            await job.bot.send_document(chat_id=job.chat_id, document=render(segments).encode("utf-8"),
+                                        filename=f"transcript.{export_format}",
+                                        reply_to_message_id=job.reply_to_message_id)
 
     async def cancel_speech(self, update: Update, context: CallbackContext):
         """Завершает диалог, если пользователь вводит другую команду.Cancels the conversation.
@@ -180,6 +365,11 @@ class SpeechHandler:
                Returns:
                    int: Conversation end state.
                """
+        # Фоновые задачи отменяются только явной командой /cancel, а не переходом в другой диалог
+        cancelled = self.job_queue.cancel_user(update.effective_chat.id, update.effective_user.id, "speech") \
+            if update.message.text.startswith("/cancel") else 0
+        if cancelled:
+            await update.message.reply_text(f"❌ Отменено задач распознавания: {cancelled}.")
         await update.message.reply_text("🔚 Вы вышли из диалога. \n"
                                         "Выберите команду /speech или /start ,любую другую команду для начала диалога ")
         return ConversationHandler.END
@@ -1,8 +1,22 @@
 # handlers/translation_handler.py
+import asyncio
+import os
+import re
+from collections import deque
+from functools import cached_property
+from typing import Optional, Tuple
 from telegram import Update, ReplyKeyboardMarkup, ReplyKeyboardRemove
 from telegram.ext import ContextTypes, ConversationHandler, CommandHandler, MessageHandler, filters
 from utils.logger import setup_logger
+from utils.language_utils import guess_language
+from utils.document_utils import iter_batches, iter_blocks
 from services.translator import DeepLTranslator, TranslationError
+from services.translation_memory import TranslationMemory
+from services.user_preferences import get_user_preferences
+from services.background_jobs import BackgroundJobQueue, Job, JobError
+from services.media_storage import get_media_storage, MediaStorageError
+from services.priority_scheduler import get_upstream_scheduler
+from services.user_tiers import get_user_tiers
 import config as cfg
 
 logger = setup_logger(__name__)
@@ -10,12 +24,59 @@ logger = setup_logger(__name__)
 # Определение этапов разговора для ConversationHandler
 SELECT_LANGUAGE, GET_TEXT = range(2)
 
+# Ключ настройки пользователя с языком перевода по умолчанию
+TARGET_LANG_KEY = "target_lang"
+LANGUAGE_CODES = frozenset(cfg.SUPPORTED_LANGUAGES_FULL.values())
+# Язык в начале текста: код заглавными (`EN текст`) или с двоеточием в любом регистре (`en: текст`).
+# Обычные слова вроде «It», «de», «no» языком не считаются
+LANGUAGE_PREFIX = re.compile(r"(?:([A-Za-z]{2}):\s*|([A-Z]{2})(?:\s+|$))")
+# Ответ на выбор языка, недоступного бесплатному уровню
+PREMIUM_LANGUAGE_TEXT = "⭐️ Этот язык доступен на премиум-уровне. Выберите язык из списка."
+# Документы для перевода: .txt, .md, .srt
+DOCUMENT_FILTER = (filters.Document.FileExtension("txt") | filters.Document.FileExtension("md")
+                   | filters.Document.FileExtension("srt"))
+
+
+def split_language_prefix(text: str) -> Tuple[Optional[str], str]:
+    """Отделяет код языка перевода от текста однократной команды /translate.
+
+    Args:
+        text (str): Command arguments, e.g. "EN привет" or "en: привет".
+
+    Returns:
+        Tuple[Optional[str], str]: Language code (or None if the text has no language prefix) and the text.
+    """
+    match = LANGUAGE_PREFIX.match(text)
+    if match:
+        code = (match.group(1) or match.group(2)).upper()
+        if code in LANGUAGE_CODES:
+            return code, text[match.end():].strip()
+    return None, text
+
+
 class TranslationHandlers:
     """Handles text translation using DeepL API."""
 
-    def __init__(self):
-        """Инициализирует обработчики перевода."""
-        self.translator = DeepLTranslator()
+    def __init__(self, job_queue: BackgroundJobQueue):
+        """Инициализирует обработчики перевода.
+
+        Args:
+            job_queue (BackgroundJobQueue): Queue that runs document translation jobs.
+        """
+        self.preferences = get_user_preferences()
+        self.tiers = get_user_tiers()
+        self.job_queue = job_queue
+        self.job_queue.register("translate_document", self.run_document_job)
+
+    @cached_property
+    def translator(self) -> DeepLTranslator:
+        """DeepL translation service."""
+        return DeepLTranslator()
+
+    @cached_property
+    def translation_memory(self) -> TranslationMemory:
+        """Память переводов поверх DeepL: повторные предложения не отправляются в API."""
+        return TranslationMemory(self.translator)
 
     def get_conversation_handler(self):
         """Возвращает ConversationHandler для команды /translate."""
@@ -24,13 +85,37 @@ class TranslationHandlers:
             states={
                 SELECT_LANGUAGE: [MessageHandler(filters.TEXT & ~filters.COMMAND, self.select_language)],
                 GET_TEXT: [MessageHandler(filters.TEXT & ~filters.COMMAND, self.get_text),
+                           MessageHandler(DOCUMENT_FILTER, self.process_document),
                            MessageHandler(filters.COMMAND, self.cancel)],
             },
             fallbacks=[CommandHandler("cancel", self.cancel)],
         )
 
+    def create_language_keyboard(self, user_id: int) -> ReplyKeyboardMarkup:
+        """Создаёт клавиатуру выбора языка из языков, доступных уровню пользователя.
+        Args:
+            user_id (int): Telegram user ID.
+
+        Returns:
+            ReplyKeyboardMarkup: Keyboard with supported languages."""
+        keyboard = [[key] for key in self.tiers.languages(user_id).keys()]
+        return ReplyKeyboardMarkup(keyboard, resize_keyboard=True, one_time_keyboard=True)
+
+    def get_target_lang(self, user_id: int) -> Optional[str]:
+        """Returns the user's default target language, if any and still available to the user's tier."""
+        target_lang = self.preferences.get(user_id, TARGET_LANG_KEY)
+        if target_lang is not None and target_lang not in self.tiers.languages(user_id).values():
+            return None  # язык выбран на премиум-уровне, срок которого истёк
+        return target_lang
+
+    def set_target_lang(self, user_id: int, target_lang: str) -> None:
+        """Saves the user's default target language."""
+        self.preferences.set(user_id, TARGET_LANG_KEY, target_lang)
+
     async def start_translation(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
-        """Начинает процесс перевода, предлагая выбрать язык.
+        """Начинает перевод. Поддерживает однократные команды без выбора языка на клавиатуре:
+        `/translate EN текст` или `/translate en: текст` — перевод на указанный язык (язык по умолчанию
+        не меняется), `/translate текст` — перевод на язык по умолчанию, `/translate EN` — смена языка.
 
         Args:
             update (Update): Telegram update.
@@ -39,10 +124,34 @@ class TranslationHandlers:
         Returns:
             int: Next conversation state.
         """
-        keyboard = [[key] for key in cfg.SUPPORTED_LANGUAGES_FREE.keys()]
-        reply_markup = ReplyKeyboardMarkup(keyboard, resize_keyboard=True, one_time_keyboard=True)
-        await update.message.reply_text("🌐 Пожалуйста, выберите язык для перевода:", reply_markup=reply_markup)
-        return SELECT_LANGUAGE
+        user_id = update.effective_user.id
+        # Текст берём из сообщения целиком, чтобы сохранить переносы строк
+        parts = update.message.text.split(maxsplit=1)
+        target_lang, text = split_language_prefix(parts[1].strip() if len(parts) > 1 else "")
+        if target_lang is not None and target_lang not in self.tiers.languages(user_id).values():
+            context.user_data.pending_text = text
+            await update.message.reply_text(PREMIUM_LANGUAGE_TEXT,
+                                            reply_markup=self.create_language_keyboard(user_id))
+            return SELECT_LANGUAGE
+        if target_lang is not None and not text:
+            # Команда из одного кода языка — явный выбор языка по умолчанию
+            self.set_target_lang(user_id, target_lang)
+        if target_lang is None:
+            target_lang = self.get_target_lang(user_id)
+        if target_lang is None:
+            context.user_data.pending_text = text
+            await update.message.reply_text("🌐 Пожалуйста, выберите язык для перевода:",
+                                            reply_markup=self.create_language_keyboard(update.effective_user.id))
+            return SELECT_LANGUAGE
+        if text:
+            await self.reply_translation(update, text, target_lang)
+            return ConversationHandler.END
+        await update.message.reply_text(
+            f"✏️ Введите текст или отправьте документ (.txt, .md, .srt) для перевода на {target_lang}.\n"
+            f"💡 Сменить язык — кнопкой ниже; перевод одной командой — /translate {target_lang} текст",
+            reply_markup=self.create_language_keyboard(user_id)
+        )
+        return GET_TEXT
 
     async def select_language(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
         """Получает и сохраняет выбранный пользователем язык.
@@ -55,34 +164,196 @@ class TranslationHandlers:
             int: Next conversation state.
         """
         selected_language = update.message.text
-        if selected_language not in cfg.SUPPORTED_LANGUAGES_FREE:
-            await update.message.reply_text("❌ Пожалуйста, выберите язык из предложенного списка.")
+        languages = self.tiers.languages(update.effective_user.id)
+        if selected_language not in languages:
+            if selected_language in cfg.SUPPORTED_LANGUAGES_FULL:
+                await update.message.reply_text(PREMIUM_LANGUAGE_TEXT)
+            else:
+                await update.message.reply_text("❌ Пожалуйста, выберите язык из предложенного списка.")
             return SELECT_LANGUAGE
-        context.user_data["target_lang"] = cfg.SUPPORTED_LANGUAGES_FREE[selected_language]
-        await update.message.reply_text("✏️ Введите текст для перевода:", reply_markup=ReplyKeyboardRemove())
+        target_lang = languages[selected_language]
+        self.set_target_lang(update.effective_user.id, target_lang)
+        pending_text = context.user_data.pending_text
+        context.user_data.pending_text = None
+        if pending_text:
+            await self.reply_translation(update, pending_text, target_lang, reply_markup=ReplyKeyboardRemove())
+        else:
+            await update.message.reply_text("✏️ Введите текст для перевода:", reply_markup=ReplyKeyboardRemove())
         return GET_TEXT
 
     async def get_text(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
-        """Получает текст от пользователя и выполняет перевод.
+        """Получает текст от пользователя и выполняет перевод; кнопка языка меняет язык перевода.
+        Args:
+            update (Update): Telegram update.
+            context (ContextTypes.DEFAULT_TYPE): Telegram context.
+
+        Returns:
+            int: Next conversation state.
+        """
+        if update.message.text in cfg.SUPPORTED_LANGUAGES_FULL:
+            return await self.select_language(update, context)
+        target_lang = self.get_target_lang(update.effective_user.id)
+        if target_lang is None:
+            await update.message.reply_text("🌐 Пожалуйста, выберите язык для перевода:",
+                                            reply_markup=self.create_language_keyboard(update.effective_user.id))
+            return SELECT_LANGUAGE
+        await self.reply_translation(update, update.message.text, target_lang, reply_markup=ReplyKeyboardRemove())
+        return GET_TEXT
+
+    async def select_default_language(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+        """Сохраняет язык по умолчанию, выбранный кнопкой вне диалога перевода.
+        Args:
+            update (Update): Telegram update.
+            context (ContextTypes.DEFAULT_TYPE): Telegram context."""
+        languages = self.tiers.languages(update.effective_user.id)
+        if update.message.text not in languages:
+            await update.message.reply_text(PREMIUM_LANGUAGE_TEXT)
+            return
+        target_lang = languages[update.message.text]
+        self.set_target_lang(update.effective_user.id, target_lang)
+        await update.message.reply_text(f"✅ Язык перевода: {target_lang}. ✏️ Отправьте текст для перевода.",
+                                        reply_markup=ReplyKeyboardRemove())
+
+    async def translate_message(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+        """Переводит сообщение на язык по умолчанию (вне диалога, после выбора языка кнопкой).
+        Args:
+            update (Update): Telegram update.
+            context (ContextTypes.DEFAULT_TYPE): Telegram context."""
+        target_lang = self.get_target_lang(update.effective_user.id)
+        if target_lang is not None:
+            await self.reply_translation(update, update.message.text, target_lang)
+
+    async def reply_translation(self, update: Update, text: str, target_lang: str, reply_markup=None) -> None:
+        """Переводит текст и отправляет результат с указанием языка оригинала.
+
+        Если по алфавиту видно, что текст уже на нужном языке, DeepL не вызывается.
+
+        Args:
+            update (Update): Telegram update.
+            text (str): Text to translate.
+            target_lang (str): Target language code.
+            reply_markup: Optional reply markup for the answer.
+        """
+        user_id = update.effective_user.id
+        if guess_language(text) == target_lang:
+            logger.info(f"Текст пользователя {user_id} уже на {target_lang}, перевод не требуется.")
+            await update.message.reply_text(f"ℹ️ Текст уже на языке {target_lang}, перевод не требуется.",
+                                            reply_markup=reply_markup)
+            return
+        try:
+            # Под нагрузкой запросы премиум-пользователей к DeepL выполняются раньше бесплатных
+            translated_text, source_lang = await get_upstream_scheduler().run(
+                asyncio.to_thread(self.translation_memory.translate_with_source, text, target_lang),
+                self.tiers.priority(user_id)
+            )
+        except (TranslationError, ValueError) as e:
+            logger.error(f"Ошибка перевода для пользователя {user_id}: {str(e)}")
+            message = str(e) if isinstance(e, ValueError) else "Произошла ошибка при переводе текста. Попробуйте позже."
+            await update.message.reply_text(f"❌😔 {message}", reply_markup=reply_markup)
+            return
+        if source_lang and source_lang.split("-")[0] == target_lang.split("-")[0]:
+            await update.message.reply_text(f"ℹ️ Текст уже на языке {target_lang}:\n\n{translated_text}",
+                                            reply_markup=reply_markup)
+        else:
+            await update.message.reply_text(f"🔄 Перевод {source_lang or '?'} → {target_lang}:\n\n{translated_text}",
+                                            reply_markup=reply_markup)
+        logger.info(f"Успешный перевод для пользователя {user_id}")
+
+    async def process_document(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+        """Ставит документ в очередь на перевод.
         Args:
             update (Update): Telegram update.
             context (ContextTypes.DEFAULT_TYPE): Telegram context.
 
         Returns:
-            int: Conversation end state.
+            int: Next conversation state."""
+        document = update.message.document
+        if document.file_size and document.file_size > cfg.DOCUMENT_MAX_SIZE:
+            await update.message.reply_text(
+                f"❌ Документ слишком большой (более {cfg.DOCUMENT_MAX_SIZE // 1024} KB). Разделите его на части."
+            )
+            return GET_TEXT
+        target_lang = self.get_target_lang(update.effective_user.id)
+        if target_lang is None:
+            await update.message.reply_text("🌐 Пожалуйста, выберите язык для перевода:",
+                                            reply_markup=self.create_language_keyboard(update.effective_user.id))
+            return SELECT_LANGUAGE
+        await self.job_queue.submit(
+            "translate_document", update,
+            {"file_id": document.file_id, "file_name": document.file_name, "file_size": document.file_size,
+             "target_lang": target_lang},
+            status_text=f"⌛️ Документ поставлен в очередь на перевод на {target_lang}..."
+        )
+        return GET_TEXT
+
+    async def run_document_job(self, job: Job) -> None:
+        """Скачивает документ и переводит его пакетами абзацев.
+
+        Документ читается построчно; пакеты переводятся параллельно (не более
+        DOCUMENT_TRANSLATION_CONCURRENCY запросов), а результат собирается в памяти в исходном порядке.
+
+        Args:
+            job (Job): Background job with `file_id`, `file_name` and `target_lang` in the payload.
+
+        Raises:
+            JobError: If the document cannot be translated.
         """
-        text_to_translate = update.message.text
-        target_lang = context.user_data["target_lang"]
-        await update.message.reply_text(f"🔄 Перевожу текст на\n{target_lang}: ")
+        file_name = job.payload["file_name"]
+        stem, extension = os.path.splitext(file_name)
+        target_lang = job.payload["target_lang"]
+        window = deque()  # задачи перевода пакетов в порядке следования в документе
+        output = []
         try:
+            reserve = job.payload.get("file_size") or cfg.DOCUMENT_MAX_SIZE
+            async with get_media_storage().workspace("document", reserve) as workspace:
+                document_path = workspace.file(f"translate_{job.id}{extension}")
+                await job.report("⬇️ Скачиваю документ...")
+                document = await job.bot.get_file(job.payload["file_id"])
+                await document.download_to_drive(document_path)
+
+                done = 0
+                with open(document_path, encoding="utf-8-sig", newline="") as source:
+                    blocks = iter_blocks(source, extension.lstrip(".").lower())
+                    for batch in iter_batches(blocks, cfg.DOCUMENT_BATCH_CHARS):
+                        if len(window) >= cfg.DOCUMENT_TRANSLATION_CONCURRENCY:
+                            output.append(await window.popleft())
+                            done += 1
+                            await job.report(f"🔄 Перевожу документ: частей готово {done}...")
+                        window.append(asyncio.create_task(self.translate_blocks(batch, target_lang)))
+                while window:
+                    output.append(await window.popleft())
 
-            translated_text = self.translator.translate(text_to_translate, target_lang)
-            await update.message.reply_text(f"🔄 Перевод на {target_lang}:\n\n{translated_text}")
-            logger.info(f"Успешный перевод для пользователя {update.effective_user.id}")
-        except Exception as e:
-            logger.error(f"Ошибка перевода для пользователя {update.effective_user.id}: {str(e)}")
-            await update.message.reply_text("❌😔 Произошла ошибка при переводе текста. Попробуйте позже.")
-        return GET_TEXT#ConversationHandler.END
+                await job.bot.send_document(chat_id=job.chat_id, document="".join(output).encode("utf-8"),
+                                            filename=f"{stem}.{target_lang.lower()}{extension}",
+                                            reply_to_message_id=job.reply_to_message_id)
+                await job.report("✅ Документ переведён!")
+                logger.info(f"Документ {file_name} переведён для пользователя {job.user_id}.")
+        except UnicodeDecodeError:
+            raise JobError("❌ Документ должен быть в кодировке UTF-8.")
+        except (TranslationError, ValueError) as e:
+            logger.error(f"Ошибка перевода документа у {job.user_id}: {str(e)}")
+            raise JobError("❌ Ошибка при переводе документа. Попробуйте позже.")
+        except MediaStorageError as e:
+            logger.error(f"Нет места для документа пользователя {job.user_id}: {str(e)}")
+            raise JobError("⏳ Сервер сейчас перегружен. Попробуйте отправить документ чуть позже.")
+        finally:
+            for task in window:
+                task.cancel()
+
+    async def translate_blocks(self, batch: list, target_lang: str) -> str:
+        """Переводит пакет блоков документа одним запросом и собирает его обратно.
+        Args:
+            batch (list[tuple[str, bool]]): Blocks from `iter_batches`.
+            target_lang (str): Target language code.
+
+        Returns:
+            str: Translated part of the document."""
+        texts = [text for text, translatable in batch if translatable and text.strip()]
+        if not texts:
+            return "".join(text for text, _ in batch)
+        translations = iter(await asyncio.to_thread(self.translator.translate_batch, texts, target_lang))
+        return "".join(next(translations)[0] if translatable and text.strip() else text
+                       for text, translatable in batch)
 
     async def cancel(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
         """Отменяет процесс перевода.
@@ -92,9 +363,12 @@ class TranslationHandlers:
 
         Returns:
             int: Conversation end state."""
+        context.user_data.pending_text = None
+        # Фоновые задачи отменяются только явной командой /cancel, а не переходом в другой диалог
+        if update.message.text.startswith("/cancel"):
+            self.job_queue.cancel_user(update.effective_chat.id, update.effective_user.id, "translate_document")
         await update.message.reply_text("❌😱 Перевод отменен.\n"
                                         "🔚 Вы вышли из диалога.\n"
                                         "Выберите команду /translate или /start ,любую другую команду для начала диалога ", reply_markup=ReplyKeyboardRemove())
         logger.info(f"Пользователь {update.effective_user.id} отменил перевод.")
         return ConversationHandler.END
-
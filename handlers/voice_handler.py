@@ -1,11 +1,13 @@
 # handlers/voice_handler.py
-import os
+from functools import cached_property
 from telegram import Update, ReplyKeyboardMarkup, ReplyKeyboardRemove
 from telegram.ext import CommandHandler, MessageHandler, filters, CallbackContext, ConversationHandler
 from utils.logger import setup_logger
 import config as cfg
 from services.voices import VoicesService, VoicesError
-from utils.file_utils import ensure_directory, get_abs_path
+from services.inflight_requests import get_inflight_requests, RequestCancelled
+from services.priority_scheduler import get_upstream_scheduler
+from services.user_tiers import get_user_tiers
 
 logger = setup_logger(__name__)
 
@@ -17,8 +19,13 @@ class VoiceHandlers:
 
     def __init__(self):
         """Инициализирует обработчики голосового взаимодействия."""
-        self.voice_service = VoicesService()
         self.voices = cfg.VOICES_GPT
+        self.tiers = get_user_tiers()
+
+    @cached_property
+    def voice_service(self) -> VoicesService:
+        """OpenAI TTS service."""
+        return VoicesService()
 
     def get_handlers(self):
         """Возвращает список обработчиков команды /voice."""
@@ -30,7 +37,12 @@ class VoiceHandlers:
                     CommandHandler("cancel", self.cancel_voice)
                 ],
                 WAITING_FOR_TEXT_INPUT: [
-                    MessageHandler(filters.TEXT & ~filters.COMMAND, self.generate_voice),
+                    MessageHandler(filters.TEXT & ~filters.COMMAND, self.generate_voice, block=False),
+                    CommandHandler("cancel", self.cancel_voice)
+                ],
+                # Пока озвучка выполняется, новый текст её вытесняет, а /cancel отменяет
+                ConversationHandler.WAITING: [
+                    MessageHandler(filters.TEXT & ~filters.COMMAND, self.generate_voice, block=False),
                     CommandHandler("cancel", self.cancel_voice)
                 ]
             },
@@ -65,7 +77,7 @@ class VoiceHandlers:
 
         selected_voice = update.message.text
         if selected_voice in self.voices:
-            context.user_data["selected_voice"] = selected_voice  # Сохраняем выбранный голос
+            context.user_data.voice = selected_voice  # Сохраняем выбранный голос
             await update.message.reply_text(
                 f"✅ Вы выбрали голос: 🔊 {selected_voice}.\n💬 Теперь введите текст для дальнейших команд.",
                 reply_markup=ReplyKeyboardRemove()
@@ -81,7 +93,7 @@ class VoiceHandlers:
             update (Update): Telegram update.
             context (CallbackContext): Telegram context."""
 
-        selected_voice = context.user_data.get("selected_voice")
+        selected_voice = context.user_data.voice
         if not selected_voice:
             await update.message.reply_text("⚠️ Сначала выберите голос с помощью команды /voice.")
             return WAITING_FOR_VOICE_SELECTION
@@ -96,23 +108,15 @@ class VoiceHandlers:
 
             await update.message.reply_text(f"⌛️Начинаю обработку текста и формирую аудиофайл после озвучивания... ")
 
-            # Папка для аудиофайлов
-            audio_dir = get_abs_path("static/voice_file")
-            ensure_directory(audio_dir)
-
-            audio_file_path = os.path.join(audio_dir, f"{update.message.message_id}.mp3")
-
-            # Генерация аудиофайла
-            self.voice_service.generate_audio(text, voice_id, audio_file_path)
-
-            with open(audio_file_path, "rb") as audio:
-                await update.message.reply_audio(audio=audio)
+            # Озвучка отменяется через /cancel или новым текстом; аудио отправляется из памяти, без файла.
+            # Модель и место в очереди к OpenAI зависят от уровня обслуживания пользователя
+            features = self.tiers.features(update.effective_user.id)
+            request = self.voice_service.synthesize_async(text, voice_id, model=features["tts_model"])
+            audio = await get_inflight_requests().run(update.effective_chat.id, update.effective_user.id, "voice",
+                                                      get_upstream_scheduler().run(request, features["priority"]))
+            await update.message.reply_audio(audio=audio, filename=f"{update.message.message_id}.mp3")
             logger.info(f"Аудио отправлено пользователю {update.effective_user.id}.")
 
-            # Удаление файла после отправки
-            os.remove(audio_file_path)
-            logger.info(f"Аудиофайл {audio_file_path} удалён.")
-
             await update.message.reply_text(
                 "💡Чтобы продолжить дальше работать с голосом выберите команду /voice. \n"
                 "Если хотите перейти в другой диалог выберите /start или любую другую команду для начала диалога ",
@@ -124,9 +128,14 @@ class VoiceHandlers:
             logger.error(f"Ошибка при генерации аудио для пользователя {update.effective_user.id}: {str(e)}")
             await update.message.reply_text("❌ Произошла ошибка при генерации аудио. Попробуйте позже.")
             return WAITING_FOR_TEXT_INPUT
+        except RequestCancelled:
+            logger.info(f"Озвучивание для пользователя {update.effective_user.id} отменено, аудио не отправляется.")
+            return WAITING_FOR_TEXT_INPUT
 
     async def cancel_voice(self, update: Update, context: CallbackContext) -> int:
         """Отменяет процесс озвучивания."""
+        if update.message.text.startswith("/cancel"):
+            get_inflight_requests().cancel(update.effective_chat.id, update.effective_user.id, "voice")
         await update.message.reply_text(
             "❌ Озвучивание отменено. \n"
             "Выберите команду /voice или /start ,любую другую команду для начала диалога ",
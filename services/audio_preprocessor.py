@@ -0,0 +1,272 @@
+# services/audio_preprocessor.py
+import asyncio
+import glob
+import multiprocessing
+import os
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+from typing import AsyncIterator, Optional
+import config as cfg
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Удаление тишины: в начале файла и паузы длиннее секунды (оставляя по 0.5 с)
+SILENCE_FILTER = ("silenceremove=start_periods=1:start_threshold=-45dB:"
+                  "stop_periods=-1:stop_duration=1:stop_threshold=-45dB:stop_silence=0.5")
+FFMPEG_TIMEOUT = 600  # секунды
+
+
+class AudioPreprocessingError(Exception):
+    """Кастомное исключение для ошибок подготовки аудио."""
+    pass
+
+
+def build_transcode_args(ffmpeg_path: str, src: str, dst: str, sample_rate: int = 16000,
+                         bitrate: str = "24k", trim_silence: bool = True) -> list:
+    """Builds the ffmpeg command that prepares audio for Whisper.
+
+    Downmixes to mono, resamples and encodes to low-bitrate Opus in an Ogg container.
+
+    Args:
+        ffmpeg_path (str): Path to the ffmpeg binary.
+        src (str): Source audio file.
+        dst (str): Destination .ogg file.
+        sample_rate (int): Output sample rate in Hz.
+        bitrate (str): Opus bitrate, e.g. "24k".
+        trim_silence (bool): Whether to remove leading silence and long pauses.
+
+    Returns:
+        list[str]: Command line arguments.
+    """
+    args = [ffmpeg_path, "-hide_banner", "-loglevel", "error", "-y", "-i", src, "-vn"]
+    if trim_silence:
+        args += ["-af", SILENCE_FILTER]
+    args += ["-ac", "1", "-ar", str(sample_rate), "-c:a", "libopus", "-b:a", bitrate,
+             "-application", "voip", dst]
+    return args
+
+
+def build_extract_args(ffmpeg_path: str, sample_rate: int = 16000, bitrate: str = "24k",
+                       trim_silence: bool = True, max_seconds: Optional[int] = None) -> list:
+    """Builds the ffmpeg command that reads media from stdin and writes Whisper-ready audio to stdout.
+
+    Args:
+        ffmpeg_path (str): Path to the ffmpeg binary.
+        sample_rate (int): Output sample rate in Hz.
+        bitrate (str): Opus bitrate, e.g. "24k".
+        trim_silence (bool): Whether to remove leading silence and long pauses.
+        max_seconds (Optional[int]): Maximum duration of the extracted audio.
+
+    Returns:
+        list[str]: Command line arguments.
+    """
+    args = build_transcode_args(ffmpeg_path, "pipe:0", "pipe:1", sample_rate, bitrate, trim_silence)
+    # Формат вывода в канал нельзя определить по расширению
+    args[-1:-1] = ["-f", "ogg"]
+    if max_seconds:
+        args[-1:-1] = ["-t", str(max_seconds)]
+    return args
+
+
+async def pipe_through(args: list, chunks: AsyncIterator[bytes], timeout: float = FFMPEG_TIMEOUT) -> bytes:
+    """Streams chunks through a subprocess (stdin -> stdout) and returns its output.
+
+    Args:
+        args (list[str]): Command line of the subprocess.
+        chunks (AsyncIterator[bytes]): Input data, e.g. a download stream.
+        timeout (float): Maximum processing time in seconds.
+
+    Returns:
+        bytes: Output of the subprocess.
+
+    Raises:
+        AudioPreprocessingError: If the subprocess fails or times out.
+    """
+    process = await asyncio.create_subprocess_exec(*args, stdin=asyncio.subprocess.PIPE,
+                                                   stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE)
+
+    async def feed() -> None:
+        try:
+            async for chunk in chunks:
+                process.stdin.write(chunk)
+                await process.stdin.drain()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # ffmpeg закончил раньше: ошибка во входных данных или достигнут предел -t
+        finally:
+            process.stdin.close()
+
+    feeder = asyncio.create_task(feed())
+    try:
+        output, errors = await asyncio.wait_for(
+            asyncio.gather(process.stdout.read(), process.stderr.read()), timeout)
+        await process.wait()
+        await feeder  # ошибки скачивания пробрасываются вызывающему
+    except asyncio.TimeoutError:
+        raise AudioPreprocessingError(f"ffmpeg не завершился за {timeout:.0f} с")
+    finally:
+        feeder.cancel()
+        if process.returncode is None:
+            process.kill()
+            await process.wait()
+    if process.returncode != 0:
+        raise AudioPreprocessingError(errors.decode("utf-8", errors="replace").strip()[-500:])
+    return output
+
+
+def transcode_for_whisper(ffmpeg_path: str, src: str, dst: str, sample_rate: int,
+                          bitrate: str, trim_silence: bool) -> int:
+    """Runs ffmpeg; executed in a worker process of the pool.
+
+    Returns:
+        int: Size of the resulting file in bytes.
+    """
+    args = build_transcode_args(ffmpeg_path, src, dst, sample_rate, bitrate, trim_silence)
+    result = subprocess.run(args, capture_output=True, timeout=FFMPEG_TIMEOUT)
+    if result.returncode != 0:
+        raise AudioPreprocessingError(result.stderr.decode("utf-8", errors="replace").strip()[-500:])
+    return os.path.getsize(dst)
+
+
+def split_audio(ffmpeg_path: str, src: str, segment_seconds: int) -> list:
+    """Splits an audio file into consecutive segments without re-encoding; executed in a worker process.
+
+    Returns:
+        list[str]: Paths of the segments in playback order.
+    """
+    base = os.path.splitext(src)[0]
+    args = [ffmpeg_path, "-hide_banner", "-loglevel", "error", "-y", "-i", src,
+            "-f", "segment", "-segment_time", str(segment_seconds), "-c", "copy", f"{base}.part%03d.ogg"]
+    result = subprocess.run(args, capture_output=True, timeout=FFMPEG_TIMEOUT)
+    segments = sorted(glob.glob(f"{glob.escape(base)}.part[0-9][0-9][0-9].ogg"))
+    if result.returncode != 0:
+        for path in segments:
+            os.remove(path)
+        raise AudioPreprocessingError(result.stderr.decode("utf-8", errors="replace").strip()[-500:])
+    return segments
+
+
+def probe_duration(ffprobe_path: str, path: str) -> float:
+    """Returns the duration of a media file in seconds using ffprobe; executed in a worker process.
+
+    Returns:
+        float: Duration in seconds.
+    """
+    result = subprocess.run(
+        [ffprobe_path, "-v", "error", "-show_entries", "format=duration",
+         "-of", "default=noprint_wrappers=1:nokey=1", path],
+        capture_output=True, timeout=60
+    )
+    if result.returncode != 0:
+        raise AudioPreprocessingError(result.stderr.decode("utf-8", errors="replace").strip()[-500:])
+    try:
+        return float(result.stdout.strip())
+    except ValueError:
+        raise AudioPreprocessingError(f"ffprobe не вернул длительность для {path}")
+
+
+class AudioPreprocessor:
+    """Подготавливает аудио перед отправкой в Whisper в ограниченном пуле процессов.
+
+    Моно, 16 кГц, Opus с низким битрейтом и удалением тишины уменьшают размер загрузки
+    на порядок; ffmpeg и ffprobe не выполняются в потоке цикла событий.
+    """
+
+    def __init__(self, max_workers: int = cfg.AUDIO_WORKERS):
+        """Инициализирует препроцессор; пул процессов создаётся при первом использовании.
+
+        Args:
+            max_workers (int): Maximum number of concurrent ffmpeg processes.
+        """
+        self.max_workers = max_workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+        # Потоковые процессы ffmpeg запускаются вне пула, но с тем же ограничением
+        self._stream_slots = asyncio.Semaphore(max_workers)
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn: безопасно для процесса с потоками и запущенным циклом событий
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers,
+                                                 mp_context=multiprocessing.get_context("spawn"))
+        return self._executor
+
+    async def get_duration(self, path: str) -> float:
+        """Returns the duration of an audio file in seconds.
+
+        Args:
+            path (str): Path to the audio file.
+
+        Returns:
+            float: Duration in seconds.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, probe_duration, cfg.FFPROBE_PATH, path)
+
+    async def prepare(self, src: str) -> str:
+        """Transcodes audio to mono 16 kHz low-bitrate Opus next to the source file.
+
+        Args:
+            src (str): Source audio file.
+
+        Returns:
+            str: Path to the prepared .ogg file.
+
+        Raises:
+            AudioPreprocessingError: If ffmpeg fails.
+        """
+        dst = f"{os.path.splitext(src)[0]}.whisper.ogg"
+        loop = asyncio.get_running_loop()
+        size = await loop.run_in_executor(
+            self.executor, transcode_for_whisper, cfg.FFMPEG_PATH, src, dst,
+            cfg.AUDIO_SAMPLE_RATE, cfg.AUDIO_BITRATE, cfg.AUDIO_TRIM_SILENCE
+        )
+        logger.info(f"Аудио подготовлено для Whisper: {os.path.getsize(src)} -> {size} байт.")
+        return dst
+
+    async def split(self, src: str, segment_seconds: int) -> list:
+        """Splits prepared audio into segments for stage-by-stage processing.
+
+        Args:
+            src (str): Prepared audio file (Ogg/Opus).
+            segment_seconds (int): Approximate segment length in seconds.
+
+        Returns:
+            list[str]: Paths of the segments in playback order.
+
+        Raises:
+            AudioPreprocessingError: If ffmpeg fails.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, split_audio, cfg.FFMPEG_PATH, src, segment_seconds)
+
+    async def extract_audio(self, chunks: AsyncIterator[bytes], max_seconds: Optional[int] = None) -> bytes:
+        """Extracts the audio track of a media stream (video, video note, audio) without temporary files.
+
+        The download stream is piped into ffmpeg's stdin; mono low-bitrate Opus is read from stdout,
+        so only the compressed audio is kept in memory.
+
+        Args:
+            chunks (AsyncIterator[bytes]): Media file content.
+            max_seconds (Optional[int]): Maximum duration of the extracted audio.
+
+        Returns:
+            bytes: Ogg/Opus audio.
+
+        Raises:
+            AudioPreprocessingError: If ffmpeg fails, e.g. the container cannot be read from a pipe.
+        """
+        args = build_extract_args(cfg.FFMPEG_PATH, cfg.AUDIO_SAMPLE_RATE, cfg.AUDIO_BITRATE,
+                                  cfg.AUDIO_TRIM_SILENCE, max_seconds)
+        async with self._stream_slots:
+            audio = await pipe_through(args, chunks)
+        if not audio:
+            raise AudioPreprocessingError("ffmpeg не вернул аудио")
+        logger.info(f"Аудиодорожка извлечена потоково: {len(audio)} байт.")
+        return audio
+
+    def shutdown(self) -> None:
+        """Останавливает пул процессов."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,302 @@
+# services/background_jobs.py
+import asyncio
+import json
+import time
+from typing import Awaitable, Callable, Dict, Optional
+from telegram import Bot, Update
+from telegram.error import BadRequest
+import config as cfg
+from database.database import Database, get_database
+from services.priority_scheduler import queue_key
+from services.user_tiers import UserTiers, get_user_tiers
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS background_jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    chat_id INTEGER NOT NULL,
+    user_id INTEGER,
+    reply_to_message_id INTEGER,
+    status_message_id INTEGER,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    progress TEXT,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    priority INTEGER NOT NULL DEFAULT 1,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_background_jobs_status ON background_jobs (status, id);
+"""
+
+# Статусы задач
+PENDING, RUNNING, DONE, FAILED, CANCELLED = "pending", "running", "done", "failed", "cancelled"
+
+
+class JobError(Exception):
+    """Ошибка выполнения задачи; текст исключения показывается пользователю."""
+    pass
+
+
+class Job:
+    """Фоновая задача, передаваемая исполнителю."""
+
+    def __init__(self, row, bot: Bot, queue: "BackgroundJobQueue"):
+        """Создаёт задачу из строки таблицы `background_jobs`.
+
+        Args:
+            row (sqlite3.Row): Job row.
+            bot (Bot): Telegram bot used for progress updates and result delivery.
+            queue (BackgroundJobQueue): Owning queue.
+        """
+        self.id = row["id"]
+        self.kind = row["kind"]
+        self.chat_id = row["chat_id"]
+        self.user_id = row["user_id"]
+        self.reply_to_message_id = row["reply_to_message_id"]
+        self.status_message_id = row["status_message_id"]
+        self.payload = json.loads(row["payload"])
+        self.bot = bot
+        self.queue = queue
+
+    async def report(self, text: str) -> None:
+        """Сохраняет прогресс задачи и выводит его в статусное сообщение.
+
+        Args:
+            text (str): Progress text.
+        """
+        self.queue.db.execute("UPDATE background_jobs SET progress = ?, updated_at = ? WHERE id = ?",
+                              (text, time.time(), self.id))
+        if not self.status_message_id:
+            return
+        try:
+            await self.bot.edit_message_text(chat_id=self.chat_id, message_id=self.status_message_id,
+                                             text=f"#{self.id} {text}")
+        except BadRequest as e:
+            # "Message is not modified" и удалённые сообщения не мешают выполнению задачи
+            logger.debug(f"Не удалось обновить статус задачи #{self.id}: {e}")
+
+
+JobExecutor = Callable[[Job], Awaitable[None]]
+
+
+class BackgroundJobQueue:
+    """Устойчивая к перезапускам очередь фоновых задач на SQLite с пулом исполнителей.
+
+    Задачи сохраняются в БД до выполнения; после перезапуска незавершённые задачи
+    выполняются заново, и результат доставляется пользователю. Под нагрузкой задачи
+    премиум-пользователей обгоняют бесплатные (см. `queue_key`).
+    """
+
+    def __init__(self, db: Optional[Database] = None, workers: int = cfg.JOB_WORKERS,
+                 max_attempts: int = cfg.JOB_MAX_ATTEMPTS, tiers: Optional[UserTiers] = None,
+                 headstart: float = cfg.PRIORITY_HEADSTART):
+        """Инициализирует очередь.
+
+        Args:
+            db (Optional[Database]): Database instance. Defaults to the shared one.
+            workers (int): Number of concurrent workers.
+            max_attempts (int): How many times a job is started before it is marked failed.
+            tiers (Optional[UserTiers]): Tier storage that defines job priorities. Defaults to the shared one.
+            headstart (float): Head start of one priority level in seconds.
+        """
+        self.db = db or get_database()
+        self.db.executescript(SCHEMA)
+        columns = {row["name"] for row in self.db.fetchall("PRAGMA table_info(background_jobs)")}
+        if "priority" not in columns:
+            # БД, созданная до появления уровней обслуживания
+            self.db.execute("ALTER TABLE background_jobs ADD COLUMN priority INTEGER NOT NULL DEFAULT 1")
+        self.tiers = tiers or get_user_tiers()
+        self.headstart = headstart
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.bot: Optional[Bot] = None
+        self._executors: Dict[str, JobExecutor] = {}
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._worker_tasks = []
+        self._running: Dict[int, asyncio.Task] = {}
+        self._stopping = False
+        self._draining = False
+
+    def register(self, kind: str, executor: JobExecutor) -> None:
+        """Registers an executor coroutine for a job kind.
+
+        Args:
+            kind (str): Job kind, e.g. "speech".
+            executor (JobExecutor): Coroutine function that performs the job.
+        """
+        self._executors[kind] = executor
+
+    async def start(self, bot: Bot) -> None:
+        """Восстанавливает незавершённые задачи и запускает исполнителей.
+
+        Args:
+            bot (Bot): Telegram bot.
+        """
+        self.bot = bot
+        self._stopping = False
+        self._draining = False
+        self._queue = asyncio.PriorityQueue()
+        # Задачи, прерванные перезапуском, возвращаются в очередь
+        self.db.execute("UPDATE background_jobs SET status = ?, updated_at = ? WHERE status = ?",
+                        (PENDING, time.time(), RUNNING))
+        rows = self.db.fetchall("SELECT id, priority, created_at FROM background_jobs WHERE status = ? ORDER BY id",
+                                (PENDING,))
+        for row in rows:
+            self._enqueue(row["id"], row["priority"], row["created_at"])
+        self._worker_tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        logger.info(f"Очередь фоновых задач запущена: исполнителей {self.workers}, восстановлено задач {len(rows)}.")
+
+    async def stop(self) -> None:
+        """Останавливает исполнителей; прерванные задачи будут выполнены после перезапуска."""
+        self._stopping = True
+        for task in self._worker_tasks:
+            task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+        logger.info("Очередь фоновых задач остановлена.")
+
+    async def drain(self, timeout: float) -> None:
+        """Перестаёт брать новые задачи, ждёт выполняющиеся не дольше `timeout` секунд и останавливается.
+
+        Ожидающие задачи остаются в БД и будут выполнены после перезапуска; задачи, не успевшие
+        завершиться до истечения времени, прерываются и также будут выполнены заново.
+
+        Args:
+            timeout (float): Maximum time to wait for running jobs, in seconds.
+        """
+        self._draining = True
+        running = list(self._running.values())
+        if running:
+            logger.info(f"Ожидаем завершения выполняющихся задач: {len(running)}.")
+            _, pending = await asyncio.wait(running, timeout=max(timeout, 0))
+            if pending:
+                logger.warning(f"Не дождались задач: {len(pending)}; они будут выполнены после перезапуска.")
+        await self.stop()
+
+    async def submit(self, kind: str, update: Update, payload: dict,
+                     status_text: str = "⏳ Задача поставлена в очередь...") -> int:
+        """Сохраняет задачу, отправляет статусное сообщение и ставит задачу в очередь.
+
+        Args:
+            kind (str): Job kind.
+            update (Update): Telegram update that created the job.
+            payload (dict): JSON-serializable job parameters.
+            status_text (str): Initial status message text.
+
+        Returns:
+            int: Job ID.
+        """
+        if kind not in self._executors:
+            raise ValueError(f"Неизвестный тип задачи: {kind}")
+        now = time.time()
+        priority = self.tiers.priority(update.effective_user.id)
+        job_id = self.db.insert(
+            "INSERT INTO background_jobs (kind, chat_id, user_id, reply_to_message_id, payload, status, "
+            "priority, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (kind, update.effective_chat.id, update.effective_user.id, update.message.message_id,
+             json.dumps(payload, ensure_ascii=False), PENDING, priority, now, now)
+        )
+        status_message = await update.message.reply_text(f"#{job_id} {status_text}\n❌ Отмена: /cancel")
+        self.db.execute("UPDATE background_jobs SET status_message_id = ? WHERE id = ?",
+                        (status_message.message_id, job_id))
+        self._enqueue(job_id, priority, now)
+        logger.info(f"Задача #{job_id} ({kind}, приоритет {priority}) поставлена в очередь "
+                    f"пользователем {update.effective_user.id}.")
+        return job_id
+
+    def _enqueue(self, job_id: int, priority: int, created_at: float) -> None:
+        self._queue.put_nowait((queue_key(priority, created_at, self.headstart), job_id))
+
+    def cancel_user(self, chat_id: int, user_id: int, kind: Optional[str] = None) -> int:
+        """Отменяет ожидающие и выполняющиеся задачи пользователя в чате.
+
+        Задачи других участников группы не затрагиваются.
+
+        Args:
+            chat_id (int): Telegram chat ID.
+            user_id (int): Telegram user ID.
+            kind (Optional[str]): Cancel only jobs of this kind (the dialog being exited). Defaults to all kinds.
+
+        Returns:
+            int: Number of cancelled jobs.
+        """
+        condition = "chat_id = ? AND user_id = ? AND status IN (?, ?)"
+        params = (chat_id, user_id, PENDING, RUNNING)
+        if kind is not None:
+            condition += " AND kind = ?"
+            params += (kind,)
+        rows = self.db.fetchall(f"SELECT id FROM background_jobs WHERE {condition}", params)
+        self.db.execute(f"UPDATE background_jobs SET status = ?, updated_at = ? WHERE {condition}",
+                        (CANCELLED, time.time()) + params)
+        for row in rows:
+            task = self._running.get(row["id"])
+            if task is not None:
+                task.cancel()
+        if rows:
+            logger.info(f"Отменено задач пользователя {user_id} в чате {chat_id}"
+                        f"{f' ({kind})' if kind else ''}: {len(rows)}.")
+        return len(rows)
+
+    def _set_status(self, job_id: int, status: str, error: str = None) -> None:
+        self.db.execute("UPDATE background_jobs SET status = ?, error = ?, updated_at = ? WHERE id = ?",
+                        (status, error, time.time(), job_id))
+
+    async def _worker(self) -> None:
+        """Забирает задачи из очереди и выполняет их."""
+        while True:
+            _, job_id = await self._queue.get()
+            try:
+                # При остановке новые задачи не начинаются: они остаются в БД в статусе pending
+                if not self._draining:
+                    await self._run(job_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Сбой исполнителя при обработке задачи #{job_id}: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job_id: int) -> None:
+        """Выполняет одну задачу и фиксирует её итоговый статус."""
+        row = self.db.fetchone("SELECT * FROM background_jobs WHERE id = ?", (job_id,))
+        if row is None or row["status"] != PENDING:
+            return
+        job = Job(row, self.bot, self)
+        executor = self._executors.get(job.kind)
+        if executor is None:
+            self._set_status(job_id, FAILED, f"Нет исполнителя для задачи типа {job.kind}")
+            return
+        if row["attempts"] >= self.max_attempts:
+            self._set_status(job_id, FAILED, "Превышено число попыток")
+            await job.report("❌ Задачу не удалось выполнить. Попробуйте позже.")
+            return
+        self.db.execute("UPDATE background_jobs SET status = ?, attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                        (RUNNING, time.time(), job_id))
+
+        task = asyncio.create_task(executor(job))
+        self._running[job_id] = task
+        try:
+            await task
+            self._set_status(job_id, DONE)
+            logger.info(f"Задача #{job_id} ({job.kind}) выполнена.")
+        except asyncio.CancelledError:
+            if self._stopping:
+                # Задача останется в статусе running и будет перезапущена после рестарта
+                task.cancel()
+                raise
+            await job.report("❌ Задача отменена.")
+            logger.info(f"Задача #{job_id} ({job.kind}) отменена.")
+        except JobError as e:
+            self._set_status(job_id, FAILED, str(e))
+            await job.report(str(e))
+        except Exception as e:
+            self._set_status(job_id, FAILED, str(e))
+            logger.error(f"Ошибка выполнения задачи #{job_id} ({job.kind}): {e}")
+            await job.report("❌ Ошибка при выполнении задачи. Попробуйте позже.")
+        finally:
+            self._running.pop(job_id, None)
@@ -0,0 +1,274 @@
+# services/credential_pool.py
+import threading
+import time
+from typing import Dict, Optional
+import config as cfg
+from utils.api_utils import RetryPolicy, get_status_code, parse_duration, parse_retry_after
+from utils.logger import setup_logger
+from utils.startup_utils import lazy_import
+
+openai = lazy_import("openai")
+
+logger = setup_logger(__name__)
+
+# Ответы, после которых ключ надолго исключается из пула: недействительный ключ и исчерпанная
+# оплаченная квота (456 — квота DeepL, insufficient_quota — OpenAI)
+DISABLE_STATUS_CODES = frozenset({401, 403, 456})
+QUOTA_ERROR_CODE = "insufficient_quota"
+# Ошибки, после которых запрос стоит сразу повторить с другим ключом
+FAILOVER_STATUS_CODES = DISABLE_STATUS_CODES | {429}
+
+
+class Credential:
+    """Ключ API в пуле: вес, состояние лимитов по заголовкам ответов и счётчики использования."""
+
+    def __init__(self, name: str, key: str, weight: float = 1.0):
+        """Initializes the credential.
+
+        Args:
+            name (str): Name used in logs and metrics instead of the secret key, e.g. "openai#1".
+            key (str): API key.
+            weight (float): Share of requests relative to other keys of the pool.
+        """
+        self.name = name
+        self.key = key
+        self.weight = weight
+        self.current_weight = 0.0  # состояние плавного взвешенного round-robin
+        self.cooldown_until = 0.0
+        self.remaining_requests: Optional[int] = None
+        self.remaining_tokens: Optional[int] = None
+        self.requests = 0
+        self.errors = 0
+        self.rate_limited = 0
+        self.clients: dict = {}  # клиенты SDK, привязанные к ключу
+
+    def to_dict(self, now: Optional[float] = None) -> dict:
+        """Returns usage metrics of the key (without the key itself)."""
+        now = time.monotonic() if now is None else now
+        return {"name": self.name, "weight": self.weight, "requests": self.requests, "errors": self.errors,
+                "rate_limited": self.rate_limited, "remaining_requests": self.remaining_requests,
+                "remaining_tokens": self.remaining_tokens, "cooldown": max(self.cooldown_until - now, 0.0)}
+
+
+class CredentialPool:
+    """Пул ключей одного провайдера с взвешенным распределением запросов.
+
+    Ключи выбираются плавным взвешенным round-robin: ключ с весом 2 получает вдвое больше
+    запросов, чем ключ с весом 1, и запросы к нему не идут подряд. По заголовкам ответов
+    (`x-ratelimit-remaining-*`, `x-ratelimit-reset-*`, `Retry-After`) пул следит за лимитами
+    каждого ключа: исчерпавший лимит ключ отдыхает до сброса, недействительный или без квоты —
+    `disable_seconds`. Если отдыхают все ключи, используется тот, что освободится раньше.
+    Пул потокобезопасен: синхронные сервисы вызывают его из потоков `asyncio.to_thread`.
+    """
+
+    def __init__(self, provider: str, keys: list, weights: Optional[list] = None,
+                 cooldown: float = cfg.CREDENTIAL_COOLDOWN, disable_seconds: float = cfg.CREDENTIAL_DISABLE_SECONDS):
+        """Initializes the pool.
+
+        Args:
+            provider (str): Provider name, e.g. "openai".
+            keys (list[str]): API keys.
+            weights (Optional[list[float]]): Weights in the order of keys; missing weights are 1.
+            cooldown (float): Rest time of a rate-limited key when the server gives no reset time, in seconds.
+            disable_seconds (float): Rest time of a rejected or out-of-quota key, in seconds.
+
+        Raises:
+            ValueError: If no keys are given.
+        """
+        if not keys:
+            raise ValueError(f"Не заданы ключи API для {provider}.")
+        weights = list(weights or [])
+        self.provider = provider
+        self.credentials = [Credential(f"{provider}#{index + 1}", key,
+                                       max(weights[index], 0.0) if index < len(weights) else 1.0)
+                            for index, key in enumerate(keys)]
+        self.cooldown = cooldown
+        self.disable_seconds = disable_seconds
+        self._lock = threading.Lock()
+
+    def acquire(self, now: Optional[float] = None) -> Credential:
+        """Выбирает ключ для следующего запроса.
+
+        Args:
+            now (Optional[float]): Current `time.monotonic()` value.
+
+        Returns:
+            Credential: Selected key.
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            available = [c for c in self.credentials if c.cooldown_until <= now and c.weight > 0]
+            if not available:
+                credential = min(self.credentials, key=lambda c: c.cooldown_until)
+                logger.warning(f"Все ключи {self.provider} на паузе, используется {credential.name} "
+                               f"(освободится через {credential.cooldown_until - now:.1f} с).")
+            else:
+                total = sum(c.weight for c in available)
+                for c in available:
+                    c.current_weight += c.weight
+                credential = max(available, key=lambda c: c.current_weight)
+                credential.current_weight -= total
+            credential.requests += 1
+            return credential
+
+    def observe(self, credential: Credential, status_code: int, headers=None, body: str = "",
+                now: Optional[float] = None) -> None:
+        """Учитывает ответ API: обновляет остатки лимитов и при необходимости ставит ключ на паузу.
+
+        Args:
+            credential (Credential): Key the request was sent with.
+            status_code (int): HTTP status of the response.
+            headers: Response headers (case-insensitive mapping).
+            body (str): Body of an error response (used to recognize exhausted quota).
+            now (Optional[float]): Current `time.monotonic()` value.
+        """
+        now = time.monotonic() if now is None else now
+        headers = headers or {}
+        with self._lock:
+            remaining_requests = self._header_int(headers, "x-ratelimit-remaining-requests")
+            remaining_tokens = self._header_int(headers, "x-ratelimit-remaining-tokens")
+            if remaining_requests is not None:
+                credential.remaining_requests = remaining_requests
+            if remaining_tokens is not None:
+                credential.remaining_tokens = remaining_tokens
+            if status_code < 400:
+                # Лимит исчерпан последним запросом: ключ отдыхает до сброса счётчика
+                resets = [parse_duration(headers.get(f"x-ratelimit-reset-{kind}"))
+                          for kind, left in (("requests", remaining_requests), ("tokens", remaining_tokens))
+                          if left == 0]
+                resets = [reset for reset in resets if reset]
+                if resets:
+                    self._pause(credential, now, max(resets), "лимит исчерпан")
+                return
+            credential.errors += 1
+            if status_code in DISABLE_STATUS_CODES or QUOTA_ERROR_CODE in body:
+                logger.error(f"Ключ {credential.name} отклонён (HTTP {status_code}) и исключён из пула на "
+                             f"{self.disable_seconds:.0f} с.")
+                self._pause(credential, now, self.disable_seconds, f"HTTP {status_code}")
+            elif status_code == 429:
+                credential.rate_limited += 1
+                delay = parse_retry_after(headers)
+                if delay is None:
+                    delay = max(filter(None, (parse_duration(headers.get("x-ratelimit-reset-requests")),
+                                              parse_duration(headers.get("x-ratelimit-reset-tokens")))),
+                                default=self.cooldown)
+                self._pause(credential, now, delay, "HTTP 429")
+
+    def can_failover(self, exc: BaseException, now: Optional[float] = None) -> bool:
+        """Checks if a failed request can be repeated at once with another key of the pool.
+
+        Args:
+            exc (BaseException): Error of the failed request.
+            now (Optional[float]): Current `time.monotonic()` value.
+
+        Returns:
+            bool: True for rate limit, rejected key and quota errors while some key is not paused.
+        """
+        if get_status_code(exc) not in FAILOVER_STATUS_CODES and getattr(exc, "code", None) != QUOTA_ERROR_CODE:
+            return False
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            return any(c.cooldown_until <= now and c.weight > 0 for c in self.credentials)
+
+    def observe_response(self, credential: Credential, response) -> None:
+        """Учитывает прочитанный ответ httpx (тело ошибки уже загружено)."""
+        body = response.text if response.status_code >= 400 else ""
+        self.observe(credential, response.status_code, response.headers, body)
+
+    def stats(self) -> list:
+        """Returns usage metrics of all keys of the pool."""
+        now = time.monotonic()
+        with self._lock:
+            return [credential.to_dict(now) for credential in self.credentials]
+
+    def _pause(self, credential: Credential, now: float, seconds: float, reason: str) -> None:
+        credential.cooldown_until = max(credential.cooldown_until, now + seconds)
+        logger.warning(f"Ключ {credential.name} на паузе {seconds:.1f} с: {reason}.")
+
+    @staticmethod
+    def _header_int(headers, name: str) -> Optional[int]:
+        try:
+            value = headers.get(name)
+            return int(value) if value is not None else None
+        except (TypeError, ValueError):
+            return None
+
+
+_pools: Dict[str, CredentialPool] = {}
+_pools_lock = threading.Lock()
+
+# Ключи и веса провайдеров из конфигурации
+PROVIDER_KEYS = {
+    "openai": lambda: (cfg.OPENAI_API_KEYS, cfg.OPENAI_API_KEY_WEIGHTS),
+    "deepl": lambda: (cfg.DEEPL_API_KEYS, cfg.DEEPL_API_KEY_WEIGHTS),
+}
+
+
+def get_credential_pool(provider: str) -> CredentialPool:
+    """Returns the shared key pool of a provider ("openai" or "deepl"), creating it on first use.
+
+    Args:
+        provider (str): Provider name.
+
+    Returns:
+        CredentialPool: Shared pool.
+    """
+    with _pools_lock:
+        if provider not in _pools:
+            keys, weights = PROVIDER_KEYS[provider]()
+            _pools[provider] = CredentialPool(provider, keys, weights)
+        return _pools[provider]
+
+
+def openai_failover(exc: BaseException) -> bool:
+    """Failover check of the OpenAI pool for RetryPolicy (see `CredentialPool.can_failover`)."""
+    return get_credential_pool("openai").can_failover(exc)
+
+
+# Политика повторов запросов к OpenAI: ошибки ключа повторяются сразу с другим ключом пула
+OPENAI_RETRY_POLICY = RetryPolicy(failover=openai_failover)
+
+
+def openai_client():
+    """Returns a synchronous OpenAI client bound to the next key of the pool.
+
+    Clients are created once per key; every response updates the key's limits in the pool.
+    Retries of a failed request (RetryPolicy) call this again and may use another key.
+
+    Returns:
+        openai.OpenAI: Client without built-in retries.
+    """
+    pool = get_credential_pool("openai")
+    credential = pool.acquire()
+    client = credential.clients.get("sync")
+    if client is None:
+        def observe(response) -> None:
+            if response.status_code >= 400:
+                response.read()
+            pool.observe_response(credential, response)
+
+        http_client = openai.DefaultHttpxClient(event_hooks={"response": [observe]})
+        client = credential.clients.setdefault(
+            "sync", openai.OpenAI(api_key=credential.key, max_retries=0, http_client=http_client))
+    return client
+
+
+def async_openai_client():
+    """Returns an asynchronous OpenAI client bound to the next key of the pool (see `openai_client`).
+
+    Returns:
+        openai.AsyncOpenAI: Client without built-in retries.
+    """
+    pool = get_credential_pool("openai")
+    credential = pool.acquire()
+    client = credential.clients.get("async")
+    if client is None:
+        async def observe(response) -> None:
+            if response.status_code >= 400:
+                await response.aread()
+            pool.observe_response(credential, response)
+
+        http_client = openai.DefaultAsyncHttpxClient(event_hooks={"response": [observe]})
+        client = credential.clients.setdefault(
+            "async", openai.AsyncOpenAI(api_key=credential.key, max_retries=0, http_client=http_client))
+    return client
@@ -0,0 +1,108 @@
+# services/health_server.py
+import asyncio
+import json
+import time
+from typing import Optional
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+REASONS = {200: "OK", 404: "Not Found", 405: "Method Not Allowed", 503: "Service Unavailable"}
+
+
+class HealthServer:
+    """HTTP-эндпоинты для оркестратора и балансировщика.
+
+    * `/healthz` (liveness) — процесс и цикл событий живы;
+    * `/readyz` (readiness) — бот принимает обновления и не находится в процессе остановки;
+    * дополнительные диагностические отчёты, зарегистрированные в `reports`.
+
+    Состояние внешних API (OpenAI, DeepL) возвращается в обоих ответах. Недоступность API
+    переводит статус в `degraded`, но не снимает готовность: при общем сбое провайдера
+    все экземпляры одинаково не смогли бы обработать запрос.
+    """
+
+    def __init__(self, host: str, port: int):
+        """Инициализирует сервер (не запуская его).
+
+        Args:
+            host (str): Interface to listen on.
+            port (int): TCP port; 0 disables the server.
+        """
+        self.host = host
+        self.port = port
+        self.ready = False
+        self.draining = False
+        self.started_at = time.time()
+        self.upstreams: dict = {}
+        self.reports: dict = {}  # путь -> функция, возвращающая диагностический отчёт (JSON)
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    def set_upstream(self, name: str, healthy: bool, error: str = None) -> None:
+        """Records the result of an upstream API check.
+
+        Args:
+            name (str): Upstream name, e.g. "openai".
+            healthy (bool): Whether the last check succeeded.
+            error (str): Error text of a failed check.
+        """
+        self.upstreams[name] = {"healthy": healthy, "checked_at": round(time.time()), "error": error}
+
+    def status(self, path: str) -> tuple:
+        """Builds the response for a health endpoint.
+
+        Args:
+            path (str): Request path.
+
+        Returns:
+            tuple[int, dict]: HTTP status code and JSON body.
+        """
+        degraded = any(not upstream["healthy"] for upstream in self.upstreams.values())
+        body = {
+            "status": "draining" if self.draining else "degraded" if degraded else "ok",
+            "uptime": round(time.time() - self.started_at),
+            "upstreams": self.upstreams,
+        }
+        if path == "/healthz":
+            return 200, body
+        if path == "/readyz":
+            return (200 if self.ready and not self.draining else 503), body
+        if path in self.reports:
+            return 200, self.reports[path]()
+        return 404, {"error": "not found"}
+
+    async def start(self) -> None:
+        """Начинает принимать HTTP-запросы."""
+        if not self.port:
+            return
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        paths = ", ".join(["/healthz", "/readyz", *self.reports])
+        logger.info(f"Эндпоинты здоровья доступны на {self.host}:{self.port} ({paths}).")
+
+    async def stop(self) -> None:
+        """Закрывает сервер."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), timeout=5)
+            # Заголовки запроса не нужны, но их нужно дочитать
+            while await asyncio.wait_for(reader.readline(), timeout=5) not in (b"\r\n", b"\n", b""):
+                pass
+            parts = request_line.decode("latin-1").split()
+            if len(parts) < 2 or parts[0] not in ("GET", "HEAD"):
+                code, body = 405, {"error": "method not allowed"}
+            else:
+                code, body = self.status(parts[1].split("?", 1)[0])
+            payload = json.dumps(body).encode("utf-8")
+            head = (f"HTTP/1.1 {code} {REASONS[code]}\r\nContent-Type: application/json\r\n"
+                    f"Content-Length: {len(payload)}\r\nConnection: close\r\n\r\n").encode("latin-1")
+            writer.write(head if parts[:1] == ["HEAD"] else head + payload)
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
@@ -0,0 +1,176 @@
+# services/image_cache.py
+import hashlib
+import os
+import re
+import time
+import unicodedata
+from typing import Optional
+import config as cfg
+from database.database import Database, get_database
+from utils.file_utils import ensure_directory, get_abs_path
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS image_cache (
+    key TEXT PRIMARY KEY,
+    prompt TEXT NOT NULL,
+    file_id TEXT,
+    hits INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+"""
+
+
+class ImageCache:
+    """Кэш сгенерированных изображений.
+
+    Хранит Telegram `file_id` уже отправленных изображений, чтобы повторный запрос
+    с тем же описанием отдавался без обращения к OpenAI и без повторной загрузки.
+    Дополнительно может хранить сами изображения на диске с вытеснением LRU.
+    """
+
+    def __init__(self, db: Optional[Database] = None, cache_dir: str = cfg.IMAGE_CACHE_DIR,
+                 max_bytes: int = cfg.IMAGE_CACHE_MAX_BYTES):
+        """Инициализирует кэш и создаёт таблицу при необходимости.
+
+        Args:
+            db (Optional[Database]): Database instance. Defaults to the shared one.
+            cache_dir (str): Directory for cached image bytes.
+            max_bytes (int): Disk quota for image bytes; 0 disables disk storage.
+        """
+        self.db = db or get_database()
+        self.db.executescript(SCHEMA)
+        self.max_bytes = max_bytes
+        self.cache_dir = get_abs_path(cache_dir)
+        if self.max_bytes > 0:
+            ensure_directory(self.cache_dir)
+
+    @staticmethod
+    def normalize_prompt(prompt: str) -> str:
+        """Normalizes a prompt so that trivially different spellings share a cache entry.
+
+        Applies NFKC, case folding, whitespace collapsing and strips trailing punctuation.
+
+        Args:
+            prompt (str): Raw user prompt.
+
+        Returns:
+            str: Normalized prompt.
+        """
+        normalized = unicodedata.normalize("NFKC", prompt).casefold()
+        normalized = re.sub(r"\s+", " ", normalized).strip()
+        return normalized.rstrip(" .!?…")
+
+    @classmethod
+    def make_key(cls, prompt: str, model: str, size: str, quality: str) -> str:
+        """Builds the cache key from the normalized prompt and generation parameters.
+
+        Args:
+            prompt (str): Raw user prompt.
+            model (str): Image model.
+            size (str): Image size.
+            quality (str): Image quality.
+
+        Returns:
+            str: Hex digest used as the cache key.
+        """
+        raw = "|".join((model, size, quality, cls.normalize_prompt(prompt)))
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get_file_id(self, key: str) -> Optional[str]:
+        """Returns the cached Telegram file_id and records the hit.
+
+        Args:
+            key (str): Cache key.
+
+        Returns:
+            Optional[str]: file_id or None on a miss.
+        """
+        row = self.db.fetchone("SELECT file_id FROM image_cache WHERE key = ?", (key,))
+        if row is None or not row["file_id"]:
+            return None
+        self.db.execute("UPDATE image_cache SET hits = hits + 1, last_used = ? WHERE key = ?",
+                        (time.time(), key))
+        return row["file_id"]
+
+    def store_file_id(self, key: str, prompt: str, file_id: str) -> None:
+        """Saves the Telegram file_id of a delivered image.
+
+        Args:
+            key (str): Cache key.
+            prompt (str): Original prompt (kept for diagnostics and pre-warming).
+            file_id (str): Telegram file_id.
+        """
+        now = time.time()
+        self.db.execute(
+            "INSERT INTO image_cache (key, prompt, file_id, created_at, last_used) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET file_id = excluded.file_id, last_used = excluded.last_used",
+            (key, prompt, file_id, now, now)
+        )
+
+    def forget(self, key: str) -> None:
+        """Removes an entry (e.g. when Telegram no longer accepts the file_id).
+
+        Args:
+            key (str): Cache key.
+        """
+        self.db.execute("DELETE FROM image_cache WHERE key = ?", (key,))
+        path = self._path(key)
+        if os.path.exists(path):
+            os.remove(path)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.png")
+
+    def get_bytes(self, key: str) -> Optional[bytes]:
+        """Returns cached image bytes from disk, refreshing their LRU position.
+
+        Args:
+            key (str): Cache key.
+
+        Returns:
+            Optional[bytes]: Image bytes or None.
+        """
+        if self.max_bytes <= 0:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        os.utime(path)
+        return data
+
+    def store_bytes(self, key: str, data: bytes) -> None:
+        """Writes image bytes to disk and evicts least recently used files over the quota.
+
+        Args:
+            key (str): Cache key.
+            data (bytes): Image bytes.
+        """
+        if self.max_bytes <= 0 or len(data) > self.max_bytes:
+            return
+        with open(self._path(key), "wb") as f:
+            f.write(data)
+        self._evict()
+
+    def _evict(self) -> None:
+        """Удаляет давно не использованные файлы, пока кэш не уложится в квоту."""
+        entries = []
+        total = 0
+        for entry in os.scandir(self.cache_dir):
+            if entry.is_file():
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            os.remove(path)
+            total -= size
+            logger.info(f"Изображение {path} вытеснено из кэша.")
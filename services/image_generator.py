@@ -1,8 +1,8 @@
 # services/image_generator.py
-import openai
 from utils.logger import setup_logger
 from utils.api_utils import sync_openai_error_handler
 import config as cfg
+from services.credential_pool import OPENAI_RETRY_POLICY, openai_client
 
 
 logger = setup_logger(__name__)
@@ -14,10 +14,13 @@ class ImageGenerationError(Exception):
 class ImageGenerator:
     """Service for generating images using OpenAI image API."""
 
+    DEFAULT_MODEL = cfg.IMAGE_PRESETS[cfg.IMAGE_DEFAULT_PRESET]["model"]
+    DEFAULT_SIZE = cfg.IMAGE_PRESETS[cfg.IMAGE_DEFAULT_PRESET]["size"]
+    DEFAULT_QUALITY = cfg.IMAGE_PRESETS[cfg.IMAGE_DEFAULT_PRESET]["quality"]
+
     def __init__(self):
         """Проверяет конфигурацию API-ключа."""
         self.validate_images_config()
-        openai.api_key = cfg.OPENAI_API_KEY
 
     @staticmethod
     def validate_images_config():
@@ -26,43 +29,87 @@ class ImageGenerator:
                 Raises:
                     ValueError: If API key is not set.
                 """
-        if not openai.api_key:
+        if not cfg.OPENAI_API_KEYS:
             raise ValueError("Не задан API-ключ OpenAI.")
 
     @staticmethod
-    def validate_image_model(model: str) -> bool:
-        """Проверяет, поддерживается ли модель TTS.
-        Checks if the image generation model is supported.
+    def validate_image_model(model: str, quality: str = "standard", size: str = None) -> bool:
+        """Проверяет, поддерживается ли модель с указанным качеством и размером.
+        Checks the combination against the nested `cfg.IMAGE_MODELS_GPT` table.
 
         Args:
             model (str): Model name.
+            quality (str, optional): Image quality. Defaults to "standard".
+            size (str, optional): Image size. If None, only model and quality are checked.
 
         Returns:
             bool: True if supported, False otherwise."""
-        return model in cfg.IMAGE_MODELS_GPT.values()
+        sizes = cfg.IMAGE_MODELS_GPT.get(model, {}).get(quality, {}).get("size")
+        if sizes is None:
+            return False
+        return size is None or size in sizes
 
-    @sync_openai_error_handler
-    def generate_image(self, prompt: str, model: str = "dall-e-3") -> str:
-        """ Generates an image based on the prompt using OpenAI API.
+    @staticmethod
+    def get_image_price(model: str, quality: str, size: str) -> float:
+        """Returns the price of one image in USD according to `cfg.IMAGE_MODELS_GPT`.
+
+        Args:
+            model (str): Model name.
+            quality (str): Image quality.
+            size (str): Image size.
+
+        Returns:
+            float: Price per image."""
+        return cfg.IMAGE_MODELS_GPT[model][quality]["size"][size]
+
+    @sync_openai_error_handler(error_cls=ImageGenerationError, policy=OPENAI_RETRY_POLICY)
+    def generate_images(self, prompt: str, model: str = DEFAULT_MODEL, size: str = DEFAULT_SIZE,
+                        quality: str = DEFAULT_QUALITY, n: int = 1) -> list:
+        """Generates one or several images based on the prompt using OpenAI API.
 
         Args:
             prompt (str): Description for the image.
-            model (str, optional): Image generation model. Defaults to "dall-e-3".
+            model (str, optional): Image generation model. Defaults to the default preset.
+            size (str, optional): Image size. Defaults to the default preset.
+            quality (str, optional): Image quality. Defaults to the default preset.
+            n (int, optional): Number of images (n > 1 is supported by dall-e-2 only). Defaults to 1.
 
         Returns:
-            str: URL of the generated image.
+            list[str]: URLs of the generated images.
 
         Raises:
             ImageGenerationError: If generation fails."""
         if not prompt or not isinstance(prompt, str):
             raise ValueError("Prompt должен быть непустой строкой.")
-        response = openai.images.generate(
-            model=model,
-            prompt=prompt,
-            size="1024x1024",
-            quality="standard",
-            n=1
-        )
-        image_url = response.data[0].url
-        logger.info(f"Изображение успешно создано: {image_url}")
-        return image_url
\ No newline at end of file
+        if not self.validate_image_model(model, quality, size):
+            raise ValueError(f"Неподдерживаемые параметры изображения: {model}, {quality}, {size}.")
+        if n < 1 or n > cfg.IMAGE_MAX_BATCH:
+            raise ValueError(f"Количество изображений должно быть от 1 до {cfg.IMAGE_MAX_BATCH}.")
+        if n > 1 and model == "dall-e-3":
+            raise ValueError("Модель dall-e-3 создаёт только одно изображение за запрос.")
+        params = {"model": model, "prompt": prompt, "size": size, "n": n}
+        if model == "dall-e-3":
+            # Параметр quality поддерживается только dall-e-3
+            params["quality"] = quality
+        response = openai_client().images.generate(**params)
+        image_urls = [image.url for image in response.data]
+        logger.info(f"Создано изображений: {len(image_urls)} ({model}, {quality}, {size}), "
+                    f"стоимость ~${self.get_image_price(model, quality, size) * n:.3f}")
+        return image_urls
+
+    def generate_image(self, prompt: str, model: str = DEFAULT_MODEL, size: str = DEFAULT_SIZE,
+                       quality: str = DEFAULT_QUALITY) -> str:
+        """ Generates an image based on the prompt using OpenAI API.
+
+        Args:
+            prompt (str): Description for the image.
+            model (str, optional): Image generation model. Defaults to the default preset.
+            size (str, optional): Image size. Defaults to the default preset.
+            quality (str, optional): Image quality. Defaults to the default preset.
+
+        Returns:
+            str: URL of the generated image.
+
+        Raises:
+            ImageGenerationError: If generation fails."""
+        return self.generate_images(prompt, model=model, size=size, quality=quality, n=1)[0]
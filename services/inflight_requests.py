@@ -0,0 +1,103 @@
+# services/inflight_requests.py
+import asyncio
+from typing import Awaitable, Dict, Optional, Tuple
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+class RequestCancelled(Exception):
+    """Запрос отменён командой /cancel или вытеснен новым сообщением того же пользователя."""
+    pass
+
+
+class InflightRequests:
+    """Выполняющиеся запросы к внешним API (OpenAI, DeepL) по пользователям чатов и функциям.
+
+    Обработчик запускает запрос через `run`: запрос выполняется отдельной задачей, которую
+    /cancel или следующее сообщение того же пользователя в той же функции (/talk, /voice) отменяют.
+    Запросы других участников группы и других функций не затрагиваются. Отмена обрывает HTTP-запрос
+    асинхронного клиента, удаляет временные файлы (блоки `async with`) и пропускает доставку результата.
+    """
+
+    def __init__(self):
+        """Инициализирует пустой реестр."""
+        self._tasks: Dict[Tuple[int, int, str], set] = {}  # (chat_id, user_id, функция) -> задачи
+
+    async def run(self, chat_id: int, user_id: int, feature: str, request: Awaitable, supersede: bool = True):
+        """Выполняет запрос как отменяемую задачу пользователя.
+
+        Args:
+            chat_id (int): Chat ID.
+            user_id (int): Telegram user ID.
+            feature (str): Feature that sends the request, e.g. "talk" or "voice".
+            request (Awaitable): Coroutine that calls the upstream API.
+            supersede (bool): Cancel requests of the same user and feature that are still running.
+
+        Returns:
+            Result of the request.
+
+        Raises:
+            RequestCancelled: If the request was cancelled by `cancel` or a newer request.
+        """
+        key = (chat_id, user_id, feature)
+        if supersede:
+            superseded = self.cancel(chat_id, user_id, feature)
+            if superseded:
+                logger.info(f"Новое сообщение пользователя {user_id} в чате {chat_id} ({feature}) "
+                            f"вытеснило незавершённые запросы: {superseded}.")
+        task = asyncio.ensure_future(request)
+        self._tasks.setdefault(key, set()).add(task)
+        try:
+            return await task
+        except asyncio.CancelledError:
+            # Отменили сам запрос, а не ожидающий его обработчик (например, при остановке бота)
+            if task.cancelled() and not asyncio.current_task().cancelling():
+                raise RequestCancelled() from None
+            raise
+        finally:
+            tasks = self._tasks.get(key)
+            if tasks is not None:
+                tasks.discard(task)
+                if not tasks:
+                    del self._tasks[key]
+
+    def cancel(self, chat_id: int, user_id: int, feature: Optional[str] = None) -> int:
+        """Отменяет выполняющиеся запросы пользователя в чате.
+
+        Args:
+            chat_id (int): Chat ID.
+            user_id (int): Telegram user ID.
+            feature (Optional[str]): Cancel only requests of this feature. Defaults to all features.
+
+        Returns:
+            int: Number of cancelled requests.
+        """
+        keys = [key for key in self._tasks
+                if key[:2] == (chat_id, user_id) and (feature is None or key[2] == feature)]
+        cancelled = 0
+        for key in keys:
+            for task in self._tasks.pop(key):
+                if not task.done():
+                    task.cancel()
+                    cancelled += 1
+        return cancelled
+
+    def count(self, chat_id: Optional[int] = None) -> int:
+        """Returns the number of running requests of a chat, or of all chats."""
+        return sum(len(tasks) for key, tasks in self._tasks.items() if chat_id is None or key[0] == chat_id)
+
+
+_inflight: Optional[InflightRequests] = None
+
+
+def get_inflight_requests() -> InflightRequests:
+    """Returns the shared InflightRequests instance, creating it on first use.
+
+    Returns:
+        InflightRequests: Shared registry.
+    """
+    global _inflight
+    if _inflight is None:
+        _inflight = InflightRequests()
+    return _inflight
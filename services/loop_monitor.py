@@ -0,0 +1,180 @@
+# services/loop_monitor.py
+import asyncio
+import bisect
+import os
+import sys
+import threading
+import time
+import traceback
+from typing import Optional
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Границы корзин гистограммы задержки, миллисекунды (последняя корзина — всё, что больше)
+LAG_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STACK_DEPTH = 15
+
+
+def describe_update(frames: list) -> Optional[str]:
+    """Finds the Telegram update being handled in a stack and describes it.
+
+    Args:
+        frames (list[types.FrameType]): Frames from the outermost to the innermost.
+
+    Returns:
+        Optional[str]: Handler name with update ID and user, or None if no handler is on the stack.
+    """
+    for frame in reversed(frames):
+        update = frame.f_locals.get("update")
+        update_id = getattr(update, "update_id", None)
+        if update_id is None:
+            continue
+        user = getattr(getattr(update, "effective_user", None), "id", None)
+        return f"{frame.f_code.co_qualname} (update {update_id}, пользователь {user})"
+    return None
+
+
+def find_offender(frames: list) -> str:
+    """Returns the innermost frame of project code, i.e. the line that blocks the loop.
+
+    Args:
+        frames (list[types.FrameType]): Frames from the outermost to the innermost.
+
+    Returns:
+        str: "path:line function" of the blocking call site.
+    """
+    for frame in reversed(frames):
+        path = frame.f_code.co_filename
+        if path.startswith(PROJECT_ROOT) and "site-packages" not in path:
+            return f"{os.path.relpath(path, PROJECT_ROOT)}:{frame.f_lineno} {frame.f_code.co_qualname}"
+    frame = frames[-1]
+    return f"{frame.f_code.co_filename}:{frame.f_lineno} {frame.f_code.co_qualname}"
+
+
+class LoopLagMonitor:
+    """Измеряет задержку планирования цикла событий и находит блокирующие вызовы.
+
+    Корутина-пульс засыпает на `interval` и измеряет, насколько позже она проснулась;
+    значения попадают в гистограмму. Сторожевой поток замечает, что пульс не обновлялся дольше
+    `threshold`, и снимает стек потока цикла (`sys._current_frames`) прямо во время блокировки:
+    видно, какая строка проекта и какой обработчик с каким обновлением держат цикл.
+    """
+
+    def __init__(self, threshold: float, interval: float = 0.05, top: int = 10):
+        """Инициализирует монитор (не запуская его).
+
+        Args:
+            threshold (float): Lag in seconds that counts as a stall.
+            interval (float): Heartbeat interval in seconds.
+            top (int): Number of offenders in the report.
+        """
+        self.threshold = threshold
+        self.interval = interval
+        self.top = top
+        self.histogram = [0] * (len(LAG_BUCKETS_MS) + 1)
+        self.max_lag = 0.0
+        self.stalls = 0
+        self.offenders: dict = {}  # место вызова -> {"count", "max_lag", "last_update", "stack"}
+        self._beat = time.monotonic()
+        self._captured: Optional[str] = None  # место вызова, снятое сторожем во время текущей блокировки
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stop = threading.Event()
+        self._watchdog: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Запускает пульс в текущем цикле событий и сторожевой поток."""
+        self._loop_thread_id = threading.get_ident()
+        self._beat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.get_running_loop().create_task(self._heartbeat())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-lag-watchdog", daemon=True)
+        self._watchdog.start()
+        logger.info(f"Монитор задержки цикла событий запущен (порог {self.threshold * 1000:.0f} мс).")
+
+    async def stop(self) -> None:
+        """Останавливает пульс и сторожевой поток."""
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def observe(self, lag: float) -> None:
+        """Records one lag measurement.
+
+        Args:
+            lag (float): Scheduling delay in seconds.
+        """
+        self.histogram[bisect.bisect_left(LAG_BUCKETS_MS, lag * 1000)] += 1
+        self.max_lag = max(self.max_lag, lag)
+        if lag < self.threshold:
+            return
+        self.stalls += 1
+        key = self._captured or "неизвестно (блокировка закончилась до проверки)"
+        self._captured = None
+        offender = self.offenders.setdefault(key, {"count": 0, "max_lag": 0.0, "last_update": None, "stack": []})
+        offender["count"] += 1
+        offender["max_lag"] = max(offender["max_lag"], lag)
+        logger.warning(f"Цикл событий заблокирован на {lag * 1000:.0f} мс: {key}"
+                       + (f", {offender['last_update']}" if offender["last_update"] else ""))
+
+    def capture(self) -> Optional[str]:
+        """Снимает стек потока цикла событий и запоминает блокирующее место."""
+        frame = sys._current_frames().get(self._loop_thread_id)
+        if frame is None:
+            return None
+        frames = []
+        while frame is not None:
+            frames.append(frame)
+            frame = frame.f_back
+        frames.reverse()
+        key = find_offender(frames)
+        offender = self.offenders.setdefault(key, {"count": 0, "max_lag": 0.0, "last_update": None, "stack": []})
+        offender["last_update"] = describe_update(frames) or offender["last_update"]
+        offender["stack"] = traceback.format_list(traceback.extract_stack(frames[-1], limit=STACK_DEPTH))
+        self._captured = key
+        return key
+
+    def report(self) -> dict:
+        """Returns lag statistics and the top blocking call sites.
+
+        Returns:
+            dict: Histogram (bucket upper bound in ms -> count), totals and offenders sorted by count.
+        """
+        labels = [f"<={bound}" for bound in LAG_BUCKETS_MS] + [f">{LAG_BUCKETS_MS[-1]}"]
+        top = sorted(self.offenders.items(), key=lambda item: (item[1]["count"], item[1]["max_lag"]), reverse=True)
+        return {
+            "threshold_ms": round(self.threshold * 1000),
+            "samples": sum(self.histogram),
+            "stalls": self.stalls,
+            "max_lag_ms": round(self.max_lag * 1000, 1),
+            "histogram_ms": dict(zip(labels, self.histogram)),
+            "offenders": [{"site": site, "count": data["count"], "max_lag_ms": round(data["max_lag"] * 1000, 1),
+                           "last_update": data["last_update"], "stack": data["stack"]}
+                          for site, data in top[:self.top]],
+        }
+
+    async def _heartbeat(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self._beat = time.monotonic()
+            self.observe(max(loop.time() - expected, 0.0))
+
+    def _watch(self) -> None:
+        stalled_since = None
+        while not self._stop.wait(self.interval / 2):
+            beat = self._beat
+            if time.monotonic() - beat < self.threshold + self.interval:
+                stalled_since = None
+            elif stalled_since != beat:
+                # Стек снимается один раз за блокировку, пока она ещё продолжается
+                stalled_since = beat
+                self.capture()
@@ -0,0 +1,213 @@
+# services/media_storage.py
+import asyncio
+import os
+import shutil
+import tempfile
+import time
+from contextlib import asynccontextmanager
+from typing import Optional
+import config as cfg
+from utils.file_utils import ensure_directory, get_abs_path
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Каталог в оперативной памяти (tmpfs), используемый при MEDIA_TMPFS=1
+TMPFS_ROOT = "/dev/shm"
+# Сколько места резервируется, если размер файла заранее неизвестен (например, для озвучки)
+DEFAULT_RESERVE = 5 * 1024 * 1024
+# Каталоги, куда обработчики писали файлы раньше: забытые там файлы тоже удаляются
+LEGACY_DIRS = ("static/audio_file", "static/voice_file", "static/documents")
+
+
+class MediaStorageError(Exception):
+    """Кастомное исключение для ошибок хранилища временных файлов."""
+    pass
+
+
+def resolve_root(directory: str = cfg.MEDIA_DIR, tmpfs: bool = cfg.MEDIA_TMPFS) -> str:
+    """Returns the absolute path of the scratch directory.
+
+    Args:
+        directory (str): Directory on disk.
+        tmpfs (bool): Prefer a RAM-backed directory when available.
+
+    Returns:
+        str: Absolute path.
+    """
+    if tmpfs:
+        if os.path.isdir(TMPFS_ROOT) and os.access(TMPFS_ROOT, os.W_OK):
+            return os.path.join(TMPFS_ROOT, "asya_media")
+        logger.warning(f"{TMPFS_ROOT} недоступен, временные файлы хранятся на диске в {directory}.")
+    return get_abs_path(directory)
+
+
+def directory_size(path: str) -> int:
+    """Returns the total size of the files in a directory tree, in bytes."""
+    total = 0
+    for directory, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(directory, name))
+            except OSError:
+                pass
+    return total
+
+
+class MediaWorkspace:
+    """Каталог одной задачи; все файлы задачи (и производные ffmpeg) создаются в нём."""
+
+    def __init__(self, path: str, reserved: int):
+        """Initializes the workspace.
+
+        Args:
+            path (str): Directory of the workspace.
+            reserved (int): Bytes reserved for the workspace in the quota.
+        """
+        self.path = path
+        self.reserved = reserved
+
+    def file(self, name: str) -> str:
+        """Returns the path of a file inside the workspace."""
+        return os.path.join(self.path, os.path.basename(name))
+
+
+class MediaStorage:
+    """Временные медиафайлы обработчиков: общий лимит места и гарантированное удаление.
+
+    Каждая задача получает собственный каталог через `async with storage.workspace(...)`;
+    при выходе из блока каталог удаляется вместе со всем содержимым на любом пути выполнения —
+    после ошибки, таймаута или отмены. Перед созданием каталога резервируется ожидаемый объём:
+    если лимит исчерпан, задача ждёт освобождения места (не дольше `wait_timeout`). Фоновая
+    очистка удаляет каталоги, оставшиеся после аварийного завершения процесса.
+    """
+
+    def __init__(self, root: Optional[str] = None, quota: int = cfg.MEDIA_QUOTA_BYTES,
+                 wait_timeout: float = cfg.MEDIA_WAIT_TIMEOUT, orphan_age: float = cfg.MEDIA_ORPHAN_AGE):
+        """Инициализирует хранилище и создаёт его каталог.
+
+        Args:
+            root (Optional[str]): Scratch directory. Defaults to MEDIA_DIR or tmpfs (MEDIA_TMPFS).
+            quota (int): Maximum bytes reserved by all workspaces together.
+            wait_timeout (float): Seconds to wait for free space before giving up.
+            orphan_age (float): Age in seconds after which files outside active workspaces are removed.
+        """
+        self.root = root or resolve_root()
+        self.quota = quota
+        self.wait_timeout = wait_timeout
+        self.orphan_age = orphan_age
+        self.reserved = 0
+        self.active: set = set()
+        self._waiters: list = []  # futures задач, ожидающих освобождения места
+        ensure_directory(self.root)
+
+    @asynccontextmanager
+    async def workspace(self, prefix: str, reserve: int = DEFAULT_RESERVE):
+        """Резервирует место и создаёт каталог задачи, удаляемый при выходе из блока.
+
+        Args:
+            prefix (str): Directory name prefix (kind of the task).
+            reserve (int): Expected peak size of the task's files in bytes.
+
+        Yields:
+            MediaWorkspace: Workspace of the task.
+
+        Raises:
+            MediaStorageError: If the space is not freed within `wait_timeout` or exceeds the quota.
+        """
+        reserve = max(int(reserve), 1)
+        if reserve > self.quota:
+            raise MediaStorageError(f"Файлу нужно {reserve} байт, лимит хранилища {self.quota} байт.")
+        await self._reserve(reserve)
+        try:
+            path = tempfile.mkdtemp(prefix=f"{prefix}_", dir=self.root)
+        except OSError as e:
+            self._release(reserve)
+            raise MediaStorageError(f"Не удалось создать временный каталог: {e}") from e
+        self.active.add(path)
+        try:
+            yield MediaWorkspace(path, reserve)
+        finally:
+            used = directory_size(path)
+            if used > reserve:
+                logger.warning(f"Задача {prefix} заняла {used} байт при резерве {reserve} байт.")
+            shutil.rmtree(path, ignore_errors=True)
+            self.active.discard(path)
+            self._release(reserve)
+
+    async def _reserve(self, size: int) -> None:
+        deadline = time.monotonic() + self.wait_timeout
+        while self.reserved + size > self.quota:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise MediaStorageError("Хранилище временных файлов заполнено.")
+            logger.info(f"Ожидание места во временном хранилище: нужно {size} байт, "
+                        f"занято {self.reserved} из {self.quota}.")
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await asyncio.wait_for(waiter, remaining)
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                self._waiters.remove(waiter)
+        self.reserved += size
+
+    def _release(self, size: int) -> None:
+        # Освобождение синхронное: отмена задачи не может оставить место занятым
+        self.reserved -= size
+        for waiter in self._waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+
+    def sweep(self, now: Optional[float] = None) -> int:
+        """Удаляет забытые файлы и каталоги старше `orphan_age`, не трогая активные задачи.
+
+        Args:
+            now (Optional[float]): Current `time.time()` value.
+
+        Returns:
+            int: Number of removed entries.
+        """
+        now = time.time() if now is None else now
+        removed = 0
+        for directory in (self.root, *(get_abs_path(path) for path in LEGACY_DIRS)):
+            if not os.path.isdir(directory):
+                continue
+            for entry in os.scandir(directory):
+                if entry.path in self.active:
+                    continue
+                try:
+                    if now - entry.stat(follow_symlinks=False).st_mtime < self.orphan_age:
+                        continue
+                    if entry.is_dir(follow_symlinks=False):
+                        shutil.rmtree(entry.path)
+                    else:
+                        os.remove(entry.path)
+                    removed += 1
+                except OSError as e:
+                    logger.warning(f"Не удалось удалить временный файл {entry.path}: {e}")
+        if removed:
+            logger.info(f"Удалено забытых временных файлов: {removed}.")
+        return removed
+
+    async def run_janitor(self, interval: float = cfg.MEDIA_SWEEP_INTERVAL) -> None:
+        """Периодически удаляет забытые временные файлы."""
+        while True:
+            await asyncio.to_thread(self.sweep)
+            await asyncio.sleep(interval)
+
+
+_storage: Optional[MediaStorage] = None
+
+
+def get_media_storage() -> MediaStorage:
+    """Returns the shared MediaStorage instance, creating it on first use.
+
+    Returns:
+        MediaStorage: Shared storage.
+    """
+    global _storage
+    if _storage is None:
+        _storage = MediaStorage()
+    return _storage
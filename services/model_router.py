@@ -0,0 +1,148 @@
+# services/model_router.py
+import re
+import time
+from typing import Optional
+import config as cfg
+from database.database import Database, get_database
+from utils.language_utils import guess_language
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS model_stats (
+    model TEXT PRIMARY KEY,
+    requests INTEGER NOT NULL DEFAULT 0,
+    failures INTEGER NOT NULL DEFAULT 0,
+    truncated INTEGER NOT NULL DEFAULT 0,
+    latency REAL NOT NULL DEFAULT 0,
+    failure_rate REAL NOT NULL DEFAULT 0,
+    updated_at REAL NOT NULL
+);
+"""
+
+# Признаки запросов, которым нужна сильная модель: объяснения, проверка и переписывание текста, рассуждения
+COMPLEX_REQUEST = re.compile(
+    r"\b(объясни\w*|почему|сравни\w*|исправ\w*|провер\w*|перепиши|сочинени\w*|эсс[еэ]|разбер\w*|"
+    r"explain\w*|why|compare|correct\w*|rewrite|essay|analy[sz]e|proofread)\b|```",
+    re.IGNORECASE
+)
+# Языки, с которыми маленькая модель справляется заметно хуже
+STRONG_MODEL_LANGUAGES = frozenset({"ZH", "JA", "KO", "AR", "EL"})
+# Вес нового наблюдения в скользящих средних задержки и доли ошибок
+EWMA_ALPHA = 0.2
+# Минимум запросов, после которого статистика модели учитывается при выборе
+MIN_SAMPLES = 3
+# Через сколько секунд без запросов неудачная статистика забывается и модель пробуется снова
+STATS_WINDOW = 600
+
+
+class ModelRouter:
+    """Выбирает модель для /talk: быструю и дешёвую или сильную.
+
+    Запрос классифицируется без обращений к API: явный выбор пользователя, длина, язык
+    и признаки сложной задачи. Глубина диалога не учитывается: /talk не передаёт модели историю
+    переписки, и каждое сообщение — самостоятельный запрос. Вторая модель служит запасной, если первая
+    перегружена или отвечает медленно. Задержка и доля ошибок каждой модели сохраняются и
+    учитываются при следующих выборах.
+    """
+
+    def __init__(self, db: Optional[Database] = None, fast_model: str = cfg.ROUTER_FAST_MODEL,
+                 strong_model: str = cfg.ROUTER_STRONG_MODEL, long_message: int = cfg.ROUTER_LONG_MESSAGE,
+                 slow_seconds: float = cfg.ROUTER_SLOW_SECONDS):
+        """Инициализирует маршрутизатор и загружает статистику моделей.
+
+        Args:
+            db (Optional[Database]): Database instance. Defaults to the shared one.
+            fast_model (str): Cheap low-latency model.
+            strong_model (str): Model for complex requests.
+            long_message (int): Message length (characters) from which the strong model is used.
+            slow_seconds (float): Average latency above which a model is considered slow.
+        """
+        self.db = db or get_database()
+        self.db.executescript(SCHEMA)
+        self.fast_model = fast_model
+        self.strong_model = strong_model
+        self.long_message = long_message
+        self.slow_seconds = slow_seconds
+        self.stats = {row["model"]: dict(row) for row in self.db.fetchall("SELECT * FROM model_stats")}
+
+    def classify(self, message: str) -> tuple:
+        """Decides which model a request needs.
+
+        Args:
+            message (str): User message.
+
+        Returns:
+            tuple[str, str]: Model name and the reason of the choice.
+        """
+        if len(message) > self.long_message:
+            return self.strong_model, "длинный запрос"
+        if guess_language(message) in STRONG_MODEL_LANGUAGES:
+            return self.strong_model, "язык"
+        if COMPLEX_REQUEST.search(message):
+            return self.strong_model, "сложная задача"
+        return self.fast_model, "простой запрос"
+
+    def route(self, message: str, preferred: Optional[str] = None) -> list:
+        """Returns the models to try, in order: the chosen one first, then fallbacks.
+
+        Args:
+            message (str): User message.
+            preferred (Optional[str]): Model explicitly chosen by the user.
+
+        Returns:
+            list[str]: Model names.
+        """
+        if preferred:
+            model, reason = preferred, "выбор пользователя"
+        else:
+            model, reason = self.classify(message)
+        fallback = self.fast_model if model == self.strong_model else self.strong_model
+        # Перегруженную или медленную модель, выбранную автоматически, пробуем второй
+        if not preferred and not self.is_healthy(model) and self.is_healthy(fallback):
+            model, fallback, reason = fallback, model, f"{reason}, {model} перегружена"
+        models = [model] if fallback == model else [model, fallback]
+        logger.info(f"Маршрутизация /talk: {models[0]} ({reason}).")
+        return models
+
+    def is_healthy(self, model: str) -> bool:
+        """Checks the recent failure rate and latency of a model.
+
+        Args:
+            model (str): Model name.
+
+        Returns:
+            bool: False if the model recently failed often or answered slowly.
+        """
+        stats = self.stats.get(model)
+        if stats is None or stats["requests"] < MIN_SAMPLES or time.time() - stats["updated_at"] > STATS_WINDOW:
+            return True
+        return stats["failure_rate"] < 0.5 and stats["latency"] < self.slow_seconds
+
+    def record(self, model: str, latency: float, ok: bool, truncated: bool = False) -> None:
+        """Records the outcome of a request to a model.
+
+        Args:
+            model (str): Model name.
+            latency (float): Request duration in seconds.
+            ok (bool): Whether the model returned an answer.
+            truncated (bool): Whether the answer was cut by the token limit.
+        """
+        stats = self.stats.setdefault(model, {"model": model, "requests": 0, "failures": 0, "truncated": 0,
+                                              "latency": latency, "failure_rate": 0.0})
+        stats["requests"] += 1
+        stats["failures"] += 0 if ok else 1
+        stats["truncated"] += 1 if truncated else 0
+        stats["latency"] += EWMA_ALPHA * (latency - stats["latency"])
+        stats["failure_rate"] += EWMA_ALPHA * ((0.0 if ok else 1.0) - stats["failure_rate"])
+        stats["updated_at"] = time.time()
+        self.db.execute(
+            "INSERT INTO model_stats (model, requests, failures, truncated, latency, failure_rate, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(model) DO UPDATE SET requests = excluded.requests, failures = excluded.failures, "
+            "truncated = excluded.truncated, latency = excluded.latency, failure_rate = excluded.failure_rate, "
+            "updated_at = excluded.updated_at",
+            (model, stats["requests"], stats["failures"], stats["truncated"], stats["latency"],
+             stats["failure_rate"], stats["updated_at"])
+        )
@@ -0,0 +1,131 @@
+# services/priority_scheduler.py
+import asyncio
+import heapq
+import itertools
+import time
+from contextlib import asynccontextmanager
+from typing import Awaitable, Optional
+import config as cfg
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+def queue_key(priority: int, arrived_at: float, headstart: float = cfg.PRIORITY_HEADSTART) -> float:
+    """Returns the ordering key of a queued request: the smaller, the sooner it is served.
+
+    A request of priority 0 is ordered as if it had arrived `headstart` seconds earlier than a
+    request of priority 1. A lower-priority request that has waited longer than the head start
+    is still served first, so free users are delayed under contention but never starved.
+
+    Args:
+        priority (int): Request priority (0 is the most important).
+        arrived_at (float): Arrival time in seconds.
+        headstart (float): Head start of one priority level in seconds.
+
+    Returns:
+        float: Ordering key.
+    """
+    return arrived_at + priority * headstart
+
+
+class PriorityScheduler:
+    """Ограничивает число одновременных запросов к внешним API и раздаёт места по приоритету.
+
+    Пока свободные места есть, запросы выполняются сразу. Под нагрузкой ожидающие запросы
+    упорядочиваются по `queue_key`: запросы премиум-пользователей обгоняют бесплатные, но
+    бесплатный запрос, прождавший дольше `headstart`, всё равно будет обслужен.
+    """
+
+    def __init__(self, slots: int = cfg.UPSTREAM_CONCURRENCY, headstart: float = cfg.PRIORITY_HEADSTART):
+        """Initializes the scheduler.
+
+        Args:
+            slots (int): Maximum number of concurrent requests.
+            headstart (float): Head start of one priority level in seconds.
+        """
+        self.slots = slots
+        self.headstart = headstart
+        self.busy = 0
+        self._waiters: list = []  # куча (ключ, номер, future)
+        self._seq = itertools.count()
+
+    @property
+    def waiting(self) -> int:
+        """Number of requests waiting for a slot."""
+        return sum(1 for _, _, waiter in self._waiters if not waiter.done())
+
+    @asynccontextmanager
+    async def slot(self, priority: int):
+        """Занимает место на время блока `async with`.
+
+        Args:
+            priority (int): Request priority (0 is the most important).
+        """
+        await self._acquire(priority)
+        try:
+            yield
+        finally:
+            self._release()
+
+    async def run(self, request: Awaitable, priority: int):
+        """Выполняет запрос, дождавшись свободного места.
+
+        Args:
+            request (Awaitable): Coroutine that calls the upstream API.
+            priority (int): Request priority (0 is the most important).
+
+        Returns:
+            Result of the request.
+        """
+        try:
+            await self._acquire(priority)
+        except BaseException:
+            # Запрос отменили в очереди: корутина так и не запускалась
+            if asyncio.iscoroutine(request):
+                request.close()
+            raise
+        try:
+            return await request
+        finally:
+            self._release()
+
+    async def _acquire(self, priority: int) -> None:
+        if self.busy < self.slots and not self.waiting:
+            self.busy += 1
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (queue_key(priority, time.monotonic(), self.headstart),
+                                       next(self._seq), waiter))
+        logger.debug(f"Запрос с приоритетом {priority} ждёт места: занято {self.busy} из {self.slots}.")
+        try:
+            # Освободившееся место передаётся ожидающему вместе со счётчиком busy
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self._release()
+            raise
+
+    def _release(self) -> None:
+        self.busy -= 1
+        while self._waiters:
+            _, _, waiter = heapq.heappop(self._waiters)
+            if not waiter.done():
+                self.busy += 1
+                waiter.set_result(None)
+                return
+
+
+_scheduler: Optional[PriorityScheduler] = None
+
+
+def get_upstream_scheduler() -> PriorityScheduler:
+    """Returns the shared scheduler of interactive upstream requests, creating it on first use.
+
+    Returns:
+        PriorityScheduler: Shared scheduler.
+    """
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = PriorityScheduler()
+    return _scheduler
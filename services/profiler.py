@@ -0,0 +1,198 @@
+# services/profiler.py
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import Optional
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class ProfilerError(Exception):
+    """Кастомное исключение для ошибок профилирования."""
+    pass
+
+
+def frame_label(frame) -> str:
+    """Returns "function (path:line)" for a frame, with project paths shortened."""
+    path = frame.f_code.co_filename
+    if path.startswith(PROJECT_ROOT):
+        path = os.path.relpath(path, PROJECT_ROOT)
+    return f"{frame.f_code.co_qualname} ({path}:{frame.f_code.co_firstlineno})"
+
+
+def deep_sizeof(obj, seen: Optional[set] = None, depth: int = 0, max_depth: int = 6) -> int:
+    """Approximates the memory held by a container and everything it references.
+
+    Args:
+        obj: Object to measure.
+        seen (Optional[set]): IDs of objects already counted.
+        depth (int): Current recursion depth.
+        max_depth (int): Maximum recursion depth.
+
+    Returns:
+        int: Size in bytes.
+    """
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj, 0)
+    if depth >= max_depth:
+        return size
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(key, seen, depth + 1, max_depth) + deep_sizeof(value, seen, depth + 1, max_depth)
+                    for key, value in list(obj.items()))
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_sizeof(item, seen, depth + 1, max_depth) for item in list(obj))
+    elif hasattr(type(obj), "__slots__"):
+        size += sum(deep_sizeof(getattr(obj, name), seen, depth + 1, max_depth)
+                    for name in type(obj).__slots__ if hasattr(obj, name))
+    return size
+
+
+class SamplingProfiler:
+    """Семплирующий профилировщик CPU работающего процесса.
+
+    Отдельный поток с заданным периодом снимает стеки всех потоков (`sys._current_frames`).
+    В отличие от cProfile не замедляет выполняемый код и не требует перезапуска.
+    """
+
+    def __init__(self, interval: float = 0.01):
+        """Initializes the profiler.
+
+        Args:
+            interval (float): Sampling period in seconds.
+        """
+        self.interval = interval
+        self._lock = threading.Lock()
+
+    def profile(self, duration: float) -> dict:
+        """Samples all threads for `duration` seconds; blocks the calling thread.
+
+        Args:
+            duration (float): Profiling time in seconds.
+
+        Returns:
+            dict: "samples", "own" (Counter of innermost functions), "total" (Counter of functions
+            anywhere on the stack) and "stacks" (Counter of folded stacks).
+
+        Raises:
+            ProfilerError: If another profile is already running.
+        """
+        if not self._lock.acquire(blocking=False):
+            raise ProfilerError("Профилирование уже выполняется.")
+        try:
+            own, total, stacks = Counter(), Counter(), Counter()
+            samples = 0
+            current = threading.get_ident()
+            deadline = time.monotonic() + duration
+            while time.monotonic() < deadline:
+                for thread_id, frame in sys._current_frames().items():
+                    if thread_id == current:
+                        continue
+                    labels = []
+                    while frame is not None:
+                        labels.append(frame_label(frame))
+                        frame = frame.f_back
+                    labels.reverse()
+                    own[labels[-1]] += 1
+                    total.update(set(labels))
+                    stacks[";".join(labels)] += 1
+                samples += 1
+                time.sleep(self.interval)
+            return {"samples": samples, "own": own, "total": total, "stacks": stacks}
+        finally:
+            self._lock.release()
+
+    @staticmethod
+    def format_report(result: dict, duration: float, top: int = 30) -> str:
+        """Formats a profile as a text report.
+
+        Args:
+            result (dict): Result of `profile`.
+            duration (float): Profiling time in seconds.
+            top (int): Number of functions in each table.
+
+        Returns:
+            str: Report; the last section lists folded stacks usable by flame graph tools.
+        """
+        samples = max(result["samples"], 1)
+        lines = [f"CPU-профиль: {duration:.0f} с, {result['samples']} срезов всех потоков.", ""]
+        for title, counter in (("Собственное время (функция на вершине стека)", result["own"]),
+                               ("Общее время (функция где-либо в стеке)", result["total"])):
+            lines.append(f"== {title} ==")
+            lines.extend(f"{count / samples:7.1%}  {count:6d}  {label}" for label, count in counter.most_common(top))
+            lines.append("")
+        lines.append("== Свёрнутые стеки (folded) ==")
+        lines.extend(f"{stack} {count}" for stack, count in result["stacks"].most_common())
+        return "\n".join(lines)
+
+
+class MemoryProfiler:
+    """Снимки памяти tracemalloc и их сравнение с базовым снимком."""
+
+    def __init__(self, frames: int = 10):
+        """Initializes the memory profiler.
+
+        Args:
+            frames (int): Number of stack frames stored per allocation.
+        """
+        self.frames = frames
+        self.baseline: Optional[tracemalloc.Snapshot] = None
+
+    @property
+    def tracing(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def start(self) -> None:
+        """Starts tracing allocations and takes the baseline snapshot."""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+        self.baseline = self.take()
+        logger.info("tracemalloc запущен, базовый снимок памяти сохранён.")
+
+    def stop(self) -> None:
+        """Stops tracing and drops the baseline (tracing slows allocations down)."""
+        tracemalloc.stop()
+        self.baseline = None
+        logger.info("tracemalloc остановлен.")
+
+    @staticmethod
+    def take() -> tracemalloc.Snapshot:
+        """Takes a snapshot without the profiler's own allocations."""
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ))
+
+    def diff_report(self, top: int = 25) -> str:
+        """Compares the current memory with the baseline.
+
+        Args:
+            top (int): Number of allocation sites in the report.
+
+        Returns:
+            str: Report with the largest growth by line and the full tracebacks of the top sites.
+
+        Raises:
+            ProfilerError: If tracing has not been started.
+        """
+        if self.baseline is None or not tracemalloc.is_tracing():
+            raise ProfilerError("Снимки памяти не запущены.")
+        snapshot = self.take()
+        current, peak = tracemalloc.get_traced_memory()
+        lines = [f"Память под наблюдением tracemalloc: {current / 1024 ** 2:.1f} MB (пик {peak / 1024 ** 2:.1f} MB).", "",
+                 "== Рост по строкам с момента базового снимка =="]
+        by_line = snapshot.compare_to(self.baseline, "lineno")
+        lines.extend(str(stat) for stat in by_line[:top])
+        lines += ["", "== Рост с полным стеком вызовов =="]
+        for stat in snapshot.compare_to(self.baseline, "traceback")[:5]:
+            lines.append(f"{stat.size_diff / 1024:+.1f} KiB, {stat.count_diff:+d} блоков:")
+            lines.extend(f"    {line}" for line in stat.traceback.format())
+        return "\n".join(lines)
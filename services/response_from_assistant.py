@@ -1,8 +1,13 @@
 
-import openai
+import asyncio
+import time
+from typing import Optional
 from utils.logger import setup_logger
-from utils.api_utils import async_openai_error_handler
+from utils.api_utils import async_openai_error_handler, is_retryable_error
 import config as cfg  # Должны быть: OPENAI_API_KEY, ASSISTANT_ID, INSTRUCTION_ASSISTANT, MODELS_GPT
+from services.credential_pool import OPENAI_RETRY_POLICY, openai_client, async_openai_client
+from services.semantic_cache import SemanticCache
+from services.model_router import ModelRouter
 
 logger = setup_logger(__name__)
 
@@ -16,7 +21,8 @@ class ResponseAssistantAll:
     def __init__(self):
         """Проверяет конфигурацию API-ключа."""
         self.validate_response_config()
-        openai.api_key = cfg.OPENAI_API_KEY
+        self.semantic_cache = SemanticCache() if cfg.SEMANTIC_CACHE_ENABLED else None
+        self.model_router = ModelRouter()
 
     @staticmethod
     def validate_response_config():
@@ -25,11 +31,21 @@ class ResponseAssistantAll:
                 Raises:
                     ValueError: If API key or models are not configured.
                 """
-        if not cfg.OPENAI_API_KEY:
+        if not cfg.OPENAI_API_KEYS:
             raise ValueError("Не задан API-ключ OpenAI.")
         if not hasattr(cfg, "MODELS_GPT") or not cfg.MODELS_GPT:
             raise ValueError("Не заданы доступные модели GPT.")
 
+    @staticmethod
+    def warm_up() -> None:
+        """Импортирует openai и устанавливает соединение с API заранее.
+        Клиенты ключей пула общие для всех сервисов, поэтому прогрев ускоряет и Whisper, и TTS.
+
+        Raises:
+            openai.OpenAIError: If the API is unreachable.
+        """
+        openai_client().models.list()
+
     @staticmethod
     def validate_model(model: str) -> bool:
         """Проверяет, поддерживается ли выбранная модель.Args:
@@ -40,7 +56,54 @@ class ResponseAssistantAll:
         """
         return model in cfg.MODELS_GPT
 
-    async def text_generation(self, update, context, user_message: str, model: str = "gpt-4o") -> str:
+    @async_openai_error_handler(error_cls=ResponseAssistantError, policy=OPENAI_RETRY_POLICY)
+    async def create_completion(self, user_message: str, model: str):
+        """Отправляет запрос к OpenAI Chat Completions с повторами временных ошибок.
+
+        Args:
+            user_message (str): The user's input.
+            model (str): The model to use.
+
+        Returns:
+            ChatCompletion: Raw OpenAI response.
+
+        Raises:
+            ResponseAssistantError: If the request fails after all retries."""
+        # Асинхронный клиент: отмена задачи (/cancel, таймаут модели) обрывает HTTP-запрос
+        return await async_openai_client().chat.completions.create(
+            model=model,
+            messages=[{"role": "user", "content": user_message}],
+            max_tokens=1000
+        )
+
+    async def complete_with_fallback(self, user_message: str, models: list):
+        """Запрашивает ответ у первой модели, переключаясь на следующую при перегрузке или долгом ответе.
+
+        Args:
+            user_message (str): The user's input.
+            models (list[str]): Models in order of preference.
+
+        Returns:
+            tuple[ChatCompletion, str]: Raw OpenAI response and the model that produced it.
+
+        Raises:
+            ResponseAssistantError: If all models fail or the error is not transient."""
+        for index, model in enumerate(models):
+            started = time.monotonic()
+            try:
+                response = await asyncio.wait_for(self.create_completion(user_message, model), cfg.ROUTER_TIMEOUT)
+            except (ResponseAssistantError, asyncio.TimeoutError) as e:
+                self.model_router.record(model, time.monotonic() - started, ok=False)
+                transient = isinstance(e, asyncio.TimeoutError) or is_retryable_error(e.__cause__ or e)
+                if not transient or index == len(models) - 1:
+                    raise ResponseAssistantError(str(e) or "Модель не ответила вовремя.") from e
+                logger.warning(f"Модель {model} недоступна ({str(e) or 'таймаут'}), переключаемся на {models[index + 1]}.")
+                continue
+            truncated = response.choices[0].finish_reason == "length"
+            self.model_router.record(model, time.monotonic() - started, ok=True, truncated=truncated)
+            return response, model
+
+    async def text_generation(self, update, context, user_message: str, model: Optional[str] = None) -> str:
         """Генерирует текст на основе сообщения пользователя с использованием OpenAI GPT.Args:
             Generates text based on the user's message using OpenAI GPT.
 
@@ -48,7 +111,7 @@ class ResponseAssistantAll:
             update: Telegram update.
             context: Telegram context.
             user_message (str): The user's input.
-            model (str, optional): The model to use. Defaults to "gpt-4o".
+            model (Optional[str]): The model chosen by the user; None to pick one automatically.
 
         Returns:
             str: Generated text with token usage statistics.
@@ -60,15 +123,19 @@ class ResponseAssistantAll:
             raise ValueError("❌ Пожалуйста, введите текст для генерации ответа.")
         if len(user_message) > 16000:
             raise ValueError("Текст запроса не должен превышать 16000 символов.")
-        if not self.validate_model(model):
+        if model is not None and not self.validate_model(model):
             raise ValueError(f"Выбранная модель '{model}' не поддерживается.")
+        models = self.model_router.route(user_message, preferred=model)
+
+        # Короткие вопросы без контекста переписки часто повторяются другими словами
+        cacheable = self.semantic_cache is not None and len(user_message) <= cfg.SEMANTIC_CACHE_MAX_PROMPT
+        if cacheable:
+            cached_answer = self.semantic_cache.lookup(user_message, models[0])
+            if cached_answer is not None:
+                return f"{cached_answer}\n\n⚡️ Ответ на похожий вопрос из кэша"
 
         status_message = await update.message.reply_text("⏳ Ассистент обрабатывает ваш запрос...")
-        response = openai.chat.completions.create(
-            model=model,
-            messages=[{"role": "user", "content": user_message}],
-            max_tokens=1000
-        )
+        response, model = await self.complete_with_fallback(user_message, models)
         input_tokens = response.usage.prompt_tokens
         output_tokens = response.usage.completion_tokens
         total_tokens = response.usage.total_tokens
@@ -79,9 +146,13 @@ class ResponseAssistantAll:
             f"🔹 *Статистика токенов:*\n"
             f"📥 Входящие: {input_tokens}\n"
             f"📤 Исходящие: {output_tokens}\n"
-            f"💰 Всего: {total_tokens}"
+            f"💰 Всего: {total_tokens}\n"
+            f"🤖 Модель: {model}"
         )
         await status_message.edit_text("✅ Ответ готов!")
+        # Обрезанные по max_tokens ответы не кэшируются
+        if cacheable and response.choices[0].finish_reason == "stop":
+            self.semantic_cache.put(user_message, model, generated_text)
         logger.info(
             f"Сгенерированный текст: {generated_text[:50]}... (Входящие: {input_tokens}, "
             f"Исходящие: {output_tokens}, Всего: {total_tokens})"
@@ -0,0 +1,279 @@
+# services/semantic_cache.py
+import os
+import re
+import time
+import zlib
+from typing import Optional
+import config as cfg
+from database.database import Database, get_database
+from utils.logger import setup_logger
+from utils.similarity_utils import NEGATIONS, NUMBER
+from utils.startup_utils import lazy_import
+
+np = lazy_import("numpy")
+
+logger = setup_logger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS semantic_cache (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    model TEXT NOT NULL,
+    prompt TEXT NOT NULL,
+    answer TEXT NOT NULL,
+    vector BLOB NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+"""
+
+WORD = re.compile(r"\w+")
+# Служебные слова, которые не меняют смысл вопроса и не учитываются в векторе
+STOPWORDS = frozenset((
+    "a an the is are am was were be do does did to of in on at for and or please can could would "
+    "you me my i it s this that what how why which tell explain "
+    "а и в во на по к ко с со о об у за из что как почему какой какая какие это ли мне я ты вы "
+    "пожалуйста скажи объясни расскажи"
+).split())
+# Формы одного слова (verb/verbs, perfect/perfekt): общее начало не короче WORD_STEM букв,
+# различаться могут только последние WORD_ENDING букв
+WORD_STEM, WORD_ENDING = 4, 2
+# Сколько значимых слов может быть добавлено или пропущено («what is present perfect» и
+# «explain present perfect tense»); совпавших значимых слов при этом должно быть больше
+MAX_EXTRA_WORDS = 2
+
+
+def embed(text: str, dim: int = 1024):
+    """Builds a local embedding of a text: hashed word, word bigram and character trigram counts.
+
+    Only meaningful words are used (service words like "what is" or "explain" do not change the question).
+    Words catch paraphrases with the same vocabulary, bigrams keep their order, trigrams catch typos
+    and word forms. The vector is L2-normalized, so the dot product of two vectors is its cosine similarity.
+
+    Args:
+        text (str): Text.
+        dim (int): Vector dimension.
+
+    Returns:
+        numpy.ndarray: float32 vector of shape (dim,).
+    """
+    vector = np.zeros(dim, dtype=np.float32)
+    words = content_words(text) or WORD.findall(text.lower())
+    features = [f"w:{word}" for word in words]
+    features.extend(f"b:{first} {second}" for first, second in zip(words, words[1:]))
+    for word in words:
+        padded = f" {word} "
+        features.extend(f"c:{padded[i:i + 3]}" for i in range(len(padded) - 2))
+    for feature in features:
+        vector[zlib.crc32(feature.encode("utf-8")) % dim] += 1.0
+    np.log1p(vector, out=vector)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def content_words(text: str) -> list:
+    """Returns the meaningful words of a text in their order (without STOPWORDS)."""
+    return [word for word in WORD.findall(text.lower()) if word not in STOPWORDS]
+
+
+def same_form(first: str, second: str) -> bool:
+    """Checks that two words are forms of one word (see WORD_STEM, WORD_ENDING)."""
+    return first == second or len(os.path.commonprefix((first, second))) >= max(
+        WORD_STEM, len(first) - WORD_ENDING, len(second) - WORD_ENDING)
+
+
+def same_question(first: str, second: str) -> bool:
+    """Checks that the cached answer fits the question.
+
+    Слова вопросов выравниваются по наибольшей общей подпоследовательности (с точностью до окончаний).
+    Служебные слова могут отличаться, значимых слов может быть добавлено или пропущено до MAX_EXTRA_WORDS.
+    Добавленные слова допускаются только в одном из вопросов. Заменённое значимое слово («past tense of go»
+    и «of do»), перестановка («affect and effect» и «effect and affect»), другое отрицание или число
+    означают другой вопрос.
+
+    Args:
+        first (str): Question.
+        second (str): Cached question.
+
+    Returns:
+        bool: True if the cached answer fits the question.
+    """
+    first_words, second_words = WORD.findall(first.lower()), WORD.findall(second.lower())
+    if ([word for word in first_words if word in NEGATIONS or NUMBER.fullmatch(word)]
+            != [word for word in second_words if word in NEGATIONS or NUMBER.fullmatch(word)]):
+        return False
+    # lengths[i][j] — длина общей подпоследовательности first_words[i:] и second_words[j:]
+    lengths = [[0] * (len(second_words) + 1) for _ in range(len(first_words) + 1)]
+    for i in range(len(first_words) - 1, -1, -1):
+        for j in range(len(second_words) - 1, -1, -1):
+            if same_form(first_words[i], second_words[j]):
+                lengths[i][j] = lengths[i + 1][j + 1] + 1
+            else:
+                lengths[i][j] = max(lengths[i + 1][j], lengths[i][j + 1])
+    # Проход по выравниванию: слова между двумя совпавшими — пропуски с одной или с обеих сторон
+    i = j = matched = 0
+    first_extra, second_extra = [], []
+    first_gap, second_gap = [], []
+    while True:
+        at_end = i == len(first_words) and j == len(second_words)
+        if at_end or (i < len(first_words) and j < len(second_words)
+                      and same_form(first_words[i], second_words[j])
+                      and lengths[i][j] == lengths[i + 1][j + 1] + 1):
+            first_gap_extra = [word for word in first_gap if word not in STOPWORDS]
+            second_gap_extra = [word for word in second_gap if word not in STOPWORDS]
+            # Значимое слово на месте другого слова — замена, а не уточнение
+            if (first_gap_extra and second_gap) or (second_gap_extra and first_gap):
+                return False
+            first_extra += first_gap_extra
+            second_extra += second_gap_extra
+            if at_end:
+                break
+            matched += first_words[i] not in STOPWORDS
+            first_gap, second_gap = [], []
+            i, j = i + 1, j + 1
+        elif j == len(second_words) or (i < len(first_words) and lengths[i + 1][j] >= lengths[i][j + 1]):
+            first_gap.append(first_words[i])
+            i += 1
+        else:
+            second_gap.append(second_words[j])
+            j += 1
+    # Уточнять можно только один из вопросов: лишние слова в обоих — перестановка или замена
+    if first_extra and second_extra:
+        return False
+    return len(first_extra + second_extra) <= min(MAX_EXTRA_WORDS, matched - 1)
+
+
+class SemanticCache:
+    """Кэш ответов ассистента на похожие по смыслу вопросы.
+
+    Вопросы переводятся в векторы локально (хэшированные слова, пары слов и триграммы, без API эмбеддингов)
+    и хранятся в матрице NumPy; поиск — одно матричное умножение с выбором top-k.
+    Ответ возвращается, если косинусная близость не ниже порога, а значимые слова вопросов совпадают
+    по порядку, допуская несколько добавленных или пропущенных слов (`same_question`). Записи хранятся в SQLite;
+    устаревшие удаляются, а при переполнении вытесняются записи с наименьшим числом обращений.
+    """
+
+    def __init__(self, db: Optional[Database] = None, threshold: float = cfg.SEMANTIC_CACHE_THRESHOLD,
+                 max_entries: int = cfg.SEMANTIC_CACHE_MAX_ENTRIES, ttl: float = cfg.SEMANTIC_CACHE_TTL,
+                 dim: int = 1024):
+        """Инициализирует кэш и создаёт таблицу при необходимости; записи загружаются при первом поиске.
+
+        Args:
+            db (Optional[Database]): Database instance. Defaults to the shared one.
+            threshold (float): Minimal cosine similarity for a cache hit.
+            max_entries (int): Number of answers kept.
+            ttl (float): Lifetime of an answer in seconds.
+            dim (int): Embedding dimension.
+        """
+        self.db = db or get_database()
+        self.db.executescript(SCHEMA)
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.dim = dim
+        self._matrix = None  # строки — векторы вопросов, загружается лениво
+        self._ids: list = []
+        self._models: list = []
+        self._created: list = []
+
+    def lookup(self, prompt: str, model: str) -> Optional[str]:
+        """Returns a cached answer to a similar question asked to the same model.
+
+        Args:
+            prompt (str): User question.
+            model (str): Model name.
+
+        Returns:
+            Optional[str]: Cached answer or None.
+        """
+        for entry_id, score in self.search(embed(prompt, self.dim), model, k=3):
+            if score < self.threshold:
+                return None
+            row = self.db.fetchone("SELECT prompt, answer FROM semantic_cache WHERE id = ?", (entry_id,))
+            if row is None or not same_question(prompt, row["prompt"]):
+                continue
+            self.db.execute("UPDATE semantic_cache SET hits = hits + 1, last_used = ? WHERE id = ?",
+                            (time.time(), entry_id))
+            logger.info(f"Семантический кэш: найден ответ #{entry_id} (близость {score:.3f}).")
+            return row["answer"]
+        return None
+
+    def search(self, vector, model: str, k: int = 5) -> list:
+        """Finds the most similar cached questions.
+
+        Args:
+            vector (numpy.ndarray): Normalized question embedding.
+            model (str): Model name; answers of other models are ignored.
+            k (int): Number of results.
+
+        Returns:
+            list[tuple[int, float]]: Entry IDs with cosine similarity, best first.
+        """
+        self._load()
+        if not self._ids:
+            return []
+        scores = self._matrix[:len(self._ids)] @ vector
+        now = time.time()
+        valid = ((np.asarray(self._models) == model)
+                 & (np.asarray(self._created) >= now - self.ttl))
+        scores = np.where(valid, scores, -1.0)
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self._ids[i], float(scores[i])) for i in top if scores[i] >= 0]
+
+    def put(self, prompt: str, model: str, answer: str) -> None:
+        """Saves an answer and evicts old or rarely used ones.
+
+        Args:
+            prompt (str): User question.
+            model (str): Model name.
+            answer (str): Model answer.
+        """
+        self._load()
+        now = time.time()
+        vector = embed(prompt, self.dim)
+        entry_id = self.db.insert(
+            "INSERT INTO semantic_cache (model, prompt, answer, vector, created_at, last_used) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (model, prompt, answer, vector.tobytes(), now, now)
+        )
+        self._append(entry_id, model, now, vector)
+        self._evict(now)
+
+    def _load(self) -> None:
+        if self._matrix is not None:
+            return
+        self._matrix = np.zeros((max(self.max_entries, 1), self.dim), dtype=np.float32)
+        rows = self.db.fetchall("SELECT id, model, vector, created_at FROM semantic_cache ORDER BY id")
+        for row in rows:
+            vector = np.frombuffer(row["vector"], dtype=np.float32)
+            if vector.shape == (self.dim,):
+                self._append(row["id"], row["model"], row["created_at"], vector)
+        self._evict(time.time())
+
+    def _append(self, entry_id: int, model: str, created_at: float, vector) -> None:
+        if len(self._ids) == len(self._matrix):
+            self._matrix = np.concatenate([self._matrix, np.zeros_like(self._matrix)])
+        self._matrix[len(self._ids)] = vector
+        self._ids.append(entry_id)
+        self._models.append(model)
+        self._created.append(created_at)
+
+    def _evict(self, now: float) -> None:
+        """Удаляет устаревшие записи, а сверх лимита — с наименьшим числом обращений (старые первыми)."""
+        expired = self.db.execute("DELETE FROM semantic_cache WHERE created_at < ?", (now - self.ttl,))
+        evicted = self.db.execute(
+            "DELETE FROM semantic_cache WHERE id NOT IN "
+            "(SELECT id FROM semantic_cache ORDER BY hits DESC, last_used DESC LIMIT ?)",
+            (self.max_entries,)
+        )
+        if not (expired or evicted):
+            return
+        kept = {row["id"] for row in self.db.fetchall("SELECT id FROM semantic_cache")}
+        keep = [i for i, entry_id in enumerate(self._ids) if entry_id in kept]
+        self._matrix[:len(keep)] = self._matrix[keep]
+        self._ids = [self._ids[i] for i in keep]
+        self._models = [self._models[i] for i in keep]
+        self._created = [self._created[i] for i in keep]
+        logger.info(f"Семантический кэш: удалено устаревших {expired}, вытеснено {evicted}.")
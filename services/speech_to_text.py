@@ -1,18 +1,12 @@
 # services/speech_to_text.py
-import openai
-from pydub import AudioSegment
 from utils.logger import setup_logger
 from utils.api_utils import sync_openai_error_handler
 import config as cfg
+from services.credential_pool import OPENAI_RETRY_POLICY, openai_client
 
 
 logger = setup_logger(__name__)
 
-# Указываем `pydub`, где искать ffmpeg и ffprobe
-AudioSegment.converter = cfg.FFMPEG_PATH
-AudioSegment.ffprobe = cfg.FFPROBE_PATH
-AudioSegment.ffmpeg = cfg.FFMPEG_PATH
-
 class SpeechToTextError(Exception):
     """Кастомное исключение для ошибок перевода."""
     pass
@@ -23,7 +17,6 @@ class SpeechToTextService:
     def __init__(self):
         """Инициализирует сервис распознавания речи."""
         self.validate_config()
-        openai.api_key = cfg.OPENAI_API_KEY
 
     @staticmethod
     def validate_config():
@@ -32,10 +25,10 @@ class SpeechToTextService:
                 Raises:
                     ValueError: If API key is not set.
                 """
-        if not openai.api_key:
+        if not cfg.OPENAI_API_KEYS:
             raise ValueError("Не задан API-ключ OpenAI.")
 
-    @sync_openai_error_handler
+    @sync_openai_error_handler(error_cls=SpeechToTextError, policy=OPENAI_RETRY_POLICY)
     def transcribe_audio(self, audio_file_path: str, model: str = "whisper-1") -> str:
         """Transcribes an audio file to text using OpenAI Whisper.
 
@@ -50,9 +43,64 @@ class SpeechToTextService:
             SpeechToTextError: If transcription fails.
         """
         with open(audio_file_path, "rb") as audio_file:
-            response = openai.audio.transcriptions.create(
+            response = openai_client().audio.transcriptions.create(
                 model=model,
                 file=audio_file,
                 temperature=0.2
             )
-        return response.text
\ No newline at end of file
+        return response.text
+
+    @sync_openai_error_handler(error_cls=SpeechToTextError, policy=OPENAI_RETRY_POLICY)
+    def transcribe_segments(self, audio_file_path: str, offset: float = 0.0, model: str = "whisper-1") -> list:
+        """Transcribes an audio file with segment-level timestamps.
+
+        Args:
+            audio_file_path (str): Path to the audio file.
+            offset (float, optional): Start time of the file within the whole recording, in seconds.
+            model (str, optional): The transcription model. Defaults to "whisper-1".
+
+        Returns:
+            list[dict]: Segments with "start", "end" (shifted by offset) and "text" keys.
+
+        Raises:
+            SpeechToTextError: If transcription fails.
+        """
+        with open(audio_file_path, "rb") as audio_file:
+            return self.request_segments(audio_file, offset, model)
+
+    @sync_openai_error_handler(error_cls=SpeechToTextError, policy=OPENAI_RETRY_POLICY)
+    def transcribe_bytes(self, audio: bytes, filename: str = "audio.ogg", offset: float = 0.0,
+                         model: str = "whisper-1") -> list:
+        """Transcribes audio held in memory (e.g. extracted from a video) with segment-level timestamps.
+
+        Args:
+            audio (bytes): Encoded audio.
+            filename (str, optional): File name that tells Whisper the format. Defaults to "audio.ogg".
+            offset (float, optional): Start time of the audio within the whole recording, in seconds.
+            model (str, optional): The transcription model. Defaults to "whisper-1".
+
+        Returns:
+            list[dict]: Segments with "start", "end" (shifted by offset) and "text" keys.
+
+        Raises:
+            SpeechToTextError: If transcription fails.
+        """
+        return self.request_segments((filename, audio), offset, model)
+
+    @staticmethod
+    def request_segments(audio_file, offset: float, model: str) -> list:
+        """Sends audio to Whisper and converts the response to segments."""
+        response = openai_client().audio.transcriptions.create(
+            model=model,
+            file=audio_file,
+            temperature=0.2,
+            response_format="verbose_json",
+            timestamp_granularities=["segment"]
+        )
+        segments = getattr(response, "segments", None) or []
+        if not segments and response.text.strip():
+            # Без разметки по времени возвращаем весь текст одним сегментом
+            return [{"start": offset, "end": offset + (getattr(response, "duration", 0) or 0),
+                     "text": response.text}]
+        return [{"start": offset + segment.start, "end": offset + segment.end, "text": segment.text}
+                for segment in segments]
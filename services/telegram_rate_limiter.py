@@ -0,0 +1,198 @@
+# services/telegram_rate_limiter.py
+import asyncio
+import itertools
+import time
+from typing import Any, Callable, Coroutine, Optional, Union
+from telegram.error import RetryAfter
+from telegram.ext import BaseRateLimiter
+import config as cfg
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Приоритеты исходящих запросов: меньше — важнее
+PRIORITY_RESULT = 0
+PRIORITY_PROGRESS = 1
+
+# Редактирования сообщений — промежуточный прогресс; повторные правки одного сообщения объединяются
+EDIT_ENDPOINTS = frozenset({"editMessageText", "editMessageCaption"})
+
+# Интервал, с которым запросы прогресса проверяют, не освободилась ли очередь от результатов, секунды
+PROGRESS_POLL_INTERVAL = 0.05
+# Как часто удаляются вёдра чатов, в которые давно не писали, секунды
+BUCKET_SWEEP_INTERVAL = 60
+
+
+class TokenBucket:
+    """Ведро токенов: `rate` запросов в секунду с допустимым всплеском `capacity`."""
+
+    def __init__(self, rate: float, capacity: float):
+        """Инициализирует полное ведро.
+
+        Args:
+            rate (float): Tokens added per second.
+            capacity (float): Maximum number of tokens.
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+
+    def delay(self) -> float:
+        """Returns how long to wait until a token is available (0 if available now)."""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def consume(self) -> None:
+        """Takes one token; call only right after delay() returned 0."""
+        self.tokens -= 1
+
+    def is_full(self, now: float) -> bool:
+        """Returns True if the bucket has refilled to capacity, i.e. is no different from a new one."""
+        return self.tokens + (now - self.updated_at) * self.rate >= self.capacity
+
+
+class TelegramRateLimiter(BaseRateLimiter):
+    """Ограничитель исходящих запросов к Telegram Bot API.
+
+    Подключается к Application и обрабатывает все запросы бота (reply_text, reply_photo,
+    edit_text и т.д.), поэтому обработчикам не нужно заботиться о лимитах:
+
+    * общий лимит (около 30 сообщений в секунду) и лимит на чат (личные чаты и группы отдельно);
+    * при RetryAfter отправка приостанавливается на указанное Telegram время и запрос повторяется;
+    * если правка сообщения ещё ждёт очереди, а пришла более новая правка того же сообщения,
+      отправляется только последняя;
+    * итоговые сообщения отправляются раньше правок с прогрессом. Приоритет можно задать явно:
+      `rate_limit_args={"priority": PRIORITY_RESULT}`.
+    """
+
+    def __init__(self, global_rate: float = cfg.TELEGRAM_GLOBAL_RATE, chat_rate: float = cfg.TELEGRAM_CHAT_RATE,
+                 group_rate: float = cfg.TELEGRAM_GROUP_RATE, max_retries: int = cfg.TELEGRAM_MAX_RETRIES):
+        """Инициализирует ограничитель.
+
+        Args:
+            global_rate (float): Requests per second across all chats.
+            chat_rate (float): Requests per second to one private chat.
+            group_rate (float): Requests per second to one group chat.
+            max_retries (int): How many times a request is repeated after RetryAfter.
+        """
+        self.global_rate = global_rate
+        self.chat_rate = chat_rate
+        self.group_rate = group_rate
+        self.max_retries = max_retries
+        self._global = TokenBucket(global_rate, global_rate)
+        self._chats: dict = {}
+        self._swept_at = time.monotonic()
+        self._paused_until = 0.0
+        self._results_waiting = 0
+        self._edit_seq = itertools.count()
+        self._latest_edits: dict = {}  # (chat_id, message_id) -> номер последней правки
+
+    async def initialize(self) -> None:
+        """Ничего не требуется: состояние создаётся в конструкторе."""
+
+    async def shutdown(self) -> None:
+        """Сбрасывает состояние по чатам."""
+        self._chats.clear()
+        self._latest_edits.clear()
+
+    def _chat_bucket(self, chat_id: Union[int, str]) -> TokenBucket:
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            self._sweep()
+            # Отрицательные ID и @username — группы и каналы, у них лимит строже
+            is_group = isinstance(chat_id, str) or chat_id < 0
+            rate = self.group_rate if is_group else self.chat_rate
+            bucket = self._chats[chat_id] = TokenBucket(rate, max(rate * 3, 1))
+        return bucket
+
+    def _sweep(self) -> None:
+        """Удаляет вёдра чатов, наполнившиеся до краёв: они не отличаются от новых, а без очистки
+        словарь рос бы с каждым чатом, которому бот когда-либо писал."""
+        now = time.monotonic()
+        if now - self._swept_at < BUCKET_SWEEP_INTERVAL:
+            return
+        self._swept_at = now
+        idle = [chat_id for chat_id, bucket in self._chats.items() if bucket.is_full(now)]
+        for chat_id in idle:
+            del self._chats[chat_id]
+        if idle:
+            logger.debug(f"Удалено неактивных вёдер чатов: {len(idle)}.")
+
+    def _is_stale(self, edit_key: Optional[tuple], seq: Optional[int]) -> bool:
+        """Проверяет, пришла ли более новая правка того же сообщения."""
+        return edit_key is not None and self._latest_edits.get(edit_key) != seq
+
+    async def _wait_turn(self, chat_id, priority: int, edit_key: Optional[tuple], seq: Optional[int]) -> bool:
+        """Ждёт, пока запрос можно отправить без превышения лимитов.
+
+        Returns:
+            bool: False if the request became stale (superseded edit) while waiting.
+        """
+        if priority == PRIORITY_RESULT:
+            self._results_waiting += 1
+        try:
+            while True:
+                if self._is_stale(edit_key, seq):
+                    return False
+                if priority != PRIORITY_RESULT and self._results_waiting:
+                    await asyncio.sleep(PROGRESS_POLL_INTERVAL)
+                    continue
+                chat_bucket = self._chat_bucket(chat_id)
+                delay = max(self._paused_until - time.monotonic(), self._global.delay(), chat_bucket.delay())
+                if delay <= 0:
+                    self._global.consume()
+                    chat_bucket.consume()
+                    return True
+                await asyncio.sleep(delay)
+        finally:
+            if priority == PRIORITY_RESULT:
+                self._results_waiting -= 1
+
+    async def process_request(
+        self,
+        callback: Callable[..., Coroutine[Any, Any, Union[bool, dict, list]]],
+        args: Any,
+        kwargs: dict,
+        endpoint: str,
+        data: dict,
+        rate_limit_args: Optional[dict],
+    ) -> Union[bool, dict, list]:
+        """Отправляет запрос с учётом лимитов, приоритета и RetryAfter.
+
+        Returns:
+            Union[bool, dict, list]: Result of the API call (True for a superseded edit).
+        """
+        chat_id = data.get("chat_id")
+        if chat_id is None:
+            # getUpdates, getFile, setMyCommands и т.п. не относятся к лимитам на сообщения
+            return await callback(*args, **kwargs)
+
+        is_edit = endpoint in EDIT_ENDPOINTS
+        default_priority = PRIORITY_PROGRESS if is_edit else PRIORITY_RESULT
+        priority = (rate_limit_args or {}).get("priority", default_priority)
+
+        edit_key = seq = None
+        if is_edit and data.get("message_id") is not None:
+            edit_key = (chat_id, data["message_id"])
+            seq = next(self._edit_seq)
+            self._latest_edits[edit_key] = seq
+
+        try:
+            for attempt in range(self.max_retries + 1):
+                if not await self._wait_turn(chat_id, priority, edit_key, seq):
+                    logger.debug(f"Правка сообщения {edit_key} заменена более новой.")
+                    return True
+                try:
+                    return await callback(*args, **kwargs)
+                except RetryAfter as e:
+                    retry_after = float(e.retry_after)
+                    self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+                    logger.warning(f"Telegram ограничил отправку ({endpoint}, чат {chat_id}) на {retry_after} с.")
+                    if attempt == self.max_retries:
+                        raise
+        finally:
+            if edit_key is not None and not self._is_stale(edit_key, seq):
+                self._latest_edits.pop(edit_key, None)
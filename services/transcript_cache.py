@@ -0,0 +1,127 @@
+# services/transcript_cache.py
+import json
+import time
+from collections import OrderedDict
+from typing import Optional
+import config as cfg
+from database.database import Database, get_database
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS transcript_cache (
+    key TEXT PRIMARY KEY,
+    segments TEXT NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS transcript_cache_last_used ON transcript_cache (last_used);
+"""
+
+
+class TranscriptCache:
+    """Кэш расшифровок аудио.
+
+    Telegram присваивает файлу постоянный `file_unique_id`, который не меняется при пересылке,
+    поэтому повторно присланное голосовое сообщение распознаётся без скачивания, ffmpeg и Whisper.
+    Горячие записи хранятся в памяти (LRU), все — в SQLite с ограничением по числу и сроку.
+    """
+
+    def __init__(self, db: Optional[Database] = None, memory_entries: int = cfg.TRANSCRIPT_CACHE_MEMORY_ENTRIES,
+                 max_entries: int = cfg.TRANSCRIPT_CACHE_MAX_ENTRIES, ttl: float = cfg.TRANSCRIPT_CACHE_TTL):
+        """Инициализирует кэш и создаёт таблицу при необходимости.
+
+        Args:
+            db (Optional[Database]): Database instance. Defaults to the shared one.
+            memory_entries (int): Number of transcripts kept in memory.
+            max_entries (int): Number of transcripts kept in the database.
+            ttl (float): Lifetime of a transcript in seconds.
+        """
+        self.db = db or get_database()
+        self.db.executescript(SCHEMA)
+        self.memory_entries = memory_entries
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._memory: OrderedDict = OrderedDict()  # key -> (created_at, segments)
+
+    @staticmethod
+    def make_key(file_unique_id: str, model: str = "whisper-1", language: Optional[str] = None) -> str:
+        """Builds the cache key.
+
+        Args:
+            file_unique_id (str): Telegram file_unique_id of the audio.
+            model (str): Transcription model.
+            language (Optional[str]): Transcription language; None for auto-detection.
+
+        Returns:
+            str: Cache key.
+        """
+        return "|".join((file_unique_id, model, language or "auto"))
+
+    def get(self, key: str) -> Optional[list]:
+        """Returns cached transcript segments.
+
+        Args:
+            key (str): Cache key.
+
+        Returns:
+            Optional[list[dict]]: Segments or None on a miss or expired entry.
+        """
+        now = time.time()
+        entry = self._memory.get(key)
+        if entry is None:
+            row = self.db.fetchone("SELECT segments, created_at FROM transcript_cache WHERE key = ?", (key,))
+            if row is None:
+                return None
+            entry = (row["created_at"], json.loads(row["segments"]))
+        if now - entry[0] > self.ttl:
+            self.forget(key)
+            return None
+        self._remember(key, entry)
+        self.db.execute("UPDATE transcript_cache SET hits = hits + 1, last_used = ? WHERE key = ?", (now, key))
+        return entry[1]
+
+    def put(self, key: str, segments: list) -> None:
+        """Saves transcript segments and trims the database to the configured size.
+
+        Args:
+            key (str): Cache key.
+            segments (list[dict]): Segments with "start", "end" and "text" keys.
+        """
+        now = time.time()
+        self._remember(key, (now, segments))
+        self.db.execute(
+            "INSERT INTO transcript_cache (key, segments, created_at, last_used) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET segments = excluded.segments, "
+            "created_at = excluded.created_at, last_used = excluded.last_used",
+            (key, json.dumps(segments, ensure_ascii=False), now, now)
+        )
+        self._prune(now)
+
+    def forget(self, key: str) -> None:
+        """Removes an entry.
+
+        Args:
+            key (str): Cache key.
+        """
+        self._memory.pop(key, None)
+        self.db.execute("DELETE FROM transcript_cache WHERE key = ?", (key,))
+
+    def _remember(self, key: str, entry: tuple) -> None:
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _prune(self, now: float) -> None:
+        """Удаляет устаревшие записи и давно не использованные сверх лимита."""
+        expired = self.db.execute("DELETE FROM transcript_cache WHERE created_at < ?", (now - self.ttl,))
+        evicted = self.db.execute(
+            "DELETE FROM transcript_cache WHERE key NOT IN "
+            "(SELECT key FROM transcript_cache ORDER BY last_used DESC LIMIT ?)",
+            (self.max_entries,)
+        )
+        if expired or evicted:
+            logger.info(f"Кэш расшифровок: удалено устаревших {expired}, вытеснено {evicted}.")
@@ -0,0 +1,224 @@
+# services/translation_memory.py
+import threading
+import time
+from collections import Counter
+from typing import Optional
+import config as cfg
+from database.database import Database, get_database
+from services.translator import DeepLTranslator
+from utils.logger import setup_logger
+from utils.similarity_utils import (MinHasher, jaccard, join_sentences, normalize, numbers, same_words,
+                                    shingles, split_sentences, words)
+
+logger = setup_logger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS translation_memory (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    target_lang TEXT NOT NULL,
+    source TEXT NOT NULL,
+    translation TEXT NOT NULL,
+    source_lang TEXT,
+    created_at REAL NOT NULL,
+    last_used REAL NOT NULL,
+    UNIQUE (target_lang, source)
+);
+CREATE INDEX IF NOT EXISTS translation_memory_last_used ON translation_memory (last_used);
+"""
+
+
+class _LanguageIndex:
+    """LSH-индекс предложений, переведённых на один язык."""
+
+    def __init__(self):
+        self.entries: dict = {}  # id -> (shingles, numbers, words, translation, source_lang)
+        self.exact: dict = {}  # нормализованное предложение -> id
+        self.buckets: dict = {}  # (полоса, хэш) -> set(id)
+
+
+class TranslationMemory:
+    """Память переводов с нечётким поиском предложений.
+
+    Текст делится на предложения; для каждого ищется ранее переведённое предложение на тот же язык —
+    точное совпадение или похожее (исправленная опечатка, другая пунктуация) с коэффициентом Жаккара
+    по символьным триграммам не ниже порога и теми же словами с точностью до опечаток. Кандидаты находятся через MinHash/LSH, а не перебором.
+    В DeepL одним запросом уходят только новые предложения, затем текст собирается обратно.
+    """
+
+    def __init__(self, translator: DeepLTranslator, db: Optional[Database] = None,
+                 threshold: float = cfg.TRANSLATION_MEMORY_THRESHOLD,
+                 max_entries: int = cfg.TRANSLATION_MEMORY_MAX_ENTRIES):
+        """Инициализирует память переводов и создаёт таблицу при необходимости.
+
+        Args:
+            translator (DeepLTranslator): Translator used for sentences not found in memory.
+            db (Optional[Database]): Database instance. Defaults to the shared one.
+            threshold (float): Minimal Jaccard similarity for reusing a translation.
+            max_entries (int): Number of sentences kept in the database.
+        """
+        self.translator = translator
+        self.db = db or get_database()
+        self.db.executescript(SCHEMA)
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.hasher = MinHasher()
+        self._indexes: dict = {}  # target_lang -> _LanguageIndex, загружается при первом обращении
+        self._lock = threading.Lock()
+
+    def translate(self, text: str, target_lang: str) -> str:
+        """Переводит текст, переиспользуя сохранённые переводы предложений.
+        Args:
+            text (str): Text to translate.
+            target_lang (str): Target language code.
+
+        Returns:
+            str: Translated text.
+
+        Raises:
+            TranslationError: If translation fails."""
+        return self.translate_with_source(text, target_lang)[0]
+
+    def translate_with_source(self, text: str, target_lang: str) -> tuple:
+        """Переводит текст и возвращает язык оригинала; совместим с `DeepLTranslator.translate_with_source`.
+
+        Args:
+            text (str): Text to translate.
+            target_lang (str): Target language code.
+
+        Returns:
+            tuple[str, Optional[str]]: Translated text and detected source language code.
+
+        Raises:
+            TranslationError: If translation fails.
+        """
+        if not text or not isinstance(text, str):
+            raise ValueError("Некорректный текст для перевода.")
+        if not self.translator.validate_language(target_lang):
+            raise ValueError(f"Неподдерживаемый язык перевода: {target_lang}")
+
+        sentences, separators = split_sentences(text)
+        translated = list(sentences)
+        source_langs = Counter()
+        novel = {}  # предложение -> позиции в тексте
+        for position, sentence in enumerate(sentences):
+            if not sentence.strip():
+                continue
+            match = self.lookup(sentence, target_lang)
+            if match is None:
+                novel.setdefault(sentence, []).append(position)
+                continue
+            translated[position], source_lang = match
+            source_langs[source_lang] += len(sentence)
+
+        if novel:
+            results = self.translator.translate_batch(list(novel), target_lang)
+            for (sentence, positions), (translation, source_lang) in zip(novel.items(), results):
+                for position in positions:
+                    translated[position] = translation
+                source_langs[source_lang] += len(sentence) * len(positions)
+                self.add(sentence, translation, target_lang, source_lang)
+            self._prune()
+
+        billed = sum(len(sentence) for sentence in novel)
+        logger.info(f"Память переводов: {len(novel)} новых предложений из {len(sentences)}, "
+                    f"отправлено {billed} из {len(text)} символов.")
+        source_langs.pop(None, None)
+        source_lang = source_langs.most_common(1)[0][0] if source_langs else None
+        return join_sentences(translated, separators), source_lang
+
+    def lookup(self, sentence: str, target_lang: str) -> Optional[tuple]:
+        """Finds a stored translation of the same or a very similar sentence.
+
+        Args:
+            sentence (str): Source sentence.
+            target_lang (str): Target language code.
+
+        Returns:
+            Optional[tuple[str, Optional[str]]]: Translation and source language, or None.
+        """
+        with self._lock:
+            index = self._get_index(target_lang)
+            entry_id = index.exact.get(normalize(sentence))
+            if entry_id is None:
+                entry_id = self._find_similar(index, sentence)
+            if entry_id is None:
+                return None
+            _, _, _, translation, source_lang = index.entries[entry_id]
+        self.db.execute("UPDATE translation_memory SET last_used = ? WHERE id = ?", (time.time(), entry_id))
+        return translation, source_lang
+
+    def add(self, sentence: str, translation: str, target_lang: str, source_lang: Optional[str]) -> None:
+        """Saves a translated sentence.
+
+        Args:
+            sentence (str): Source sentence.
+            translation (str): Its translation.
+            target_lang (str): Target language code.
+            source_lang (Optional[str]): Source language detected by DeepL.
+        """
+        now = time.time()
+        key = normalize(sentence)
+        self.db.execute(
+            "INSERT INTO translation_memory (target_lang, source, translation, source_lang, created_at, last_used) "
+            "VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT(target_lang, source) DO UPDATE SET "
+            "translation = excluded.translation, source_lang = excluded.source_lang, last_used = excluded.last_used",
+            (target_lang, key, translation, source_lang, now, now)
+        )
+        row = self.db.fetchone("SELECT id FROM translation_memory WHERE target_lang = ? AND source = ?",
+                               (target_lang, key))
+        with self._lock:
+            if target_lang in self._indexes:
+                self._index_entry(self._indexes[target_lang], row["id"], key, translation, source_lang)
+
+    def _find_similar(self, index: _LanguageIndex, sentence: str) -> Optional[int]:
+        items = shingles(sentence)
+        sentence_numbers = numbers(sentence)
+        sentence_words = words(sentence)
+        candidates = set()
+        for band_key in self.hasher.band_keys(self.hasher.signature(items)):
+            candidates |= index.buckets.get(band_key, set())
+        best_id, best_score = None, self.threshold
+        for entry_id in candidates:
+            entry_items, entry_numbers, entry_words, _, _ = index.entries[entry_id]
+            # Предложения с разными числами или словами (добавленное «not») похожи по буквам,
+            # но не взаимозаменяемы: допускаются только опечатки в словах
+            if entry_numbers != sentence_numbers or not same_words(entry_words, sentence_words):
+                continue
+            score = jaccard(items, entry_items)
+            if score >= best_score:
+                best_id, best_score = entry_id, score
+        return best_id
+
+    def _get_index(self, target_lang: str) -> _LanguageIndex:
+        index = self._indexes.get(target_lang)
+        if index is None:
+            index = _LanguageIndex()
+            rows = self.db.fetchall(
+                "SELECT id, source, translation, source_lang FROM translation_memory WHERE target_lang = ?",
+                (target_lang,)
+            )
+            for row in rows:
+                self._index_entry(index, row["id"], row["source"], row["translation"], row["source_lang"])
+            self._indexes[target_lang] = index
+        return index
+
+    def _index_entry(self, index: _LanguageIndex, entry_id: int, source: str, translation: str,
+                     source_lang: Optional[str]) -> None:
+        items = shingles(source)
+        index.entries[entry_id] = (items, numbers(source), words(source), translation, source_lang)
+        index.exact[source] = entry_id
+        for band_key in self.hasher.band_keys(self.hasher.signature(items)):
+            index.buckets.setdefault(band_key, set()).add(entry_id)
+
+    def _prune(self) -> None:
+        """Удаляет давно не использованные предложения сверх лимита."""
+        evicted = self.db.execute(
+            "DELETE FROM translation_memory WHERE id NOT IN "
+            "(SELECT id FROM translation_memory ORDER BY last_used DESC LIMIT ?)",
+            (self.max_entries,)
+        )
+        if evicted:
+            # Индексы перестраиваются из БД при следующем обращении
+            with self._lock:
+                self._indexes.clear()
+            logger.info(f"Память переводов: вытеснено {evicted} предложений.")
@@ -1,11 +1,16 @@
 # services/translator.py
 import httpx
-from typing import Any
+from typing import Any, Optional
 import config as cfg
 from utils.logger import setup_logger
+from utils.api_utils import RetryPolicy
+from services.credential_pool import Credential, get_credential_pool
 
 logger = setup_logger(__name__)
 
+# Ограничение DeepL на число параметров text в одном запросе
+MAX_TEXTS_PER_REQUEST = 50
+
 
 class TranslationError(Exception):
     """Кастомное исключение для ошибок перевода."""
@@ -17,13 +22,37 @@ class DeepLTranslator:
     def __init__(self):
         """Инициализирует переводчик и проверяет конфигурацию."""
         self.validate_translator_config()
+        self.credentials = get_credential_pool("deepl")
+        self.retry_policy = RetryPolicy(failover=self.credentials.can_failover)
+        self._client: Optional[httpx.Client] = None
+
+    @property
+    def client(self) -> httpx.Client:
+        """Постоянный HTTP-клиент: соединение с DeepL переиспользуется между запросами."""
+        if self._client is None:
+            self._client = httpx.Client(timeout=httpx.Timeout(30.0, connect=10.0))
+        return self._client
+
+    @staticmethod
+    def auth_headers(credential: Credential) -> dict:
+        """Returns the authorization header for a key of the pool."""
+        return {"Authorization": f"DeepL-Auth-Key {credential.key}"}
+
+    def warm_up(self) -> None:
+        """Устанавливает соединение с DeepL заранее бесплатным запросом /usage.
+
+        Raises:
+            httpx.HTTPError: If DeepL is unreachable.
+        """
+        usage_url = cfg.DEEPL_API_FREE_URL.rsplit("/", 1)[0] + "/usage"
+        self.client.get(usage_url, headers=self.auth_headers(self.credentials.acquire())).raise_for_status()
 
     @staticmethod
     def validate_translator_config():
         """Проверяет наличие необходимых настроек для работы переводчика.
         Raises:
             ValueError: If API key or URL is not set."""
-        if not cfg.DEEPL_API_KEY_FREE:
+        if not cfg.DEEPL_API_KEYS:
             raise ValueError("Не задан ключ API для DeepL.")
         if not cfg.DEEPL_API_FREE_URL:
             raise ValueError("Не задан URL API для DeepL.")
@@ -36,7 +65,25 @@ class DeepLTranslator:
 
         Returns:
             bool: True if supported, False otherwise."""
-        return target_lang in cfg.SUPPORTED_LANGUAGES_FREE.values()
+        return target_lang in cfg.SUPPORTED_LANGUAGES_FULL.values()
+
+    def _post(self, data: dict) -> httpx.Response:
+        """Выполняет HTTP-запрос к DeepL API со следующим ключом пула; ошибки статуса поднимаются для RetryPolicy.
+        Повтор после 429 или 456 уходит с другим ключом: ключ, упёршийся в лимит, пул ставит на паузу.
+        Args:
+            data (dict): Form data.
+
+        Returns:
+            httpx.Response: Successful response."""
+        credential = self.credentials.acquire()
+        response = self.client.post(cfg.DEEPL_API_FREE_URL, headers=self.auth_headers(credential), data=data)
+        try:
+            response.raise_for_status()
+        except httpx.HTTPStatusError as e:
+            # DeepL не сообщает остаток лимита в заголовках, поэтому пулу важны только ошибки
+            self.credentials.observe_response(credential, e.response)
+            raise
+        return response
 
     def translate(self, text: str, target_lang: str) -> str:
         """Переводит заданный текст на указанный язык.
@@ -49,28 +96,57 @@ class DeepLTranslator:
 
         Raises:
             TranslationError: If translation fails."""
-        if not text or not isinstance(text, str):
+        return self.translate_with_source(text, target_lang)[0]
+
+    def translate_with_source(self, text: str, target_lang: str) -> tuple:
+        """Переводит текст и возвращает язык оригинала, определённый DeepL.
+        Args:
+            text (str): Text to translate.
+            target_lang (str): Target language code.
+
+        Returns:
+            tuple[str, Optional[str]]: Translated text and detected source language code.
+
+        Raises:
+            TranslationError: If translation fails."""
+        return self.translate_batch([text], target_lang)[0]
+
+    def translate_batch(self, texts: list, target_lang: str) -> list:
+        """Переводит несколько текстов; DeepL принимает до 50 текстов в одном запросе.
+        Args:
+            texts (list[str]): Texts to translate.
+            target_lang (str): Target language code.
+
+        Returns:
+            list[tuple[str, Optional[str]]]: Translated text and detected source language for every input text.
+
+        Raises:
+            TranslationError: If translation fails."""
+        if not texts or not all(text and isinstance(text, str) for text in texts):
             raise ValueError("Некорректный текст для перевода.")
-        if len(text) > 10000:
+        if sum(len(text) for text in texts) > 10000:
             raise ValueError("Текст слишком длинный для перевода (максимум 10000 символов).")
         if not self.validate_language(target_lang):
             raise ValueError(f"Неподдерживаемый язык перевода: {target_lang}")
 
         try:
-            headers = {"Authorization": f"DeepL-Auth-Key {cfg.DEEPL_API_KEY_FREE}"}
-            data = {"text": text, "target_lang": target_lang}
-            response = httpx.post(cfg.DEEPL_API_FREE_URL, headers=headers, data=data)
-            response.raise_for_status()
-            json_response = response.json()
-            if "translations" not in json_response or not json_response["translations"]:
-                raise TranslationError("Ошибка при получении переведенного текста.")
-            translated_text = json_response["translations"][0]["text"]
+            results = []
+            for start in range(0, len(texts), MAX_TEXTS_PER_REQUEST):
+                batch = texts[start:start + MAX_TEXTS_PER_REQUEST]
+                data = {"text": batch, "target_lang": target_lang}
+                response = self.retry_policy.run_sync(self._post, data)
+                json_response = response.json()
+                translations = json_response.get("translations") or []
+                if len(translations) != len(batch):
+                    raise TranslationError("Ошибка при получении переведенного текста.")
+                results.extend((item["text"], item.get("detected_source_language")) for item in translations)
 
-            logger.info(f"Успешный перевод текста: '{text[:20]}...' -> '{translated_text[:20]}...'")
-            return translated_text
+            logger.info(f"Успешный перевод текста: '{texts[0][:20]}...' -> '{results[0][0][:20]}...' "
+                        f"({len(texts)} фрагм.)")
+            return results
         except httpx.HTTPError as e:
             logger.error(f"Ошибка HTTP при обращении к DeepL API: {str(e)}")
             raise TranslationError("Сервис перевода недоступен.")
         except Exception as e:
             logger.error(f"Неизвестная ошибка при переводе: {str(e)}")
-            raise TranslationError("Произошла ошибка при обработке перевода.")
\ No newline at end of file
+            raise TranslationError("Произошла ошибка при обработке перевода.")
@@ -0,0 +1,99 @@
+# services/user_preferences.py
+import time
+from collections import OrderedDict
+from typing import Optional
+import config as cfg
+from database.database import Database, get_database
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS user_preferences (
+    user_id INTEGER NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (user_id, key)
+);
+"""
+
+
+class UserPreferences:
+    """Настройки пользователей (язык перевода по умолчанию и т.п.), сохраняемые между перезапусками.
+
+    В отличие от `context.user_data`, переживают перезапуск бота. Прочитанные значения
+    кэшируются в памяти (не больше `cache_entries`, давно не использованные вытесняются),
+    чтобы не обращаться к БД на каждом сообщении.
+    """
+
+    def __init__(self, db: Optional[Database] = None, cache_entries: int = cfg.USER_CACHE_ENTRIES):
+        """Инициализирует хранилище и создаёт таблицу при необходимости.
+
+        Args:
+            db (Optional[Database]): Database instance. Defaults to the shared one.
+            cache_entries (int): Number of preferences kept in memory.
+        """
+        self.db = db or get_database()
+        self.db.executescript(SCHEMA)
+        self.cache_entries = cache_entries
+        self._cache: OrderedDict = OrderedDict()  # (user_id, key) -> value
+
+    def get(self, user_id: int, key: str, default: Optional[str] = None) -> Optional[str]:
+        """Returns a user's preference.
+
+        Args:
+            user_id (int): Telegram user ID.
+            key (str): Preference name.
+            default (Optional[str]): Value returned if the preference is not set.
+
+        Returns:
+            Optional[str]: Stored value or default.
+        """
+        cache_key = (user_id, key)
+        if cache_key not in self._cache:
+            row = self.db.fetchone("SELECT value FROM user_preferences WHERE user_id = ? AND key = ?",
+                                   (user_id, key))
+            self._remember(cache_key, row["value"] if row else None)
+        else:
+            self._cache.move_to_end(cache_key)
+        value = self._cache[cache_key]
+        return default if value is None else value
+
+    def set(self, user_id: int, key: str, value: str) -> None:
+        """Saves a user's preference.
+
+        Args:
+            user_id (int): Telegram user ID.
+            key (str): Preference name.
+            value (str): Value.
+        """
+        if self._cache.get((user_id, key)) == value:
+            return
+        self.db.execute(
+            "INSERT INTO user_preferences (user_id, key, value, updated_at) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(user_id, key) DO UPDATE SET value = excluded.value, updated_at = excluded.updated_at",
+            (user_id, key, value, time.time())
+        )
+        self._remember((user_id, key), value)
+
+    def _remember(self, cache_key: tuple, value: Optional[str]) -> None:
+        self._cache[cache_key] = value
+        self._cache.move_to_end(cache_key)
+        while len(self._cache) > self.cache_entries:
+            self._cache.popitem(last=False)
+
+
+_preferences: Optional[UserPreferences] = None
+
+
+def get_user_preferences() -> UserPreferences:
+    """Returns the shared UserPreferences instance, creating it on first use.
+
+    Returns:
+        UserPreferences: Shared preference storage.
+    """
+    global _preferences
+    if _preferences is None:
+        _preferences = UserPreferences()
+    return _preferences
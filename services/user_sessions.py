@@ -0,0 +1,179 @@
+# services/user_sessions.py
+import asyncio
+import json
+import sys
+import time
+from typing import Optional
+from telegram import Update
+from telegram.ext import Application, CallbackContext
+import config as cfg
+from database.database import Database, get_database
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS user_sessions (
+    user_id INTEGER PRIMARY KEY,
+    data TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+"""
+
+
+class UserSession:
+    """Состояние пользователя между сообщениями (замена словаря `context.user_data`).
+
+    Поля фиксированы через `__slots__`: у объекта нет `__dict__`, и сотни тысяч сессий занимают
+    в разы меньше памяти, чем словари. Строковые значения из небольшого набора (режимы, голоса,
+    модели) интернируются, поэтому все сессии ссылаются на одни и те же строки.
+    """
+
+    __slots__ = ("mode", "voice", "model", "pending_text", "image_preset", "image_count",
+                 "speech_formats", "last_seen", "loaded")
+    # Поля, сохраняемые в БД при вытеснении, и их значения по умолчанию
+    DEFAULTS = {"mode": None, "voice": None, "model": None, "pending_text": None,
+                "image_preset": None, "image_count": 1, "speech_formats": ()}
+    INTERNED = frozenset({"mode", "voice", "model", "image_preset"})
+
+    def __init__(self):
+        """Создаёт сессию со значениями по умолчанию."""
+        for name, value in self.DEFAULTS.items():
+            object.__setattr__(self, name, value)
+        self.last_seen = time.monotonic()
+        self.loaded = False
+
+    def __setattr__(self, name: str, value) -> None:
+        if name in self.INTERNED and isinstance(value, str):
+            value = sys.intern(value)
+        elif name == "speech_formats":
+            value = tuple(sys.intern(item) for item in value)
+        object.__setattr__(self, name, value)
+
+    def __repr__(self) -> str:
+        return f"UserSession({self.to_dict()})"
+
+    def to_dict(self) -> dict:
+        """Returns the fields that differ from the defaults.
+
+        Returns:
+            dict: Field name -> value (JSON-serializable).
+        """
+        data = {}
+        for name, default in self.DEFAULTS.items():
+            value = getattr(self, name)
+            if value != default:
+                data[name] = list(value) if isinstance(value, tuple) else value
+        return data
+
+    def update(self, data: dict) -> None:
+        """Restores fields saved by `to_dict`; unknown fields are ignored.
+
+        Args:
+            data (dict): Field name -> value.
+        """
+        for name, value in data.items():
+            if name in self.DEFAULTS:
+                setattr(self, name, value)
+
+
+class SessionStore:
+    """Хранит в SQLite сессии, вытесненные из памяти."""
+
+    def __init__(self, db: Optional[Database] = None):
+        """Инициализирует хранилище и создаёт таблицу при необходимости.
+
+        Args:
+            db (Optional[Database]): Database instance. Defaults to the shared one.
+        """
+        self.db = db or get_database()
+        self.db.executescript(SCHEMA)
+
+    def load(self, user_id: int) -> Optional[dict]:
+        """Returns saved session fields of a user, if any."""
+        row = self.db.fetchone("SELECT data FROM user_sessions WHERE user_id = ?", (user_id,))
+        return json.loads(row["data"]) if row else None
+
+    def save(self, user_id: int, session: UserSession) -> None:
+        """Saves a session; sessions without changes from the defaults are deleted instead."""
+        data = session.to_dict()
+        if not data:
+            self.db.execute("DELETE FROM user_sessions WHERE user_id = ?", (user_id,))
+            return
+        self.db.execute(
+            "INSERT INTO user_sessions (user_id, data, updated_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(user_id) DO UPDATE SET data = excluded.data, updated_at = excluded.updated_at",
+            (user_id, json.dumps(data, ensure_ascii=False), time.time())
+        )
+
+
+class SessionManager:
+    """Загружает сессии при первом сообщении и вытесняет неактивные в БД."""
+
+    def __init__(self, store: Optional[SessionStore] = None, idle_seconds: float = cfg.SESSION_IDLE_SECONDS):
+        """Initializes the manager.
+
+        Args:
+            store (Optional[SessionStore]): Persistent session storage. Created on first use by default.
+            idle_seconds (float): Inactivity time after which a session leaves memory.
+        """
+        self._store = store
+        self.idle_seconds = idle_seconds
+
+    @property
+    def store(self) -> SessionStore:
+        if self._store is None:
+            self._store = SessionStore()
+        return self._store
+
+    async def touch(self, update: Update, context: CallbackContext) -> None:
+        """Восстанавливает вытесненную сессию и отмечает активность; вызывается до всех обработчиков.
+
+        Args:
+            update (Update): Telegram update.
+            context (CallbackContext): Telegram context.
+        """
+        session = context.user_data
+        if not isinstance(session, UserSession):
+            return
+        if not session.loaded:
+            data = self.store.load(update.effective_user.id)
+            if data:
+                session.update(data)
+            session.loaded = True
+        session.last_seen = time.monotonic()
+
+    def evict_idle(self, application: Application, now: Optional[float] = None) -> int:
+        """Сохраняет неактивные сессии в БД и удаляет их из памяти.
+
+        Args:
+            application (Application): Telegram application holding the sessions.
+            now (Optional[float]): Current `time.monotonic()` value.
+
+        Returns:
+            int: Number of evicted sessions.
+        """
+        now = time.monotonic() if now is None else now
+        evicted = 0
+        for user_id, session in list(application.user_data.items()):
+            if now - session.last_seen < self.idle_seconds:
+                continue
+            if session.loaded:
+                self.store.save(user_id, session)
+            application.drop_user_data(user_id)
+            evicted += 1
+        if evicted:
+            logger.info(f"Вытеснено неактивных сессий: {evicted}, в памяти: {len(application.user_data)}.")
+        return evicted
+
+    def flush(self, application: Application) -> None:
+        """Сохраняет все сессии в БД (при остановке бота)."""
+        for user_id, session in list(application.user_data.items()):
+            if session.loaded:
+                self.store.save(user_id, session)
+
+    async def run_janitor(self, application: Application, interval: float = cfg.SESSION_SWEEP_INTERVAL) -> None:
+        """Периодически вытесняет неактивные сессии."""
+        while True:
+            await asyncio.sleep(interval)
+            self.evict_idle(application)
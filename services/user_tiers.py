@@ -0,0 +1,131 @@
+# services/user_tiers.py
+import time
+from collections import OrderedDict
+from typing import Optional
+import config as cfg
+from database.database import Database, get_database
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Уровни обслуживания
+FREE, PREMIUM = "free", "premium"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS user_tiers (
+    user_id INTEGER PRIMARY KEY,
+    tier TEXT NOT NULL,
+    expires_at REAL,
+    updated_at REAL NOT NULL
+);
+"""
+
+
+class UserTiers:
+    """Уровни обслуживания пользователей (free/premium), сохраняемые в БД.
+
+    Уровень определяет доступные языки, модели (cfg.TIERS) и приоритет запросов в очередях
+    к внешним API. Пользователи из PREMIUM_USER_IDS всегда премиум; остальным уровень выдаёт
+    администратор, при необходимости на ограниченный срок. Прочитанные записи кэшируются в памяти
+    (не больше `cache_entries`, давно не использованные вытесняются).
+    """
+
+    def __init__(self, db: Optional[Database] = None, cache_entries: int = cfg.USER_CACHE_ENTRIES):
+        """Инициализирует хранилище и создаёт таблицу при необходимости.
+
+        Args:
+            db (Optional[Database]): Database instance. Defaults to the shared one.
+            cache_entries (int): Number of users whose tier is kept in memory.
+        """
+        self.db = db or get_database()
+        self.db.executescript(SCHEMA)
+        self.cache_entries = cache_entries
+        self._cache: OrderedDict = OrderedDict()  # user_id -> (tier, expires_at)
+
+    def get(self, user_id: int, now: Optional[float] = None) -> str:
+        """Returns the user's current tier.
+
+        Args:
+            user_id (int): Telegram user ID.
+            now (Optional[float]): Current `time.time()` value.
+
+        Returns:
+            str: FREE or PREMIUM.
+        """
+        if user_id in cfg.PREMIUM_USER_IDS:
+            return PREMIUM
+        if user_id not in self._cache:
+            row = self.db.fetchone("SELECT tier, expires_at FROM user_tiers WHERE user_id = ?", (user_id,))
+            self._remember(user_id, (row["tier"], row["expires_at"]) if row else (FREE, None))
+        else:
+            self._cache.move_to_end(user_id)
+        tier, expires_at = self._cache[user_id]
+        now = time.time() if now is None else now
+        if expires_at is not None and expires_at <= now:
+            return FREE
+        return tier if tier in cfg.TIERS else FREE
+
+    def set(self, user_id: int, tier: str, days: Optional[float] = None) -> Optional[float]:
+        """Assigns a tier to the user.
+
+        Args:
+            user_id (int): Telegram user ID.
+            tier (str): FREE or PREMIUM.
+            days (Optional[float]): Duration in days; None means without expiration.
+
+        Returns:
+            Optional[float]: Expiration time (`time.time()` scale) or None.
+
+        Raises:
+            ValueError: If the tier is unknown.
+        """
+        if tier not in cfg.TIERS:
+            raise ValueError(f"Неизвестный уровень обслуживания: {tier}")
+        now = time.time()
+        expires_at = now + days * 86400 if days else None
+        self.db.execute(
+            "INSERT INTO user_tiers (user_id, tier, expires_at, updated_at) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(user_id) DO UPDATE SET tier = excluded.tier, expires_at = excluded.expires_at, "
+            "updated_at = excluded.updated_at",
+            (user_id, tier, expires_at, now)
+        )
+        self._remember(user_id, (tier, expires_at))
+        logger.info(f"Пользователю {user_id} назначен уровень {tier}" + (f" на {days:g} дн." if days else "."))
+        return expires_at
+
+    def _remember(self, user_id: int, entry: tuple) -> None:
+        self._cache[user_id] = entry
+        self._cache.move_to_end(user_id)
+        while len(self._cache) > self.cache_entries:
+            self._cache.popitem(last=False)
+
+    def features(self, user_id: int) -> dict:
+        """Returns the features of the user's tier (languages, models, priority) from cfg.TIERS."""
+        return cfg.TIERS[self.get(user_id)]
+
+    def priority(self, user_id: int) -> int:
+        """Returns the priority of the user's requests in upstream queues (0 is the most important)."""
+        return self.features(user_id)["priority"]
+
+    def languages(self, user_id: int) -> dict:
+        """Returns the translation languages available to the user (button label -> DeepL code)."""
+        return self.features(user_id)["languages"]
+
+    def is_premium(self, user_id: int) -> bool:
+        """Returns True if the user currently has the premium tier."""
+        return self.get(user_id) == PREMIUM
+
+
+_tiers: Optional[UserTiers] = None
+
+
+def get_user_tiers() -> UserTiers:
+    """Returns the shared UserTiers instance, creating it on first use.
+
+    Returns:
+        UserTiers: Shared tier storage.
+    """
+    global _tiers
+    if _tiers is None:
+        _tiers = UserTiers()
+    return _tiers
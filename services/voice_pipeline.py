@@ -0,0 +1,89 @@
+# services/voice_pipeline.py
+import asyncio
+from typing import Awaitable, Callable, Optional
+from services.speech_to_text import SpeechToTextService
+from services.translator import DeepLTranslator
+from services.voices import VoicesService
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Колбэк доставки: номер фрагмента, распознанный текст, перевод, озвученный перевод (Ogg/Opus или None)
+DeliverCallback = Callable[[int, str, str, Optional[bytes]], Awaitable[None]]
+
+# Маркер конца потока между стадиями
+_END = object()
+
+
+class VoiceTranslationPipeline:
+    """Конвейер «распознавание → перевод → озвучивание» с перекрывающимися стадиями.
+
+    Фрагменты аудио проходят три стадии, связанные очередями: пока фрагмент N озвучивается,
+    фрагмент N+1 уже распознаётся или переводится. Итоговая задержка близка к самой медленной
+    стадии, а не к сумме всех трёх.
+    """
+
+    def __init__(self, speech_service: SpeechToTextService, translator: DeepLTranslator,
+                 voice_service: VoicesService, queue_size: int = 2):
+        """Initializes the pipeline.
+
+        Args:
+            speech_service (SpeechToTextService): Whisper transcription service.
+            translator (DeepLTranslator): DeepL translation service.
+            voice_service (VoicesService): OpenAI TTS service.
+            queue_size (int): Max number of segments buffered between stages.
+        """
+        self.speech_service = speech_service
+        self.translator = translator
+        self.voice_service = voice_service
+        self.queue_size = queue_size
+
+    async def run(self, segments: list, target_lang: str, voice: str, deliver: DeliverCallback,
+                  tts_model: str = "tts-1") -> None:
+        """Runs all segments through the three stages and delivers results in order.
+
+        Args:
+            segments (list[str]): Audio segment paths in playback order.
+            target_lang (str): DeepL target language code.
+            voice (str): TTS voice.
+            deliver (DeliverCallback): Coroutine called for every processed segment.
+            tts_model (str, optional): The TTS model. Defaults to "tts-1".
+        """
+        transcribed = asyncio.Queue(maxsize=self.queue_size)
+        translated = asyncio.Queue(maxsize=self.queue_size)
+        # TaskGroup отменяет остальные стадии, если одна из них завершилась ошибкой
+        try:
+            async with asyncio.TaskGroup() as group:
+                group.create_task(self._transcribe_stage(segments, transcribed))
+                group.create_task(self._translate_stage(transcribed, translated, target_lang))
+                group.create_task(self._synthesize_stage(translated, voice, deliver, tts_model))
+        except ExceptionGroup as e:
+            # Пробрасываем исходную ошибку стадии, чтобы вызывающий код обработал исключение сервиса
+            raise e.exceptions[0]
+
+    async def _transcribe_stage(self, segments: list, output: asyncio.Queue) -> None:
+        for index, path in enumerate(segments):
+            text = await asyncio.to_thread(self.speech_service.transcribe_audio, path)
+            logger.debug(f"Фрагмент {index} распознан.")
+            await output.put((index, text))
+        await output.put(_END)
+
+    async def _translate_stage(self, source: asyncio.Queue, output: asyncio.Queue, target_lang: str) -> None:
+        while (item := await source.get()) is not _END:
+            index, text = item
+            translation = ""
+            if text.strip():
+                translation = await asyncio.to_thread(self.translator.translate, text, target_lang)
+            logger.debug(f"Фрагмент {index} переведён.")
+            await output.put((index, text, translation))
+        await output.put(_END)
+
+    async def _synthesize_stage(self, source: asyncio.Queue, voice: str, deliver: DeliverCallback,
+                                tts_model: str) -> None:
+        while (item := await source.get()) is not _END:
+            index, text, translation = item
+            audio = None
+            if translation.strip():
+                audio = await asyncio.to_thread(self.voice_service.synthesize, translation, voice,
+                                                model=tts_model, response_format="opus")
+            await deliver(index, text, translation, audio)
@@ -1,9 +1,9 @@
 # services/voices.py
-import openai
 import uuid
 from utils.logger import setup_logger
-from utils.api_utils import sync_openai_error_handler
+from utils.api_utils import async_openai_error_handler, sync_openai_error_handler
 import config as cfg
+from services.credential_pool import OPENAI_RETRY_POLICY, openai_client, async_openai_client
 
 logger = setup_logger(__name__)
 
@@ -16,48 +16,102 @@ class VoicesService:
 
     def __init__(self):
         self.validate_voices_config()
-        openai.api_key = cfg.OPENAI_API_KEY
 
     @staticmethod
     def validate_voices_config():
-        if not openai.api_key:
+        if not cfg.OPENAI_API_KEYS:
             raise ValueError("Не задан API-ключ OpenAI.")
 
-    @sync_openai_error_handler
-    def generate_audio(self, text: str, voice: str, audio_file_path: str = None, model: str = "tts-1") -> str:
-        """Generates an audio file from text using OpenAI TTS.
+    @staticmethod
+    def validate_text(text: str) -> None:
+        """Checks the text before synthesis.
+
+        Raises:
+            ValueError: If the text is empty or too long.
+        """
+        if not text or not isinstance(text, str):
+            raise ValueError("Текст для озвучивания должен быть строкой и не пустым.")
+        if len(text) > 4090:
+            raise ValueError("Текст для озвучивания не должен превышать 4090 символов.")
+
+    @sync_openai_error_handler(error_cls=VoicesError, policy=OPENAI_RETRY_POLICY)
+    def synthesize(self, text: str, voice: str, model: str = "tts-1", response_format: str = "mp3") -> bytes:
+        """Synthesizes speech from text using OpenAI TTS and returns the audio bytes.
 
         Args:
             text (str): The text to convert.
             voice (str): The voice identifier.
-            audio_file_path (str, optional): Full path where to save the audio file.
-                                             If not provided, a random filename is generated.
             model (str, optional): The TTS model. Defaults to "tts-1".
+            response_format (str, optional): Audio format, e.g. "mp3" or "opus". Defaults to "mp3".
 
         Returns:
-            str: Filename of the generated audio.
+            bytes: Audio content.
 
         Raises:
             VoicesError: If generation fails.
         """
-        if not text or not isinstance(text, str):
-            raise ValueError("Текст для озвучивания должен быть строкой и не пустым.")
-        if len(text) > 4090:
-            raise ValueError("Текст для озвучивания не должен превышать 4090 символов.")
-
-        response = openai.audio.speech.create(
+        self.validate_text(text)
+        response = openai_client().audio.speech.create(
             model=model,
             voice=voice,
             speed=1.0,
-            input=text
+            input=text,
+            response_format=response_format
         )
         if not hasattr(response, "content"):
             raise VoicesError("Ошибка: не получен контент аудио.")
+        return response.content
+
+    @async_openai_error_handler(error_cls=VoicesError, policy=OPENAI_RETRY_POLICY)
+    async def synthesize_async(self, text: str, voice: str, model: str = "tts-1",
+                               response_format: str = "mp3") -> bytes:
+        """Synthesizes speech without blocking the event loop; cancelling the task aborts the request.
+
+        Args:
+            text (str): The text to convert.
+            voice (str): The voice identifier.
+            model (str, optional): The TTS model. Defaults to "tts-1".
+            response_format (str, optional): Audio format, e.g. "mp3" or "opus". Defaults to "mp3".
+
+        Returns:
+            bytes: Audio content.
+
+        Raises:
+            VoicesError: If generation fails.
+        """
+        self.validate_text(text)
+        # Асинхронный клиент: отмена задачи обрывает HTTP-запрос
+        response = await async_openai_client().audio.speech.create(
+            model=model,
+            voice=voice,
+            speed=1.0,
+            input=text,
+            response_format=response_format
+        )
+        return response.content
+
+    def generate_audio(self, text: str, voice: str, audio_file_path: str = None, model: str = "tts-1") -> str:
+        """Generates an audio file from text using OpenAI TTS.
+
+        Args:
+            text (str): The text to convert.
+            voice (str): The voice identifier.
+            audio_file_path (str, optional): Full path where to save the audio file.
+                                             If not provided, a random filename is generated.
+            model (str, optional): The TTS model. Defaults to "tts-1".
+
+        Returns:
+            str: Filename of the generated audio.
+
+        Raises:
+            VoicesError: If generation fails.
+        """
+        content = self.synthesize(text, voice, model=model)
         if audio_file_path is None:
             filename = f"audio_{uuid.uuid4()}.mp3"
         else:
             filename = audio_file_path
         with open(filename, "wb") as audio_file:
-            audio_file.write(response.content)
+            audio_file.write(content)
         logger.info(f"Аудиофайл {filename} успешно создан.")
         return filename
@@ -0,0 +1,121 @@
+# tests/test_api_utils.py
+import asyncio
+import unittest
+from unittest.mock import patch
+import httpx
+from utils.api_utils import (RetryPolicy, is_retryable_error, get_retry_after, parse_duration,
+                             sync_openai_error_handler, async_openai_error_handler)
+
+
+class ServiceError(Exception):
+    pass
+
+
+def http_error(status: int, headers: dict = None) -> httpx.HTTPStatusError:
+    request = httpx.Request("POST", "https://api.example.com")
+    response = httpx.Response(status, headers=headers or {}, request=request)
+    return httpx.HTTPStatusError("error", request=request, response=response)
+
+
+class TestRetryClassification(unittest.TestCase):
+    def test_retryable_statuses(self):
+        """Тест классификации временных ошибок."""
+        self.assertTrue(is_retryable_error(http_error(429)))
+        self.assertTrue(is_retryable_error(http_error(503)))
+        self.assertTrue(is_retryable_error(httpx.ConnectTimeout("timeout")))
+        self.assertFalse(is_retryable_error(http_error(400)))
+        self.assertFalse(is_retryable_error(ValueError("bad input")))
+
+    def test_retry_after_header(self):
+        """Тест чтения заголовков Retry-After."""
+        self.assertEqual(get_retry_after(http_error(429, {"retry-after": "3"})), 3.0)
+        self.assertEqual(get_retry_after(http_error(429, {"retry-after-ms": "1500"})), 1.5)
+        self.assertIsNone(get_retry_after(http_error(429)))
+
+    def test_rate_limit_durations(self):
+        """Тест разбора длительностей из заголовков x-ratelimit-reset-*."""
+        self.assertEqual(parse_duration("6m0s"), 360.0)
+        self.assertEqual(parse_duration("20ms"), 0.02)
+        self.assertEqual(parse_duration("1h2m"), 3720.0)
+        self.assertIsNone(parse_duration("soon"))
+
+    def test_delay_honors_retry_after(self):
+        """Тест: задержка не меньше значения Retry-After."""
+        policy = RetryPolicy(base_delay=0.5)
+        delay = policy.compute_delay(1, http_error(429, {"retry-after": "2"}))
+        self.assertGreaterEqual(delay, 2.0)
+        self.assertLessEqual(delay, 2.5)
+
+
+class TestErrorHandlers(unittest.TestCase):
+    @patch("utils.api_utils.time.sleep")
+    def test_retries_then_succeeds(self, mock_sleep):
+        """Тест повторной попытки после временной ошибки."""
+        calls = []
+
+        @sync_openai_error_handler(error_cls=ServiceError, policy=RetryPolicy(max_attempts=3))
+        def flaky():
+            calls.append(1)
+            if len(calls) < 2:
+                raise http_error(503)
+            return "ok"
+
+        self.assertEqual(flaky(), "ok")
+        self.assertEqual(len(calls), 2)
+        mock_sleep.assert_called_once()
+
+    @patch("utils.api_utils.time.sleep")
+    def test_final_failure_mapped(self, mock_sleep):
+        """Тест преобразования итоговой ошибки в исключение сервиса."""
+        @sync_openai_error_handler(error_cls=ServiceError, policy=RetryPolicy(max_attempts=2))
+        def failing():
+            raise http_error(500)
+
+        with self.assertRaises(ServiceError):
+            failing()
+        self.assertEqual(mock_sleep.call_count, 1)
+
+    def test_validation_error_not_mapped(self):
+        """Тест: ошибки валидации не повторяются и не преобразуются."""
+        @sync_openai_error_handler(error_cls=ServiceError)
+        def invalid():
+            raise ValueError("bad input")
+
+        with self.assertRaises(ValueError):
+            invalid()
+
+    @patch("utils.api_utils.time.sleep")
+    def test_sync_retry_never_blocks_event_loop(self, mock_sleep):
+        """Тест: синхронный сервис, вызванный прямо из корутины, не спит в цикле событий, а в потоке повторяет."""
+        calls = []
+
+        @sync_openai_error_handler(error_cls=ServiceError, policy=RetryPolicy(max_attempts=3))
+        def rate_limited():
+            calls.append(1)
+            if len(calls) < 3:
+                raise http_error(429)
+            return "ok"
+
+        async def handler():
+            with self.assertRaises(ServiceError):
+                rate_limited()
+            return await asyncio.to_thread(rate_limited)
+
+        self.assertEqual(asyncio.run(handler()), "ok")
+        self.assertEqual(len(calls), 3)
+        mock_sleep.assert_called_once()
+
+    def test_deadline_stops_retries(self):
+        """Тест: повтор не выполняется, если задержка выходит за общий бюджет."""
+        policy = RetryPolicy(max_attempts=5, deadline=1.0)
+
+        @async_openai_error_handler(error_cls=ServiceError, policy=policy)
+        async def rate_limited():
+            raise http_error(429, {"retry-after": "30"})
+
+        with self.assertRaises(ServiceError):
+            asyncio.run(rate_limited())
+
+
+if __name__ == "__main__":
+    unittest.main()
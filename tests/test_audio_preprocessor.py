@@ -0,0 +1,69 @@
+# tests/test_audio_preprocessor.py
+import asyncio
+import sys
+import unittest
+from unittest.mock import patch, MagicMock
+from services.audio_preprocessor import (build_transcode_args, build_extract_args, pipe_through, probe_duration,
+                                         transcode_for_whisper, AudioPreprocessingError)
+
+
+async def chunks_of(data: bytes, size: int = 4):
+    for start in range(0, len(data), size):
+        await asyncio.sleep(0)
+        yield data[start:start + size]
+
+
+class TestAudioPreprocessor(unittest.TestCase):
+    def test_transcode_args(self):
+        """Тест параметров ffmpeg: моно, 16 кГц, Opus, удаление тишины."""
+        args = build_transcode_args("ffmpeg", "in.mp3", "out.ogg", 16000, "24k", trim_silence=True)
+        self.assertEqual(args[0], "ffmpeg")
+        self.assertEqual(args[args.index("-ac") + 1], "1")
+        self.assertEqual(args[args.index("-ar") + 1], "16000")
+        self.assertEqual(args[args.index("-c:a") + 1], "libopus")
+        self.assertIn("-af", args)
+        self.assertEqual(args[-1], "out.ogg")
+
+    def test_transcode_args_without_trimming(self):
+        """Тест: без удаления тишины фильтр не добавляется."""
+        args = build_transcode_args("ffmpeg", "in.mp3", "out.ogg", trim_silence=False)
+        self.assertNotIn("-af", args)
+
+    @patch("services.audio_preprocessor.subprocess.run")
+    def test_probe_duration(self, mock_run):
+        """Тест получения длительности через ffprobe."""
+        mock_run.return_value = MagicMock(returncode=0, stdout=b"12.5\n")
+        self.assertEqual(probe_duration("ffprobe", "in.mp3"), 12.5)
+
+    @patch("services.audio_preprocessor.subprocess.run")
+    def test_transcode_failure(self, mock_run):
+        """Тест ошибки ffmpeg."""
+        mock_run.return_value = MagicMock(returncode=1, stderr=b"Invalid data found")
+        with self.assertRaises(AudioPreprocessingError):
+            transcode_for_whisper("ffmpeg", "in.mp3", "out.ogg", 16000, "24k", True)
+
+    def test_extract_args(self):
+        """Тест: потоковое извлечение читает stdin и пишет Ogg в stdout с ограничением длительности."""
+        args = build_extract_args("ffmpeg", max_seconds=5400)
+        self.assertEqual(args[args.index("-i") + 1], "pipe:0")
+        self.assertIn("-vn", args)
+        self.assertEqual(args[args.index("-f") + 1], "ogg")
+        self.assertEqual(args[args.index("-t") + 1], "5400")
+        self.assertEqual(args[-1], "pipe:1")
+
+    def test_pipe_through(self):
+        """Тест: данные проходят через процесс из потока без временных файлов."""
+        args = [sys.executable, "-c", "import sys; sys.stdout.buffer.write(sys.stdin.buffer.read().upper())"]
+        output = asyncio.run(pipe_through(args, chunks_of(b"video stream bytes")))
+        self.assertEqual(output, b"VIDEO STREAM BYTES")
+
+    def test_pipe_through_failure(self):
+        """Тест: ошибка процесса (например, контейнер не читается из канала) превращается в AudioPreprocessingError."""
+        args = [sys.executable, "-c", "import sys; sys.stderr.write('moov atom not found'); sys.exit(1)"]
+        with self.assertRaises(AudioPreprocessingError) as error:
+            asyncio.run(pipe_through(args, chunks_of(b"x" * 1024 * 1024, 64 * 1024)))
+        self.assertIn("moov atom not found", str(error.exception))
+
+
+if __name__ == "__main__":
+    unittest.main()
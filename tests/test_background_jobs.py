@@ -0,0 +1,176 @@
+# tests/test_background_jobs.py
+import asyncio
+import os
+import tempfile
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+from database.database import Database
+from services.background_jobs import BackgroundJobQueue, JobError
+from services.user_tiers import PREMIUM, UserTiers, get_user_tiers
+
+
+def make_update(chat_id: int = 1, message_id: int = 10, user_id: int = None):
+    update = MagicMock()
+    update.effective_chat.id = chat_id
+    update.effective_user.id = chat_id if user_id is None else user_id
+    update.message.message_id = message_id
+    update.message.reply_text = AsyncMock(return_value=MagicMock(message_id=message_id + 1))
+    return update
+
+
+class TestBackgroundJobQueue(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db = Database(os.path.join(self.tmp.name, "jobs.db"))
+        self.bot = MagicMock()
+        self.bot.edit_message_text = AsyncMock()
+        tiers = patch("services.user_tiers._tiers", UserTiers(self.db))
+        tiers.start()
+        self.addCleanup(tiers.stop)
+        self.queue = BackgroundJobQueue(db=self.db, workers=2)
+
+    async def asyncTearDown(self):
+        await self.queue.stop()
+        self.db.close()
+        self.tmp.cleanup()
+
+    def status(self, job_id: int) -> str:
+        return self.db.fetchone("SELECT status FROM background_jobs WHERE id = ?", (job_id,))["status"]
+
+    async def test_job_executed(self):
+        """Тест выполнения задачи и обновления статусного сообщения."""
+        done = asyncio.Event()
+
+        async def executor(job):
+            await job.report("работаю")
+            self.assertEqual(job.payload, {"value": 42})
+            done.set()
+
+        self.queue.register("test", executor)
+        await self.queue.start(self.bot)
+        job_id = await self.queue.submit("test", make_update(), {"value": 42})
+        await asyncio.wait_for(done.wait(), 1)
+        await asyncio.wait_for(self.queue._queue.join(), 1)
+        self.assertEqual(self.status(job_id), "done")
+        self.bot.edit_message_text.assert_awaited()
+
+    async def test_job_error_reported(self):
+        """Тест: JobError помечает задачу как failed и показывает текст пользователю."""
+        async def executor(job):
+            raise JobError("❌ Ошибка")
+
+        self.queue.register("test", executor)
+        await self.queue.start(self.bot)
+        job_id = await self.queue.submit("test", make_update(), {})
+        await asyncio.wait_for(self.queue._queue.join(), 1)
+        self.assertEqual(self.status(job_id), "failed")
+        self.assertIn("❌ Ошибка", self.bot.edit_message_text.await_args.kwargs["text"])
+
+    async def test_cancel_running_job(self):
+        """Тест отмены выполняющейся задачи командой /cancel."""
+        started = asyncio.Event()
+
+        async def executor(job):
+            started.set()
+            await asyncio.sleep(10)
+
+        self.queue.register("test", executor)
+        await self.queue.start(self.bot)
+        job_id = await self.queue.submit("test", make_update(chat_id=5), {})
+        await asyncio.wait_for(started.wait(), 1)
+        self.assertEqual(self.queue.cancel_user(5, 5), 1)
+        await asyncio.wait_for(self.queue._queue.join(), 1)
+        self.assertEqual(self.status(job_id), "cancelled")
+
+    async def test_cancel_keeps_other_users_and_kinds(self):
+        """Тест: /cancel в диалоге отменяет задачи этого пользователя и этого диалога, остальные задачи группы остаются."""
+        async def executor(job):
+            await asyncio.sleep(10)
+
+        self.queue.register("speech", executor)
+        self.queue.register("image", executor)
+        await self.queue.start(self.bot)
+        own_speech = await self.queue.submit("speech", make_update(chat_id=-5, user_id=1), {})
+        own_image = await self.queue.submit("image", make_update(chat_id=-5, user_id=1), {})
+        neighbour = await self.queue.submit("speech", make_update(chat_id=-5, user_id=2), {})
+        self.assertEqual(self.queue.cancel_user(-5, 1, "speech"), 1)
+        self.assertEqual([self.status(job_id) == "cancelled" for job_id in (own_speech, own_image, neighbour)],
+                         [True, False, False])
+        self.assertEqual(self.queue.cancel_user(-5, 1), 1)
+        self.assertNotEqual(self.status(neighbour), "cancelled")
+
+    async def test_drain_waits_for_running_job(self):
+        """Тест плавной остановки: выполняющаяся задача завершается, новая остаётся в очереди."""
+        started = asyncio.Event()
+        release = asyncio.Event()
+
+        async def executor(job):
+            started.set()
+            await release.wait()
+
+        self.queue.register("test", executor)
+        await self.queue.start(self.bot)
+        running_id = await self.queue.submit("test", make_update(), {})
+        await asyncio.wait_for(started.wait(), 1)
+        drain = asyncio.create_task(self.queue.drain(timeout=1))
+        await asyncio.sleep(0)
+        pending_id = await self.queue.submit("test", make_update(), {})
+        release.set()
+        await asyncio.wait_for(drain, 2)
+        self.assertEqual(self.status(running_id), "done")
+        self.assertEqual(self.status(pending_id), "pending")
+
+    async def test_interrupted_job_resumed_after_restart(self):
+        """Тест: задача, прерванная перезапуском, выполняется при следующем старте."""
+        job_id = self.db.insert(
+            "INSERT INTO background_jobs (kind, chat_id, payload, status, created_at, updated_at) "
+            "VALUES ('test', 1, '{}', 'running', 0, 0)"
+        )
+        executed = asyncio.Event()
+
+        async def executor(job):
+            executed.set()
+
+        self.queue.register("test", executor)
+        await self.queue.start(self.bot)
+        await asyncio.wait_for(executed.wait(), 1)
+        await asyncio.wait_for(self.queue._queue.join(), 1)
+        self.assertEqual(self.status(job_id), "done")
+
+
+    async def test_premium_jobs_run_first(self):
+        """Тест: когда исполнители заняты, задача премиум-пользователя обгоняет ранее поставленные бесплатные."""
+        self.queue.workers = 1
+        self.queue.tiers.set(3, PREMIUM)
+        release = asyncio.Event()
+        order = []
+
+        async def executor(job):
+            order.append(job.user_id)
+            await release.wait()
+
+        self.queue.register("test", executor)
+        await self.queue.start(self.bot)
+        await self.queue.submit("test", make_update(chat_id=1), {})
+        await asyncio.sleep(0.01)
+        for user_id in (2, 4, 3):
+            await self.queue.submit("test", make_update(chat_id=user_id), {})
+        release.set()
+        await asyncio.wait_for(self.queue._queue.join(), 1)
+        self.assertEqual(order, [1, 3, 2, 4])
+
+    async def test_tier_change_applies_to_next_job(self):
+        """Тест: уровень, выданный через общее хранилище (/tier), сразу меняет приоритет новых задач."""
+        def priority(job_id):
+            return self.db.fetchone("SELECT priority FROM background_jobs WHERE id = ?", (job_id,))["priority"]
+
+        self.queue.register("test", AsyncMock())
+        await self.queue.start(self.bot)
+        first = await self.queue.submit("test", make_update(chat_id=6), {})
+        get_user_tiers().set(6, PREMIUM)
+        second = await self.queue.submit("test", make_update(chat_id=6), {})
+        self.assertEqual((priority(first), priority(second)), (1, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+# tests/test_credential_pool.py
+import unittest
+from unittest.mock import patch
+import httpx
+from services.credential_pool import CredentialPool
+from utils.api_utils import RetryPolicy
+
+
+def http_error(status: int, headers: dict = None) -> httpx.HTTPStatusError:
+    request = httpx.Request("POST", "https://api.example.com")
+    response = httpx.Response(status, headers=headers or {}, request=request)
+    return httpx.HTTPStatusError("error", request=request, response=response)
+
+
+class TestCredentialPool(unittest.TestCase):
+    def setUp(self):
+        self.pool = CredentialPool("openai", ["key-a", "key-b", "key-c"], weights=[2], cooldown=20,
+                                   disable_seconds=3600)
+        self.a, self.b, self.c = self.pool.credentials
+
+    def test_weighted_round_robin(self):
+        """Тест: ключи чередуются пропорционально весам, ключ с большим весом не идёт подряд."""
+        names = [self.pool.acquire(now=0).name for _ in range(8)]
+        self.assertEqual(names, ["openai#1", "openai#2", "openai#3", "openai#1"] * 2)
+        self.assertEqual([item["requests"] for item in self.pool.stats()], [4, 2, 2])
+
+    def test_rate_limit_headers_and_cooldown(self):
+        """Тест: исчерпанный по заголовкам или получивший 429 ключ отдыхает до сброса лимита."""
+        self.pool.observe(self.a, 200, {"x-ratelimit-remaining-requests": "0",
+                                        "x-ratelimit-reset-requests": "1m0s",
+                                        "x-ratelimit-remaining-tokens": "5000"}, now=0)
+        self.assertEqual((self.a.remaining_requests, self.a.remaining_tokens), (0, 5000))
+        self.pool.observe(self.b, 429, {"retry-after": "5"}, now=0)
+        self.assertEqual({self.pool.acquire(now=1).name for _ in range(3)}, {"openai#3"})
+        self.assertEqual(self.pool.acquire(now=6).name, "openai#2")
+        self.assertEqual(self.pool.stats()[1]["rate_limited"], 1)
+        # Все ключи на паузе: берётся тот, что освободится раньше
+        self.pool.observe(self.b, 429, {}, now=6)
+        self.pool.observe(self.c, 429, {"retry-after": "10"}, now=6)
+        self.assertEqual(self.pool.acquire(now=7).name, "openai#3")
+
+    def test_rejected_key_disabled(self):
+        """Тест: недействительный ключ и исчерпанная квота исключают ключ из пула надолго."""
+        self.pool.observe(self.a, 401, now=0)
+        self.pool.observe(self.b, 429, body='{"error": {"code": "insufficient_quota"}}', now=0)
+        self.assertEqual(self.a.cooldown_until, 3600)
+        self.assertEqual(self.b.cooldown_until, 3600)
+        self.assertEqual(self.pool.stats()[0]["errors"], 1)
+
+    @patch("utils.api_utils.time.sleep")
+    def test_failover_retries_with_next_key(self, mock_sleep):
+        """Тест: после 429 запрос сразу повторяется с другим ключом, без ожидания Retry-After."""
+        pool = CredentialPool("deepl", ["key-a", "key-b"])
+        used = []
+
+        def request():
+            credential = pool.acquire()
+            used.append(credential.name)
+            if credential.name == "deepl#1":
+                pool.observe(credential, 429, {"retry-after": "30"})
+                raise http_error(429, {"retry-after": "30"})
+            return "ok"
+
+        self.assertEqual(RetryPolicy(failover=pool.can_failover).run_sync(request), "ok")
+        self.assertEqual(used, ["deepl#1", "deepl#2"])
+        mock_sleep.assert_called_once_with(0.0)
+        self.assertFalse(pool.can_failover(http_error(400)))
+
+
+if __name__ == "__main__":
+    unittest.main()
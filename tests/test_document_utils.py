@@ -0,0 +1,46 @@
+# tests/test_document_utils.py
+import io
+import unittest
+from utils.document_utils import iter_batches, iter_blocks, split_long_block
+
+SRT = ("1\r\n00:00:01,000 --> 00:00:02,500\r\nHello there.\r\nHow are you?\r\n\r\n"
+       "2\r\n00:00:03,000 --> 00:00:04,000\r\nGoodbye!\r\n")
+MARKDOWN = "# Title\n\nSome text.\n\n```python\nprint('keep me')\n```\nMore text.\n"
+
+
+def read(text: str):
+    return io.StringIO(text, newline="")
+
+
+class TestDocumentUtils(unittest.TestCase):
+    def test_srt_keeps_numbers_and_timings(self):
+        """Тест: в SRT переводятся только реплики, документ собирается без изменений."""
+        blocks = list(iter_blocks(read(SRT), "srt"))
+        self.assertEqual([text for text, translatable in blocks if translatable],
+                         ["Hello there.\r\nHow are you?", "Goodbye!"])
+        self.assertEqual("".join(text for text, _ in blocks), SRT)
+
+    def test_markdown_code_is_not_translated(self):
+        """Тест: блоки кода Markdown не отправляются на перевод."""
+        blocks = list(iter_blocks(read(MARKDOWN), "md"))
+        self.assertEqual([text for text, translatable in blocks if translatable],
+                         ["# Title", "Some text.", "More text."])
+
+    def test_batches_respect_limit_and_order(self):
+        """Тест: пакеты не превышают лимит символов, длинные абзацы делятся по предложениям."""
+        text = "First sentence here. Second sentence here. Third one.\n\nShort.\n"
+        batches = list(iter_batches(iter_blocks(read(text), "txt"), max_chars=25))
+        for batch in batches:
+            self.assertLessEqual(sum(len(t) for t, translatable in batch if translatable), 25)
+        self.assertEqual("".join(t for batch in batches for t, _ in batch), text)
+
+    def test_split_long_sentence(self):
+        """Тест: предложение длиннее лимита режется по пробелам."""
+        text = "word " * 20 + "end."
+        chunks = list(split_long_block(text, 30))
+        self.assertTrue(all(len(chunk) <= 30 for chunk, translatable in chunks if translatable))
+        self.assertEqual("".join(chunk for chunk, _ in chunks), text)
+
+
+if __name__ == "__main__":
+    unittest.main()
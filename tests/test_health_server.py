@@ -0,0 +1,59 @@
+# tests/test_health_server.py
+import asyncio
+import json
+import unittest
+from services.health_server import HealthServer
+
+
+class TestHealthServer(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.health = HealthServer("127.0.0.1", 0)
+        self.server = await asyncio.start_server(self.health._handle, "127.0.0.1", 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def asyncTearDown(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def get(self, path: str):
+        reader, writer = await asyncio.open_connection("127.0.0.1", self.port)
+        writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+        response = await reader.read()
+        writer.close()
+        head, body = response.split(b"\r\n\r\n", 1)
+        return int(head.split()[1]), json.loads(body)
+
+    async def test_readiness_lifecycle(self):
+        """Тест: readiness недоступен до запуска и во время остановки, liveness доступен всегда."""
+        self.assertEqual((await self.get("/readyz"))[0], 503)
+        self.assertEqual((await self.get("/healthz"))[0], 200)
+        self.health.ready = True
+        self.assertEqual((await self.get("/readyz"))[0], 200)
+        self.health.draining = True
+        code, body = await self.get("/readyz")
+        self.assertEqual(code, 503)
+        self.assertEqual(body["status"], "draining")
+
+    async def test_registered_report(self):
+        """Тест: диагностический отчёт доступен по зарегистрированному пути."""
+        self.health.reports["/debug/loop"] = lambda: {"stalls": 3}
+        self.assertEqual(await self.get("/debug/loop"), (200, {"stalls": 3}))
+        self.assertEqual((await self.get("/debug/other"))[0], 404)
+
+    async def test_upstream_degraded(self):
+        """Тест: недоступный внешний API отражается в статусе, но не снимает готовность."""
+        self.health.ready = True
+        self.health.set_upstream("openai", True)
+        self.health.set_upstream("deepl", False, "ConnectError()")
+        code, body = await self.get("/readyz?verbose=1")
+        self.assertEqual(code, 200)
+        self.assertEqual(body["status"], "degraded")
+        self.assertFalse(body["upstreams"]["deepl"]["healthy"])
+
+    async def test_unknown_path(self):
+        """Тест неизвестного пути."""
+        self.assertEqual((await self.get("/metrics"))[0], 404)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,46 @@
+# tests/test_image_cache.py
+import os
+import tempfile
+import unittest
+from database.database import Database
+from services.image_cache import ImageCache
+
+
+class TestImageCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db = Database(os.path.join(self.tmp.name, "test.db"))
+        self.cache = ImageCache(db=self.db, cache_dir=os.path.join(self.tmp.name, "images"), max_bytes=10)
+
+    def tearDown(self):
+        self.db.close()
+        self.tmp.cleanup()
+
+    def test_prompt_normalization(self):
+        """Тест: описания, отличающиеся регистром, пробелами и точкой, дают один ключ."""
+        key1 = ImageCache.make_key("A cat  on the Moon.", "dall-e-3", "1024x1024", "standard")
+        key2 = ImageCache.make_key("a cat on the moon", "dall-e-3", "1024x1024", "standard")
+        key3 = ImageCache.make_key("a cat on the moon", "dall-e-3", "1024x1024", "hd")
+        self.assertEqual(key1, key2)
+        self.assertNotEqual(key1, key3)
+
+    def test_file_id_roundtrip(self):
+        """Тест сохранения и получения file_id."""
+        key = ImageCache.make_key("sunset", "dall-e-3", "1024x1024", "standard")
+        self.assertIsNone(self.cache.get_file_id(key))
+        self.cache.store_file_id(key, "sunset", "FILE_ID")
+        self.assertEqual(self.cache.get_file_id(key), "FILE_ID")
+        self.cache.forget(key)
+        self.assertIsNone(self.cache.get_file_id(key))
+
+    def test_disk_lru_eviction(self):
+        """Тест вытеснения самых старых файлов при превышении квоты."""
+        self.cache.store_bytes("old", b"123456")
+        os.utime(os.path.join(self.cache.cache_dir, "old.png"), (1, 1))
+        self.cache.store_bytes("new", b"123456")
+        self.assertIsNone(self.cache.get_bytes("old"))
+        self.assertEqual(self.cache.get_bytes("new"), b"123456")
+
+
+if __name__ == "__main__":
+    unittest.main()
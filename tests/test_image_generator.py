@@ -26,5 +26,18 @@ class TestImageGenerator(unittest.TestCase):
         with self.assertRaises(ValueError):
             self.generator.generate_image("A dragon in the sky", model="invalid-model")
 
+class TestImageModelValidation(unittest.TestCase):
+    def test_supported_combinations(self):
+        """Тест проверки модели, качества и размера по таблице IMAGE_MODELS_GPT."""
+        self.assertTrue(ImageGenerator.validate_image_model("dall-e-2", "standard", "512x512"))
+        self.assertTrue(ImageGenerator.validate_image_model("dall-e-3", "hd", "1024x1792"))
+        self.assertFalse(ImageGenerator.validate_image_model("dall-e-2", "hd"))
+        self.assertFalse(ImageGenerator.validate_image_model("dall-e-3", "standard", "512x512"))
+        self.assertFalse(ImageGenerator.validate_image_model("invalid-model"))
+
+    def test_image_price(self):
+        """Тест получения стоимости изображения."""
+        self.assertEqual(ImageGenerator.get_image_price("dall-e-2", "standard", "512x512"), 0.018)
+
 if __name__ == "__main__":
     unittest.main()
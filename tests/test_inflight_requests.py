@@ -0,0 +1,75 @@
+# tests/test_inflight_requests.py
+import asyncio
+import unittest
+from services.inflight_requests import InflightRequests, RequestCancelled
+
+
+class TestInflightRequests(unittest.TestCase):
+    def setUp(self):
+        self.inflight = InflightRequests()
+        self.aborted = []
+
+    async def upstream(self, name, delay=1.0):
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            self.aborted.append(name)  # здесь асинхронный клиент закрывает HTTP-соединение
+            raise
+        return name
+
+    def test_cancel_aborts_request_and_skips_delivery(self):
+        """Тест: /cancel обрывает запрос, обработчик получает RequestCancelled вместо результата."""
+        async def scenario():
+            handler = asyncio.create_task(self.inflight.run(1, 7, "talk", self.upstream("answer")))
+            await asyncio.sleep(0.01)
+            self.assertEqual(self.inflight.cancel(1, 7), 1)
+            with self.assertRaises(RequestCancelled):
+                await handler
+
+        asyncio.run(scenario())
+        self.assertEqual(self.aborted, ["answer"])
+        self.assertEqual(self.inflight.count(), 0)
+
+    def test_new_message_supersedes_pending_one(self):
+        """Тест: новое сообщение вытесняет незавершённый запрос того же пользователя в той же функции."""
+        async def scenario():
+            first = asyncio.create_task(self.inflight.run(1, 7, "talk", self.upstream("first")))
+            other_chat = asyncio.create_task(self.inflight.run(2, 7, "talk", self.upstream("other", 0.05)))
+            await asyncio.sleep(0.01)
+            second = await self.inflight.run(1, 7, "talk", self.upstream("second", 0.01))
+            with self.assertRaises(RequestCancelled):
+                await first
+            return second, await other_chat
+
+        self.assertEqual(asyncio.run(scenario()), ("second", "other"))
+        self.assertEqual(self.aborted, ["first"])
+
+    def test_other_users_and_features_are_not_cancelled(self):
+        """Тест: в группе запрос и /cancel одного участника не трогают запросы другого, /talk не отменяет /voice."""
+        async def scenario():
+            voice = asyncio.create_task(self.inflight.run(1, 7, "voice", self.upstream("voice", 0.05)))
+            neighbour = asyncio.create_task(self.inflight.run(1, 8, "talk", self.upstream("neighbour", 0.05)))
+            await asyncio.sleep(0.01)
+            talk = await self.inflight.run(1, 7, "talk", self.upstream("talk", 0.01))
+            self.assertEqual(self.inflight.cancel(1, 7, "talk"), 0)
+            return talk, await voice, await neighbour
+
+        self.assertEqual(asyncio.run(scenario()), ("talk", "voice", "neighbour"))
+        self.assertEqual(self.aborted, [])
+
+    def test_handler_cancellation_propagates(self):
+        """Тест: отмена самого обработчика (остановка бота) отменяет запрос и не превращается в RequestCancelled."""
+        async def scenario():
+            handler = asyncio.create_task(self.inflight.run(1, 7, "talk", self.upstream("answer")))
+            await asyncio.sleep(0.01)
+            handler.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await handler
+
+        asyncio.run(scenario())
+        self.assertEqual(self.aborted, ["answer"])
+        self.assertEqual(self.inflight.count(1), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
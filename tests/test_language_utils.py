@@ -0,0 +1,25 @@
+# tests/test_language_utils.py
+import unittest
+from utils.language_utils import guess_language
+
+
+class TestGuessLanguage(unittest.TestCase):
+    def test_unambiguous_scripts(self):
+        """Тест определения языка по алфавиту."""
+        self.assertEqual(guess_language("Привет, как дела?"), "RU")
+        self.assertEqual(guess_language("你好，世界"), "ZH")
+        self.assertEqual(guess_language("こんにちは世界"), "JA")
+        self.assertEqual(guess_language("안녕하세요"), "KO")
+        self.assertEqual(guess_language("مرحبا بالعالم"), "AR")
+
+    def test_ambiguous_texts(self):
+        """Тест: латиница, смешанные тексты и другие кириллические языки не определяются."""
+        self.assertIsNone(guess_language("Hello, world"))
+        self.assertIsNone(guess_language("Привіт, світ"))
+        self.assertIsNone(guess_language("Добър ден"))
+        self.assertIsNone(guess_language("Привет, world and everyone here"))
+        self.assertIsNone(guess_language("12345 !!!"))
+
+
+if __name__ == "__main__":
+    unittest.main()
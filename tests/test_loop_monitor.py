@@ -0,0 +1,50 @@
+# tests/test_loop_monitor.py
+import asyncio
+import time
+import unittest
+from types import SimpleNamespace
+from services.loop_monitor import LoopLagMonitor
+
+
+async def blocking_handler(update, context):
+    time.sleep(0.3)  # блокирующий вызов внутри асинхронного обработчика
+
+
+class TestLoopLagMonitor(unittest.TestCase):
+    def test_blocking_handler_is_reported(self):
+        """Тест: блокировка цикла попадает в отчёт с местом вызова и обновлением."""
+        monitor = LoopLagMonitor(threshold=0.1, interval=0.02)
+
+        async def scenario():
+            monitor.start()
+            await asyncio.sleep(0.1)
+            update = SimpleNamespace(update_id=42, effective_user=SimpleNamespace(id=7))
+            await blocking_handler(update, None)
+            await asyncio.sleep(0.1)
+            await monitor.stop()
+
+        asyncio.run(scenario())
+        report = monitor.report()
+        self.assertEqual(report["stalls"], 1)
+        self.assertGreaterEqual(report["max_lag_ms"], 200)
+        offender = report["offenders"][0]
+        self.assertIn("tests/test_loop_monitor.py", offender["site"])
+        self.assertIn("blocking_handler", offender["site"])
+        self.assertIn("update 42", offender["last_update"])
+        self.assertEqual(sum(report["histogram_ms"].values()), report["samples"])
+
+    def test_histogram_buckets(self):
+        """Тест распределения измерений по корзинам гистограммы."""
+        monitor = LoopLagMonitor(threshold=1.0)
+        for lag in (0.0005, 0.003, 0.2, 10):
+            monitor.observe(lag)
+        histogram = monitor.report()["histogram_ms"]
+        self.assertEqual(histogram["<=1"], 1)
+        self.assertEqual(histogram["<=5"], 1)
+        self.assertEqual(histogram["<=250"], 1)
+        self.assertEqual(histogram[">5000"], 1)
+        self.assertEqual(monitor.stalls, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
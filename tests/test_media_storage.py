@@ -0,0 +1,73 @@
+# tests/test_media_storage.py
+import asyncio
+import os
+import tempfile
+import time
+import unittest
+from services.media_storage import MediaStorage, MediaStorageError
+
+
+class TestMediaStorage(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.storage = MediaStorage(root=self.tmp.name, quota=100, wait_timeout=0.5, orphan_age=60)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_workspace_removed_on_error(self):
+        """Тест: каталог задачи удаляется и место освобождается даже после исключения."""
+        async def scenario():
+            async with self.storage.workspace("speech", 40) as workspace:
+                with open(workspace.file("audio.ogg"), "wb") as f:
+                    f.write(b"0" * 10)
+                self.assertEqual(self.storage.reserved, 40)
+                raise RuntimeError("Timed out")
+
+        with self.assertRaises(RuntimeError):
+            asyncio.run(scenario())
+        self.assertEqual(os.listdir(self.tmp.name), [])
+        self.assertEqual(self.storage.reserved, 0)
+
+    def test_quota_backpressure(self):
+        """Тест: задача ждёт, пока другая освободит место, а при долгом ожидании получает ошибку."""
+        order = []
+
+        async def task(name, size, hold):
+            async with self.storage.workspace(name, size):
+                order.append(name)
+                await asyncio.sleep(hold)
+
+        async def scenario():
+            await asyncio.gather(task("first", 80, 0.1), task("second", 50, 0))
+
+        asyncio.run(scenario())
+        self.assertEqual(order, ["first", "second"])
+
+        async def starved():
+            await asyncio.gather(task("long", 80, 1), task("waiting", 50, 0))
+
+        with self.assertRaises(MediaStorageError):
+            asyncio.run(starved())
+        with self.assertRaises(MediaStorageError):
+            asyncio.run(task("huge", 101, 0))
+
+    def test_sweep_removes_only_old_orphans(self):
+        """Тест: очистка удаляет старые забытые файлы, но не активные каталоги."""
+        orphan = os.path.join(self.tmp.name, "speech_orphan")
+        os.mkdir(orphan)
+        fresh = os.path.join(self.tmp.name, "fresh.ogg")
+        open(fresh, "wb").close()
+        active = os.path.join(self.tmp.name, "interpret_active")
+        os.mkdir(active)
+        self.storage.active.add(active)
+        old = time.time() - 120
+        os.utime(orphan, (old, old))
+        os.utime(active, (old, old))
+
+        self.assertEqual(self.storage.sweep(), 1)
+        self.assertEqual(sorted(os.listdir(self.tmp.name)), ["fresh.ogg", "interpret_active"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+# tests/test_model_router.py
+import asyncio
+import os
+import tempfile
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+from database.database import Database
+from handlers.response_handler import ResponseHandler
+from services.model_router import ModelRouter
+from services.response_from_assistant import ResponseAssistantAll, ResponseAssistantError
+from services.user_sessions import UserSession
+from services.user_tiers import UserTiers
+
+
+class TestModelRouter(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db = Database(os.path.join(self.tmp.name, "test.db"))
+        self.router = ModelRouter(db=self.db, fast_model="fast", strong_model="strong", long_message=100,
+                                  slow_seconds=10)
+
+    def tearDown(self):
+        self.db.close()
+        self.tmp.cleanup()
+
+    def test_classification(self):
+        """Тест: короткие вопросы идут в быструю модель, сложные и длинные — в сильную."""
+        self.assertEqual(self.router.route("What does 'reluctant' mean?"), ["fast", "strong"])
+        self.assertEqual(self.router.classify("Объясни разницу между since и for")[0], "strong")
+        self.assertEqual(self.router.classify("word " * 30)[0], "strong")
+        self.assertEqual(self.router.classify("这个词是什么意思")[0], "strong")
+
+    def test_long_dialog_keeps_fast_model(self):
+        """Тест: /talk не передаёт модели историю, поэтому и 11-й короткий вопрос подряд идёт в быструю модель."""
+        service = ResponseAssistantAll.__new__(ResponseAssistantAll)
+        service.model_router = self.router
+        service.semantic_cache = None
+        service.complete_with_fallback = AsyncMock(return_value=(MagicMock(), "fast"))
+        handler = ResponseHandler()
+        handler.response_service = service
+        update = MagicMock()
+        update.effective_chat.id = update.effective_user.id = 1
+        update.message.text = "What does 'reluctant' mean?"
+        update.message.reply_text = AsyncMock(return_value=AsyncMock())
+        context = MagicMock()
+        context.user_data = UserSession()
+
+        async def talk():
+            for _ in range(11):
+                await handler.generate_response(update, context)
+
+        with patch("handlers.response_handler.get_user_tiers", lambda: UserTiers(self.db)):
+            asyncio.run(talk())
+        self.assertEqual(service.complete_with_fallback.await_count, 11)
+        self.assertEqual(service.complete_with_fallback.await_args.args[1], ["fast", "strong"])
+
+    def test_user_choice_wins(self):
+        """Тест: явно выбранная модель идёт первой."""
+        self.assertEqual(self.router.route("Explain everything", preferred="fast"), ["fast", "strong"])
+
+    def test_unhealthy_model_is_tried_second(self):
+        """Тест: после серии ошибок модель становится запасной; статистика сохраняется в БД."""
+        for _ in range(5):
+            self.router.record("fast", 1.0, ok=False)
+        self.assertEqual(self.router.route("hi"), ["strong", "fast"])
+        restarted = ModelRouter(db=self.db, fast_model="fast", strong_model="strong")
+        self.assertEqual(restarted.stats["fast"]["failures"], 5)
+        self.assertFalse(restarted.is_healthy("fast"))
+
+    def test_fallback_on_transient_error(self):
+        """Тест: при перегрузке первой модели ответ берётся у второй."""
+        service = ResponseAssistantAll.__new__(ResponseAssistantAll)
+        service.model_router = self.router
+        overloaded = Exception("overloaded")
+        overloaded.status_code = 503
+        response = MagicMock()
+        response.choices[0].finish_reason = "stop"
+
+        async def create_completion(message, model):
+            if model == "fast":
+                raise ResponseAssistantError("overloaded") from overloaded
+            return response
+
+        service.create_completion = create_completion
+        result = asyncio.run(service.complete_with_fallback("hi", ["fast", "strong"]))
+        self.assertEqual(result, (response, "strong"))
+        self.assertEqual(self.router.stats["fast"]["failures"], 1)
+        self.assertEqual(self.router.stats["strong"]["requests"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
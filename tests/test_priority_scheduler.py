@@ -0,0 +1,56 @@
+# tests/test_priority_scheduler.py
+import asyncio
+import unittest
+from services.priority_scheduler import PriorityScheduler, queue_key
+
+
+class TestPriorityScheduler(unittest.TestCase):
+    def setUp(self):
+        self.scheduler = PriorityScheduler(slots=1, headstart=30)
+        self.order = []
+
+    async def request(self, name, delay=0.01):
+        self.order.append(name)
+        await asyncio.sleep(delay)
+        return name
+
+    def test_premium_jumps_ahead_under_contention(self):
+        """Тест: под нагрузкой премиум-запрос обгоняет ранее пришедшие бесплатные."""
+        async def scenario():
+            busy = asyncio.create_task(self.scheduler.run(self.request("busy"), 1))
+            await asyncio.sleep(0)
+            free = [asyncio.create_task(self.scheduler.run(self.request(f"free{i}"), 1)) for i in range(2)]
+            await asyncio.sleep(0)
+            premium = asyncio.create_task(self.scheduler.run(self.request("premium"), 0))
+            return await asyncio.gather(busy, *free, premium)
+
+        self.assertEqual(asyncio.run(scenario()), ["busy", "free0", "free1", "premium"])
+        self.assertEqual(self.order, ["busy", "premium", "free0", "free1"])
+        self.assertEqual(self.scheduler.busy, 0)
+
+    def test_long_waiting_free_request_is_not_starved(self):
+        """Тест: бесплатный запрос, прождавший дольше форы, обслуживается раньше нового премиум-запроса."""
+        self.assertLess(queue_key(1, arrived_at=0, headstart=30), queue_key(0, arrived_at=31, headstart=30))
+        self.assertLess(queue_key(0, arrived_at=10, headstart=30), queue_key(1, arrived_at=0, headstart=30))
+
+    def test_cancelled_waiter_releases_its_place(self):
+        """Тест: отменённый в очереди запрос не запускается и не занимает место."""
+        async def scenario():
+            busy = asyncio.create_task(self.scheduler.run(self.request("busy", 0.05), 1))
+            await asyncio.sleep(0)
+            cancelled = asyncio.create_task(self.scheduler.run(self.request("cancelled"), 0))
+            waiting = asyncio.create_task(self.scheduler.run(self.request("waiting"), 1))
+            await asyncio.sleep(0.01)
+            self.assertEqual(self.scheduler.waiting, 2)
+            cancelled.cancel()
+            await asyncio.gather(busy, waiting)
+            with self.assertRaises(asyncio.CancelledError):
+                await cancelled
+
+        asyncio.run(scenario())
+        self.assertEqual(self.order, ["busy", "waiting"])
+        self.assertEqual((self.scheduler.busy, self.scheduler.waiting), (0, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+# tests/test_profiler.py
+import threading
+import time
+import unittest
+from services.profiler import MemoryProfiler, ProfilerError, SamplingProfiler, deep_sizeof
+
+
+def busy_loop(stop: threading.Event) -> None:
+    while not stop.is_set():
+        sum(range(1000))
+
+
+class TestProfiler(unittest.TestCase):
+    def test_sampling_profile_finds_busy_function(self):
+        """Тест: функция, нагружающая CPU в другом потоке, попадает в профиль."""
+        stop = threading.Event()
+        worker = threading.Thread(target=busy_loop, args=(stop,))
+        worker.start()
+        try:
+            profiler = SamplingProfiler(interval=0.005)
+            result = profiler.profile(0.3)
+        finally:
+            stop.set()
+            worker.join()
+        self.assertGreater(result["samples"], 10)
+        busy = [label for label in result["total"] if label.startswith("busy_loop (tests/test_profiler.py")]
+        self.assertTrue(busy)
+        report = profiler.format_report(result, 0.3)
+        self.assertIn("busy_loop", report)
+
+    def test_only_one_profile_at_a_time(self):
+        """Тест: второе профилирование во время первого отклоняется."""
+        profiler = SamplingProfiler(interval=0.01)
+        thread = threading.Thread(target=profiler.profile, args=(0.3,))
+        thread.start()
+        time.sleep(0.05)
+        with self.assertRaises(ProfilerError):
+            profiler.profile(0.1)
+        thread.join()
+
+    def test_memory_diff_shows_allocation_site(self):
+        """Тест: рост памяти с базового снимка указывает на строку, где выделена память."""
+        profiler = MemoryProfiler()
+        with self.assertRaises(ProfilerError):
+            profiler.diff_report()
+        profiler.start()
+        try:
+            leak = [bytearray(10_000) for _ in range(100)]
+            report = profiler.diff_report()
+        finally:
+            profiler.stop()
+        self.assertIn("test_profiler.py", report.splitlines()[3])
+        self.assertEqual(len(leak), 100)
+
+    def test_deep_sizeof_counts_nested_bytes(self):
+        """Тест: размер user_data учитывает вложенные буферы."""
+        data = {"audio": [b"x" * 50_000], "lang": "EN"}
+        self.assertGreater(deep_sizeof(data), 50_000)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+# tests/test_router.py
+import unittest
+from unittest.mock import AsyncMock, MagicMock
+from handlers.router import MessageRouter
+from services.user_sessions import UserSession
+
+
+def make_message(text=None, **media):
+    update = MagicMock()
+    update.effective_message.text = text
+    for kind in ("voice", "audio", "video", "video_note", "document"):
+        setattr(update.effective_message, kind, media.get(kind))
+    context = MagicMock()
+    context.user_data = UserSession()
+    return update, context
+
+
+class TestMessageRouter(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.router = MessageRouter()
+        self.cancel = AsyncMock()
+        self.voice_selected = AsyncMock()
+        self.generate_voice = AsyncMock()
+        self.speech = AsyncMock()
+        self.router.add_command("cancel", self.cancel)
+        self.router.add_texts(["alloy", "nova"], self.voice_selected, mode="voice")
+        self.router.add_mode("voice", self.generate_voice)
+        self.router.add_media("voice", self.speech)
+
+    def test_exact_text_sets_mode(self):
+        """Тест: кнопка голоса маршрутизируется точным совпадением и включает режим озвучивания."""
+        update, context = make_message("nova")
+        self.assertIs(self.router.resolve(update, context), self.voice_selected)
+        self.assertEqual(context.user_data.mode, "voice")
+
+    def test_mode_is_one_shot(self):
+        """Тест: режим срабатывает на один следующий текст."""
+        update, context = make_message("Привет")
+        context.user_data.mode = "voice"
+        self.assertIs(self.router.resolve(update, context), self.generate_voice)
+        self.assertIsNone(self.router.resolve(update, context))
+
+    def test_command_table(self):
+        """Тест таблицы команд: регистр, упоминание бота и аргументы; команда сбрасывает режим."""
+        update, context = make_message("/Cancel@AsyaBot now")
+        context.user_data.mode = "voice"
+        self.assertIs(self.router.resolve(update, context), self.cancel)
+        self.assertEqual(context.args, ["now"])
+        self.assertIsNone(context.user_data.mode)
+        update, context = make_message("/unknown")
+        self.assertIsNone(self.router.resolve(update, context))
+
+    async def test_media_route(self):
+        """Тест маршрутизации по типу вложения."""
+        update, context = make_message(voice=MagicMock())
+        await self.router.route(update, context)
+        self.speech.assert_awaited_once_with(update, context)
+        update, context = make_message(document=MagicMock())
+        self.assertIsNone(self.router.resolve(update, context))
+
+    def test_unknown_media_kind(self):
+        """Тест: неизвестный тип вложения отклоняется при регистрации."""
+        for kind in ("sticker", "document"):
+            with self.assertRaises(ValueError):
+                self.router.add_media(kind, self.speech)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+# tests/test_semantic_cache.py
+import os
+import tempfile
+import unittest
+from database.database import Database
+from services.semantic_cache import SemanticCache, embed, same_question
+
+
+class TestSemanticCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db = Database(os.path.join(self.tmp.name, "test.db"))
+        self.cache = SemanticCache(db=self.db, threshold=0.9, max_entries=2, ttl=60)
+
+    def tearDown(self):
+        self.db.close()
+        self.tmp.cleanup()
+
+    def test_similar_question_hits(self):
+        """Тест: перефразированный вопрос получает сохранённый ответ той же модели."""
+        self.cache.put("What is the present perfect?", "gpt-4o", "Present perfect is...")
+        self.assertEqual(self.cache.lookup("what is present perfect", "gpt-4o"), "Present perfect is...")
+        self.assertIsNone(self.cache.lookup("what is present perfect", "gpt-4o-mini"))
+        self.assertIsNone(self.cache.lookup("what is past perfect", "gpt-4o"))
+
+    def test_different_questions_miss(self):
+        """Тест: вопросы, отличающиеся заменённым словом, порядком слов или отрицанием, не получают чужой ответ."""
+        negatives = [
+            ("What is the past tense of the verb go in English?",
+             "What is the past tense of the verb do in English?"),
+            ("What is the difference between affect and effect?",
+             "What is the difference between effect and affect?"),
+            ("How do I use the word since?", "How do I use the word for?"),
+            ("Translate 'I like cats' into French", "Translate 'I like dogs' into French"),
+            ("Как переводится слово «кошка»?", "Как переводится слово «мышка»?"),
+            ("Can I use the present perfect with yesterday?", "Can I not use the present perfect with yesterday?"),
+        ]
+        cache = SemanticCache(db=self.db, threshold=0.8, max_entries=10, ttl=60)
+        for cached, asked in negatives:
+            cache.put(cached, "gpt-4o", cached)
+            self.assertIsNone(cache.lookup(asked, "gpt-4o"), asked)
+
+    def test_paraphrases_hit(self):
+        """Тест: вопросы с теми же значимыми словами (служебные слова, регистр) и уточнённые вопросы получают ответ."""
+        paraphrases = [
+            ("what is present perfect", "explain present perfect tense"),
+            ("What is the past tense of the verb go in English?", "What's the past tense of the verb go in English"),
+            ("Explain the difference between affect and effect",
+             "Please explain the difference between affect and effect."),
+            ("Как переводится слово serendipity?", "как переводится слово serendipity"),
+        ]
+        cache = SemanticCache(db=self.db, threshold=0.8, max_entries=10, ttl=60)
+        for cached, asked in paraphrases:
+            cache.put(cached, "gpt-4o", cached)
+            self.assertEqual(cache.lookup(asked, "gpt-4o"), cached)
+
+    def test_same_question_allows_only_extra_words(self):
+        """Тест: один вопрос может дополнять другой парой слов, но не заменять и не переставлять их."""
+        self.assertTrue(same_question("What is the past tense of go?",
+                                      "What is the past tense of the verb go in English?"))
+        self.assertFalse(same_question("What is the present perfect?", "What is the present perfect continuous passive?"))
+        self.assertFalse(same_question("What is the past perfect tense?", "What is past perfect continuous?"))
+        self.assertFalse(same_question("What is 15 percent of 80?", "What is 16 percent of 80?"))
+
+    def test_embedding_is_normalized(self):
+        """Тест: вектор нормирован, скалярное произведение равно косинусу."""
+        vector = embed("Explain the difference between make and do")
+        self.assertAlmostEqual(float(vector @ vector), 1.0, places=5)
+
+    def test_persistence_and_eviction_by_hits(self):
+        """Тест: ответы переживают перезапуск, при переполнении вытесняются редко используемые."""
+        self.cache.put("How do I use the word since?", "gpt-4o", "since")
+        self.cache.put("How do I use the word already?", "gpt-4o", "already")
+        self.cache.lookup("How do I use the word since?", "gpt-4o")
+        self.cache.put("How do I use the word yet?", "gpt-4o", "yet")
+        restarted = SemanticCache(db=self.db, threshold=0.9, max_entries=2, ttl=60)
+        self.assertEqual(restarted.lookup("How do I use the word since?", "gpt-4o"), "since")
+        self.assertEqual(restarted.lookup("How do I use the word yet?", "gpt-4o"), "yet")
+        self.assertIsNone(restarted.lookup("How do I use the word already?", "gpt-4o"))
+
+    def test_expired_answers_are_ignored(self):
+        """Тест: устаревший ответ не возвращается."""
+        self.cache.put("What does 'to break the ice' mean?", "gpt-4o", "idiom")
+        self.cache._created[0] = 0
+        self.assertIsNone(self.cache.lookup("What does 'to break the ice' mean?", "gpt-4o"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,36 @@
+# tests/test_similarity_utils.py
+import unittest
+from utils.similarity_utils import MinHasher, jaccard, join_sentences, same_words, shingles, split_sentences, words
+
+
+class TestSimilarityUtils(unittest.TestCase):
+    def test_split_and_join_roundtrip(self):
+        """Тест: текст делится на предложения и собирается без изменений."""
+        text = "Hello there. How are you?\nI am fine!  Thanks…  他好。你好吗？"
+        sentences, separators = split_sentences(text)
+        self.assertEqual(sentences[:4], ["Hello there.", "How are you?", "I am fine!", "Thanks…"])
+        self.assertEqual(join_sentences(sentences, separators), text)
+
+    def test_near_duplicates_share_a_band(self):
+        """Тест: похожие предложения попадают в общую LSH-корзину, непохожие — нет."""
+        hasher = MinHasher()
+        first = shingles("I would like to book a table for tonight, please.")
+        typo = shingles("I would like to book a tabel for tonight, please.")
+        other = shingles("The weather in London was terrible yesterday.")
+        keys = set(hasher.band_keys(hasher.signature(first)))
+        self.assertTrue(keys & set(hasher.band_keys(hasher.signature(typo))))
+        self.assertFalse(keys & set(hasher.band_keys(hasher.signature(other))))
+        self.assertGreater(jaccard(first, typo), 0.8)
+
+
+    def test_same_words_allows_only_typos(self):
+        """Тест: опечатки в словах допускаются, другое слово, отрицание или число — нет."""
+        self.assertTrue(same_words(words("Book a table, please!"), words("book a tabel please")))
+        self.assertTrue(same_words(words("I recieve letters"), words("I receive letters")))
+        self.assertFalse(same_words(words("he is coming"), words("he is not coming")))
+        self.assertFalse(same_words(words("it will affect us"), words("it will effect us")))
+        self.assertFalse(same_words(words("in 2024"), words("in 2025")))
+        self.assertFalse(same_words(words("ich weiß nicht"), words("ich weiß nichts")))
+
+if __name__ == "__main__":
+    unittest.main()
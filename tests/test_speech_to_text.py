@@ -7,11 +7,23 @@ class TestSpeechToTextService(unittest.TestCase):
     @patch("builtins.open", new_callable=mock_open, read_data=b"fake audio data")
     def test_transcribe_audio_success(self, mock_file):
         service = SpeechToTextService()
-        with patch("openai.audio.transcriptions.create") as mock_transcription:
+        with patch("services.speech_to_text.openai_client") as mock_client:
+            mock_transcription = mock_client.return_value.audio.transcriptions.create
             # Создаем фиктивный объект с атрибутом text
             mock_transcription.return_value = type("Transcription", (), {"text": "Hello world"})
             result = service.transcribe_audio("dummy_path.mp3")
             self.assertEqual(result, "Hello world")
 
+    def test_transcribe_bytes(self):
+        """Тест: аудио из памяти отправляется как файл с именем, сегменты сдвигаются на offset."""
+        service = SpeechToTextService()
+        segment = type("Segment", (), {"start": 1.0, "end": 2.5, "text": " Hello"})
+        with patch("services.speech_to_text.openai_client") as mock_client:
+            mock_transcription = mock_client.return_value.audio.transcriptions.create
+            mock_transcription.return_value = type("Transcription", (), {"text": "Hello", "segments": [segment]})
+            result = service.transcribe_bytes(b"ogg data", offset=10)
+        self.assertEqual(mock_transcription.call_args.kwargs["file"], ("audio.ogg", b"ogg data"))
+        self.assertEqual(result, [{"start": 11.0, "end": 12.5, "text": " Hello"}])
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,44 @@
+# tests/test_startup_utils.py
+import sys
+import unittest
+from unittest.mock import patch
+import config as cfg
+from utils.startup_utils import lazy_import, StartupTimer
+
+
+class TestStartupUtils(unittest.TestCase):
+    def test_lazy_import(self):
+        """Тест: модуль загружается при первом обращении к атрибуту."""
+        sys.modules.pop("colorsys", None)
+        module = lazy_import("colorsys")
+        self.assertIs(sys.modules["colorsys"], module)
+        self.assertEqual(module.rgb_to_hsv(1.0, 0.0, 0.0), (0.0, 1.0, 1.0))
+        self.assertIs(lazy_import("colorsys"), module)
+
+    def test_lazy_import_missing_module(self):
+        """Тест: отсутствующий модуль обнаруживается сразу."""
+        with self.assertRaises(ModuleNotFoundError):
+            lazy_import("no_such_module_for_tests")
+
+    def test_timer_report(self):
+        """Тест отчёта о длительности этапов запуска."""
+        timer = StartupTimer()
+        with timer.phase("обработчики"):
+            pass
+        report = timer.report()
+        self.assertTrue(report.startswith("Запуск за "))
+        self.assertIn("обработчики 0.00 с", report)
+
+    def test_ffmpeg_path_resolved_lazily(self):
+        """Тест: путь к ffmpeg ищется при обращении, а не при импорте конфигурации."""
+        cfg.__dict__.pop("FFMPEG_PATH", None)
+        with patch("config.shutil.which", return_value=None), patch("config.os.getenv", return_value=None):
+            with self.assertRaises(FileNotFoundError):
+                _ = cfg.FFMPEG_PATH
+        with patch("config.shutil.which", return_value="/usr/bin/ffmpeg"), patch("config.os.getenv", return_value=None):
+            self.assertEqual(cfg.FFMPEG_PATH, "/usr/bin/ffmpeg")
+        cfg.__dict__.pop("FFMPEG_PATH", None)
+
+
+if __name__ == "__main__":
+    unittest.main()
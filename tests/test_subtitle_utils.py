@@ -0,0 +1,37 @@
+# tests/test_subtitle_utils.py
+import unittest
+from utils.subtitle_utils import format_timestamp, to_srt, to_vtt, to_text
+
+SEGMENTS = [
+    {"start": 0.0, "end": 2.5, "text": " Привет. "},
+    {"start": 2.5, "end": 3661.042, "text": "Как дела?"},
+]
+
+
+class TestSubtitleUtils(unittest.TestCase):
+    def test_format_timestamp(self):
+        """Тест форматирования таймкодов SRT и WebVTT."""
+        self.assertEqual(format_timestamp(3661.042), "01:01:01,042")
+        self.assertEqual(format_timestamp(0.5, "."), "00:00:00.500")
+        self.assertEqual(format_timestamp(-1), "00:00:00,000")
+
+    def test_to_srt(self):
+        """Тест формирования SRT."""
+        self.assertEqual(
+            to_srt(SEGMENTS),
+            "1\n00:00:00,000 --> 00:00:02,500\nПривет.\n\n"
+            "2\n00:00:02,500 --> 01:01:01,042\nКак дела?\n"
+        )
+
+    def test_to_vtt(self):
+        """Тест формирования WebVTT."""
+        vtt = to_vtt(SEGMENTS)
+        self.assertTrue(vtt.startswith("WEBVTT\n\n00:00:00.000 --> 00:00:02.500\nПривет.\n"))
+
+    def test_to_text(self):
+        """Тест склейки сегментов в текст."""
+        self.assertEqual(to_text(SEGMENTS + [{"start": 4, "end": 5, "text": "  "}]), "Привет. Как дела?")
+
+
+if __name__ == "__main__":
+    unittest.main()
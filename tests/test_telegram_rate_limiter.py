@@ -0,0 +1,76 @@
+# tests/test_telegram_rate_limiter.py
+import asyncio
+import time
+import unittest
+from unittest.mock import AsyncMock, patch
+from telegram.error import RetryAfter
+from services.telegram_rate_limiter import TelegramRateLimiter, TokenBucket
+
+
+class TestTelegramRateLimiter(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.limiter = TelegramRateLimiter(global_rate=100, chat_rate=20, group_rate=20, max_retries=2)
+        self.sent = []
+
+    def throttle_chat(self, chat_id: int = 1) -> None:
+        """Опустошает ведро чата, чтобы следующие запросы встали в очередь."""
+        bucket = self.limiter._chats[chat_id] = TokenBucket(20, 1)
+        bucket.tokens = 0
+
+    def request(self, endpoint: str, text: str, **data):
+        async def callback():
+            self.sent.append(text)
+            return {"text": text}
+        return self.limiter.process_request(callback, (), {}, endpoint, {"chat_id": 1, **data}, None)
+
+    async def test_consecutive_edits_are_merged(self):
+        """Тест: из нескольких ожидающих правок одного сообщения отправляется только последняя."""
+        self.throttle_chat()
+        results = await asyncio.gather(*(self.request("editMessageText", f"{i}%", message_id=5)
+                                         for i in range(3)))
+        self.assertEqual(self.sent, ["2%"])
+        self.assertEqual(results, [True, True, {"text": "2%"}])
+
+    async def test_results_before_progress(self):
+        """Тест: итоговое сообщение отправляется раньше ожидающей правки с прогрессом."""
+        self.throttle_chat()
+        edit = asyncio.create_task(self.request("editMessageText", "progress", message_id=5))
+        await asyncio.sleep(0)
+        await asyncio.gather(edit, self.request("sendMessage", "result"))
+        self.assertEqual(self.sent, ["result", "progress"])
+
+    async def test_retry_after(self):
+        """Тест: после RetryAfter запрос повторяется."""
+        callback = AsyncMock(side_effect=[RetryAfter(0), {"ok": True}])
+        result = await self.limiter.process_request(callback, (), {}, "sendMessage", {"chat_id": 1}, None)
+        self.assertEqual(result, {"ok": True})
+        self.assertEqual(callback.await_count, 2)
+
+    async def test_retry_after_exhausted(self):
+        """Тест: RetryAfter пробрасывается, когда повторы исчерпаны."""
+        callback = AsyncMock(side_effect=RetryAfter(0))
+        with self.assertRaises(RetryAfter):
+            await self.limiter.process_request(callback, (), {}, "sendMessage", {"chat_id": 1}, None)
+        self.assertEqual(callback.await_count, 3)
+
+    async def test_idle_chat_buckets_are_evicted(self):
+        """Тест: вёдра чатов, в которые давно не писали, удаляются; ведро с очередью остаётся."""
+        callback = AsyncMock(return_value={"ok": True})
+        for chat_id in (1, 2, 3):
+            await self.limiter.process_request(callback, (), {}, "sendMessage", {"chat_id": chat_id}, None)
+        busy = self.limiter._chats[-5] = TokenBucket(0.0001, 1)
+        busy.tokens = 0
+        with patch("services.telegram_rate_limiter.time.monotonic", return_value=time.monotonic() + 3600):
+            await self.limiter.process_request(callback, (), {}, "sendMessage", {"chat_id": 4}, None)
+        self.assertEqual(set(self.limiter._chats), {-5, 4})
+
+    async def test_requests_without_chat_pass_through(self):
+        """Тест: запросы без chat_id (getUpdates и т.п.) не ограничиваются."""
+        callback = AsyncMock(return_value=[])
+        await self.limiter.process_request(callback, (), {}, "getUpdates", {"timeout": 10}, None)
+        callback.assert_awaited_once()
+        self.assertEqual(self.limiter._chats, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+# tests/test_transcript_cache.py
+import os
+import tempfile
+import time
+import unittest
+from database.database import Database
+from services.transcript_cache import TranscriptCache
+
+SEGMENTS = [{"start": 0.0, "end": 1.5, "text": "Привет"}]
+
+
+class TestTranscriptCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db = Database(os.path.join(self.tmp.name, "test.db"))
+        self.cache = TranscriptCache(db=self.db, memory_entries=1, max_entries=2, ttl=60)
+
+    def tearDown(self):
+        self.db.close()
+        self.tmp.cleanup()
+
+    def test_roundtrip_survives_restart(self):
+        """Тест: расшифровка сохраняется в БД и доступна после перезапуска."""
+        key = TranscriptCache.make_key("unique-1")
+        self.assertIsNone(self.cache.get(key))
+        self.cache.put(key, SEGMENTS)
+        self.assertEqual(self.cache.get(key), SEGMENTS)
+        restarted = TranscriptCache(db=self.db, ttl=60)
+        self.assertEqual(restarted.get(key), SEGMENTS)
+
+    def test_key_depends_on_model_and_language(self):
+        """Тест: модель и язык входят в ключ."""
+        self.assertNotEqual(TranscriptCache.make_key("u"), TranscriptCache.make_key("u", language="ru"))
+        self.assertNotEqual(TranscriptCache.make_key("u"), TranscriptCache.make_key("u", model="other"))
+
+    def test_lru_limits(self):
+        """Тест вытеснения давно не использованных записей из памяти и БД."""
+        for name in ("a", "b", "c"):
+            self.cache.put(name, SEGMENTS)
+            time.sleep(0.01)
+        self.assertEqual(list(self.cache._memory), ["c"])
+        self.assertIsNone(self.cache.get("a"))
+        self.assertEqual(self.cache.get("b"), SEGMENTS)
+
+    def test_ttl_expiry(self):
+        """Тест: устаревшая расшифровка не возвращается и удаляется."""
+        self.cache.put("old", SEGMENTS)
+        self.cache._memory.clear()
+        self.db.execute("UPDATE transcript_cache SET created_at = 0 WHERE key = 'old'")
+        self.assertIsNone(self.cache.get("old"))
+        self.assertIsNone(self.db.fetchone("SELECT key FROM transcript_cache WHERE key = 'old'"))
+
+
+if __name__ == "__main__":
+    unittest.main()
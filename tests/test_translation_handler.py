@@ -0,0 +1,69 @@
+# tests/test_translation_handler.py
+import os
+import tempfile
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+from database.database import Database
+from handlers.translation_handler import TranslationHandlers, split_language_prefix, TARGET_LANG_KEY
+from services.user_preferences import UserPreferences
+from services.user_tiers import UserTiers
+
+
+def make_update(text: str, user_id: int = 1):
+    update = MagicMock()
+    update.effective_user.id = user_id
+    update.message.text = text
+    update.message.reply_text = AsyncMock()
+    return update
+
+
+class TestLanguagePrefix(unittest.TestCase):
+    def test_explicit_language_codes(self):
+        """Тест: язык задаётся кодом заглавными или с двоеточием."""
+        self.assertEqual(split_language_prefix("EN привет"), ("EN", "привет"))
+        self.assertEqual(split_language_prefix("en: привет"), ("EN", "привет"))
+        self.assertEqual(split_language_prefix("DE:\nпривет"), ("DE", "привет"))
+        self.assertEqual(split_language_prefix("FR"), ("FR", ""))
+
+    def test_ordinary_words_are_text(self):
+        """Тест: слова, совпадающие с кодами языков («It», «de», «no»), остаются частью текста."""
+        for text in ("It is raining", "de facto standard", "no problem", "Es ist kalt", "US dollar"):
+            self.assertEqual(split_language_prefix(text), (None, text))
+
+
+class TestStartTranslation(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db = Database(os.path.join(self.tmp.name, "test.db"))
+        with patch("handlers.translation_handler.get_user_preferences", lambda: UserPreferences(self.db)), \
+                patch("handlers.translation_handler.get_user_tiers", lambda: UserTiers(self.db)):
+            self.handlers = TranslationHandlers(MagicMock())
+        self.handlers.reply_translation = AsyncMock()
+        self.handlers.set_target_lang(1, "FR")
+
+    async def asyncTearDown(self):
+        self.db.close()
+        self.tmp.cleanup()
+
+    async def translate(self, text: str):
+        await self.handlers.start_translation(make_update(text), MagicMock())
+        _, translated, target_lang = self.handlers.reply_translation.await_args.args
+        return translated, target_lang
+
+    async def test_ordinary_first_word_keeps_default(self):
+        """Тест: «It …» и «de …» переводятся целиком на язык по умолчанию."""
+        self.assertEqual(await self.translate("/translate It is raining"), ("It is raining", "FR"))
+        self.assertEqual(await self.translate("/translate de facto"), ("de facto", "FR"))
+        self.assertEqual(self.handlers.preferences.get(1, TARGET_LANG_KEY), "FR")
+
+    async def test_one_shot_language_does_not_change_default(self):
+        """Тест: язык однократной команды не сохраняется, а `/translate EN` меняет язык по умолчанию."""
+        self.assertEqual(await self.translate("/translate DE привет"), ("привет", "DE"))
+        self.assertEqual(await self.translate("/translate en: привет"), ("привет", "EN"))
+        self.assertEqual(self.handlers.preferences.get(1, TARGET_LANG_KEY), "FR")
+        await self.handlers.start_translation(make_update("/translate ES"), MagicMock())
+        self.assertEqual(self.handlers.preferences.get(1, TARGET_LANG_KEY), "ES")
+
+
+if __name__ == "__main__":
+    unittest.main()
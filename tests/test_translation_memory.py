@@ -0,0 +1,77 @@
+# tests/test_translation_memory.py
+import os
+import tempfile
+import unittest
+from database.database import Database
+from services.translation_memory import TranslationMemory
+
+
+class FakeTranslator:
+    """Переводчик, который помечает текст и запоминает отправленные предложения."""
+
+    def __init__(self):
+        self.requests = []
+
+    @staticmethod
+    def validate_language(target_lang):
+        return target_lang in ("DE", "RU")
+
+    def translate_batch(self, texts, target_lang):
+        self.requests.append(list(texts))
+        return [(f"<{target_lang}:{text}>", "EN") for text in texts]
+
+
+class TestTranslationMemory(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db = Database(os.path.join(self.tmp.name, "test.db"))
+        self.translator = FakeTranslator()
+        self.memory = TranslationMemory(self.translator, db=self.db, threshold=0.8, max_entries=100)
+
+    def tearDown(self):
+        self.db.close()
+        self.tmp.cleanup()
+
+    def test_only_novel_sentences_are_sent(self):
+        """Тест: повторные предложения берутся из памяти, новые уходят одним запросом."""
+        self.memory.translate("I would like to book a table for tonight. Thank you.", "DE")
+        result, source = self.memory.translate_with_source(
+            "I would like to book a tabel for tonight. See you soon. Thank you.", "DE"
+        )
+        self.assertEqual(self.translator.requests[-1], ["See you soon."])
+        self.assertEqual(result, "<DE:I would like to book a table for tonight.> <DE:See you soon.> "
+                                 "<DE:Thank you.>")
+        self.assertEqual(source, "EN")
+
+    def test_memory_is_per_language_and_persistent(self):
+        """Тест: перевод на другой язык не переиспользуется; память переживает перезапуск."""
+        self.memory.translate("Good morning, everyone.", "DE")
+        self.memory.translate("Good morning, everyone.", "RU")
+        self.assertEqual(len(self.translator.requests), 2)
+        restarted = TranslationMemory(self.translator, db=self.db)
+        self.assertEqual(restarted.translate("Good morning, everyone.", "DE"), "<DE:Good morning, everyone.>")
+        self.assertEqual(len(self.translator.requests), 2)
+
+    def test_different_numbers_are_not_reused(self):
+        """Тест: предложения, отличающиеся числами, переводятся заново."""
+        self.memory.translate("Please send me 15 copies of the report by Friday.", "DE")
+        self.memory.translate("Please send me 16 copies of the report by Friday.", "DE")
+        self.assertEqual(len(self.translator.requests), 2)
+
+    def test_changed_words_are_not_reused(self):
+        """Тест: предложение с добавленным отрицанием или другим словом переводится заново."""
+        self.memory.translate("She said that he is coming home tomorrow evening after the long business trip.", "DE")
+        self.memory.translate("She said that he is not coming home tomorrow evening after the long business trip.", "DE")
+        self.memory.translate("She said that he is coming home tomorrow morning after the long business trip.", "DE")
+        self.assertEqual(len(self.translator.requests), 3)
+
+    def test_prune_keeps_recent_entries(self):
+        """Тест: сверх лимита вытесняются давно не использованные предложения."""
+        memory = TranslationMemory(self.translator, db=self.db, max_entries=2)
+        memory.translate("One apple. Two pears. Three plums.", "DE")
+        count = self.db.fetchone("SELECT COUNT(*) AS n FROM translation_memory")["n"]
+        self.assertEqual(count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -8,13 +8,29 @@ class TestDeepLTranslator(unittest.TestCase):
     def setUp(self):
         self.translator = DeepLTranslator()
 
-    @patch('services.translator.httpx.post')
+    @patch('services.translator.httpx.Client.post')
     def test_valid_translation(self, mock_post):
         mock_post.return_value.status_code = 200
         mock_post.return_value.json.return_value = {"translations": [{"text": "Привет, мир!"}]}
         result = self.translator.translate("Hello, world!", "RU")
         self.assertEqual(result, "Привет, мир!")
 
+    @patch('services.translator.httpx.Client.post')
+    def test_detected_source_language(self, mock_post):
+        mock_post.return_value.json.return_value = {
+            "translations": [{"text": "Hallo", "detected_source_language": "EN"}]
+        }
+        self.assertEqual(self.translator.translate_with_source("Hello", "DE"), ("Hallo", "EN"))
+
+    @patch('services.translator.httpx.Client.post')
+    def test_batch_translation(self, mock_post):
+        mock_post.return_value.json.return_value = {
+            "translations": [{"text": "Hallo", "detected_source_language": "EN"}, {"text": "Welt"}]
+        }
+        result = self.translator.translate_batch(["Hello", "World"], "DE")
+        self.assertEqual(result, [("Hallo", "EN"), ("Welt", None)])
+        self.assertEqual(mock_post.call_args.kwargs["data"]["text"], ["Hello", "World"])
+
     def test_invalid_language(self):
         with self.assertRaises(ValueError):
             self.translator.translate("Test", "XX")
@@ -23,7 +39,7 @@ class TestDeepLTranslator(unittest.TestCase):
         with self.assertRaises(ValueError):
             self.translator.translate("", "RU")
 
-    @patch('services.translator.httpx.post')
+    @patch('services.translator.httpx.Client.post')
     def test_api_failure(self, mock_post):
         mock_post.side_effect = Exception("DeepL API недоступен")
         with self.assertRaises(TranslationError) as context:
@@ -0,0 +1,39 @@
+# tests/test_user_preferences.py
+import os
+import tempfile
+import unittest
+from database.database import Database
+from services.user_preferences import UserPreferences
+
+
+class TestUserPreferences(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db = Database(os.path.join(self.tmp.name, "test.db"))
+
+    def tearDown(self):
+        self.db.close()
+        self.tmp.cleanup()
+
+    def test_preferences_persisted(self):
+        """Тест: настройка сохраняется в БД и доступна после перезапуска."""
+        preferences = UserPreferences(db=self.db)
+        self.assertEqual(preferences.get(1, "target_lang", "EN"), "EN")
+        preferences.set(1, "target_lang", "DE")
+        preferences.set(1, "target_lang", "FR")
+        self.assertEqual(UserPreferences(db=self.db).get(1, "target_lang"), "FR")
+        self.assertIsNone(UserPreferences(db=self.db).get(2, "target_lang"))
+
+    def test_memory_cache_is_bounded(self):
+        """Тест: в памяти держатся только недавно использованные настройки, остальные читаются из БД."""
+        preferences = UserPreferences(db=self.db, cache_entries=2)
+        for user_id in (1, 2, 3):
+            preferences.set(user_id, "target_lang", f"L{user_id}")
+        preferences.get(2, "target_lang")
+        preferences.get(4, "target_lang")
+        self.assertEqual(list(preferences._cache), [(2, "target_lang"), (4, "target_lang")])
+        self.assertEqual(preferences.get(1, "target_lang"), "L1")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+# tests/test_user_sessions.py
+import asyncio
+import os
+import tempfile
+import unittest
+from types import SimpleNamespace
+from database.database import Database
+from services.profiler import deep_sizeof
+from services.user_sessions import UserSession, SessionStore, SessionManager
+
+
+class FakeApplication:
+    """Минимальная замена Application: словарь сессий и drop_user_data."""
+
+    def __init__(self):
+        self.user_data = {}
+
+    def drop_user_data(self, user_id):
+        self.user_data.pop(user_id, None)
+
+
+class TestUserSession(unittest.TestCase):
+    def test_slots_and_interning(self):
+        """Тест: у сессии нет __dict__, а одинаковые значения разделяют одну строку."""
+        first, second = UserSession(), UserSession()
+        self.assertFalse(hasattr(first, "__dict__"))
+        with self.assertRaises(AttributeError):
+            first.unknown = 1
+        first.voice, second.voice = "".join(["no", "va"]), "".join(["n", "ova"])
+        self.assertIs(first.voice, second.voice)
+        first.speech_formats = ["".join(["tx", "t"])]
+        self.assertEqual(first.speech_formats, ("txt",))
+        self.assertGreater(deep_sizeof(first), 0)
+
+    def test_to_dict_round_trip(self):
+        """Тест: в словарь попадают только изменённые поля, и сессия из него восстанавливается."""
+        session = UserSession()
+        self.assertEqual(session.to_dict(), {})
+        session.voice, session.image_count, session.speech_formats = "nova", 3, ("txt", "srt")
+        restored = UserSession()
+        restored.update({**session.to_dict(), "obsolete": True})
+        self.assertEqual(restored.to_dict(), {"voice": "nova", "image_count": 3, "speech_formats": ["txt", "srt"]})
+
+
+class TestSessionManager(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db = Database(os.path.join(self.tmp.name, "test.db"))
+        self.manager = SessionManager(SessionStore(self.db), idle_seconds=60)
+        self.app = FakeApplication()
+
+    def tearDown(self):
+        self.db.close()
+        self.tmp.cleanup()
+
+    def touch(self, user_id):
+        session = self.app.user_data.setdefault(user_id, UserSession())
+        update = SimpleNamespace(effective_user=SimpleNamespace(id=user_id))
+        asyncio.run(self.manager.touch(update, SimpleNamespace(user_data=session)))
+        return session
+
+    def test_idle_session_is_evicted_and_restored(self):
+        """Тест: неактивная сессия уходит в БД и восстанавливается при следующем сообщении."""
+        session = self.touch(1)
+        session.voice, session.model = "nova", "gpt-4o"
+        active = self.touch(2)
+
+        evicted = self.manager.evict_idle(self.app, now=session.last_seen + 61)
+        self.assertEqual(evicted, 2)
+        self.assertEqual(self.app.user_data, {})
+        self.assertIsNone(self.manager.store.load(2))  # сессия без изменений не сохраняется
+
+        restored = self.touch(1)
+        self.assertIsNot(restored, session)
+        self.assertEqual((restored.voice, restored.model), ("nova", "gpt-4o"))
+        self.assertIsNot(active, self.touch(2))
+
+    def test_active_session_stays_in_memory(self):
+        """Тест: недавно активные сессии не вытесняются."""
+        session = self.touch(1)
+        self.assertEqual(self.manager.evict_idle(self.app, now=session.last_seen + 30), 0)
+        self.assertIn(1, self.app.user_data)
+
+    def test_flush_saves_all_sessions(self):
+        """Тест: при остановке все сессии сохраняются."""
+        self.touch(1).voice = "nova"
+        self.manager.flush(self.app)
+        self.assertEqual(self.manager.store.load(1), {"voice": "nova"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+# tests/test_user_tiers.py
+import os
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+import config as cfg
+from database.database import Database
+from services.user_tiers import UserTiers, FREE, PREMIUM
+
+
+class TestUserTiers(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db = Database(os.path.join(self.tmp.name, "test.db"))
+        self.tiers = UserTiers(self.db)
+
+    def tearDown(self):
+        self.db.close()
+        self.tmp.cleanup()
+
+    def test_default_is_free(self):
+        """Тест: без записи в БД пользователь на бесплатном уровне с сокращённым списком языков."""
+        self.assertEqual(self.tiers.get(1), FREE)
+        self.assertEqual(self.tiers.languages(1), cfg.SUPPORTED_LANGUAGES_FREE)
+        self.assertEqual(self.tiers.features(1)["tts_model"], "tts-1")
+        self.assertNotIn("hd", self.tiers.features(1)["image_presets"])
+
+    def test_premium_persists_and_expires(self):
+        """Тест: премиум сохраняется в БД, открывает полный список языков и истекает в срок."""
+        expires_at = self.tiers.set(1, PREMIUM, days=1)
+        restored = UserTiers(self.db)
+        self.assertTrue(restored.is_premium(1))
+        self.assertEqual(restored.languages(1), cfg.SUPPORTED_LANGUAGES_FULL)
+        self.assertLess(restored.priority(1), restored.priority(2))
+        self.assertEqual(restored.get(1, now=expires_at + 1), FREE)
+
+        self.tiers.set(1, FREE)
+        self.assertEqual(self.tiers.get(1, now=time.time() + 10 ** 9), FREE)
+        with self.assertRaises(ValueError):
+            self.tiers.set(1, "gold")
+
+    def test_memory_cache_is_bounded(self):
+        """Тест: в памяти держатся уровни только недавно активных пользователей."""
+        tiers = UserTiers(self.db, cache_entries=2)
+        tiers.set(1, PREMIUM)
+        for user_id in (2, 3):
+            tiers.get(user_id)
+        self.assertEqual(list(tiers._cache), [2, 3])
+        self.assertTrue(tiers.is_premium(1))
+
+    def test_premium_user_ids_from_config(self):
+        """Тест: пользователи из PREMIUM_USER_IDS всегда на премиум-уровне."""
+        with patch.object(cfg, "PREMIUM_USER_IDS", {7}):
+            self.assertEqual(self.tiers.get(7), PREMIUM)
+        self.assertEqual(self.tiers.get(7), FREE)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+# tests/test_voice_pipeline.py
+import asyncio
+import time
+import unittest
+from unittest.mock import MagicMock
+from services.voice_pipeline import VoiceTranslationPipeline
+from services.translator import TranslationError
+
+
+def make_pipeline(delay: float = 0.0, translate=None):
+    speech = MagicMock()
+    speech.transcribe_audio.side_effect = lambda path: (time.sleep(delay), f"text {path}")[1]
+    translator = MagicMock()
+    translator.translate.side_effect = translate or (lambda text, lang: (time.sleep(delay), f"{lang}: {text}")[1])
+    voices = MagicMock()
+    voices.synthesize.side_effect = lambda text, voice, model, response_format: (time.sleep(delay), text.encode())[1]
+    return VoiceTranslationPipeline(speech, translator, voices)
+
+
+class TestVoiceTranslationPipeline(unittest.IsolatedAsyncioTestCase):
+    async def test_segments_delivered_in_order(self):
+        """Тест: фрагменты проходят все стадии и доставляются по порядку."""
+        delivered = []
+
+        async def deliver(index, text, translation, audio):
+            delivered.append((index, translation, audio))
+
+        await make_pipeline().run(["a", "b", "c"], "EN", "alloy", deliver)
+        self.assertEqual([item[0] for item in delivered], [0, 1, 2])
+        self.assertEqual(delivered[1], (1, "EN: text b", b"EN: text b"))
+
+    async def test_stages_overlap(self):
+        """Тест: стадии работают параллельно, общее время меньше суммы всех стадий."""
+        async def deliver(*args):
+            pass
+
+        started = time.monotonic()
+        await make_pipeline(delay=0.1).run(["a", "b", "c", "d"], "EN", "alloy", deliver)
+        # Последовательно: 4 фрагмента × 3 стадии × 0.1 с = 1.2 с; конвейер — около 0.6 с
+        self.assertLess(time.monotonic() - started, 1.0)
+
+    async def test_stage_error_propagated(self):
+        """Тест: ошибка стадии пробрасывается как исключение сервиса."""
+        def fail(text, lang):
+            raise TranslationError("Сервис перевода недоступен.")
+
+        async def deliver(*args):
+            pass
+
+        with self.assertRaises(TranslationError):
+            await make_pipeline(translate=fail).run(["a", "b"], "EN", "alloy", deliver)
+
+
+if __name__ == "__main__":
+    unittest.main()
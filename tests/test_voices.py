@@ -8,10 +8,10 @@ def generate_audio(text, voice):
     return service.generate_audio(text, voice)
 
 class TestVoices(unittest.TestCase):
-    @patch('services.voices.openai.audio.speech.create')
-    def test_generate_audio_success(self, mock_create):
+    @patch('services.voices.openai_client')
+    def test_generate_audio_success(self, mock_client):
         """Тест успешного создания аудио."""
-        mock_create.return_value.content = b'audio bytes'
+        mock_client.return_value.audio.speech.create.return_value.content = b'audio bytes'
         text = "Hello, world!"
         voice = "alloy"
         filename = generate_audio(text, voice)
@@ -1,40 +1,325 @@
 # utils/api_utils.py
+import asyncio
+import email.utils
 import functools
 import logging
-from typing import Callable, Any
+import random
+import re
+import time
+from typing import Callable, Any, Optional, Type
 
-def async_openai_error_handler(func: Callable[..., Any]) -> Callable[..., Any]:
+import httpx
+import config as cfg
+
+logger = logging.getLogger(__name__)
+
+# HTTP-коды, при которых запрос имеет смысл повторить
+RETRYABLE_STATUS_CODES = frozenset({408, 409, 429, 500, 502, 503, 504})
+
+# Длительности в заголовках лимитов OpenAI: "20ms", "1.5s", "6m0s"
+DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+DURATION_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+
+def on_event_loop() -> bool:
+    """Returns True if called from the thread running an asyncio event loop."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+def get_status_code(exc: BaseException) -> Optional[int]:
+    """Returns the HTTP status code carried by an API exception, if any.
+
+    Args:
+        exc (BaseException): Exception raised by an API client.
+
+    Returns:
+        Optional[int]: HTTP status code or None.
+    """
+    status = getattr(exc, "status_code", None)
+    if status is None:
+        status = getattr(getattr(exc, "response", None), "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def get_retry_after(exc: BaseException) -> Optional[float]:
+    """Extracts the server-requested delay from `Retry-After` headers.
+
+    Supports `retry-after-ms` (OpenAI), `retry-after` in seconds and in HTTP-date format.
+
+    Args:
+        exc (BaseException): Exception raised by an API client.
+
+    Returns:
+        Optional[float]: Delay in seconds or None if the server did not specify it.
+    """
+    return parse_retry_after(getattr(getattr(exc, "response", None), "headers", None))
+
+
+def parse_retry_after(headers) -> Optional[float]:
+    """Extracts the server-requested delay from response headers (see `get_retry_after`).
+
+    Args:
+        headers: Response headers (case-insensitive mapping) or None.
+
+    Returns:
+        Optional[float]: Delay in seconds or None if the server did not specify it.
+    """
+    if not headers:
+        return None
+    try:
+        retry_after_ms = headers.get("retry-after-ms")
+        if retry_after_ms is not None:
+            return max(float(retry_after_ms) / 1000, 0.0)
+        retry_after = headers.get("retry-after")
+        if retry_after is None:
+            return None
+        try:
+            return max(float(retry_after), 0.0)
+        except ValueError:
+            retry_date = email.utils.parsedate_to_datetime(retry_after)
+            return max(retry_date.timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError, AttributeError):
+        return None
+
+
+def parse_duration(value: Optional[str]) -> Optional[float]:
+    """Parses durations of OpenAI rate-limit headers, e.g. `x-ratelimit-reset-requests: 6m0s`.
+
+    Args:
+        value (Optional[str]): Duration such as "20ms", "1.5s", "6m0s" or "1h2m".
+
+    Returns:
+        Optional[float]: Duration in seconds or None if the value cannot be parsed.
+    """
+    if not value:
+        return None
+    parts = DURATION_PART.findall(value.strip())
+    if not parts or "".join(number + unit for number, unit in parts) != value.strip():
+        return None
+    return sum(float(number) * DURATION_UNITS[unit] for number, unit in parts)
+
+
+def is_retryable_error(exc: BaseException) -> bool:
+    """Checks whether the error is transient and the request may be repeated.
+
+    Retryable: 408/409/429 and 5xx responses, timeouts and connection errors
+    (including ones wrapped by the OpenAI client). Not retryable: input validation
+    errors and exhausted quota (`insufficient_quota`).
+
+    Args:
+        exc (BaseException): Exception raised by an API client.
+
+    Returns:
+        bool: True if the request may be retried.
+    """
+    if isinstance(exc, ValueError):
+        return False
+    if getattr(exc, "code", None) == "insufficient_quota":
+        return False
+    status = get_status_code(exc)
+    if status is not None:
+        return status in RETRYABLE_STATUS_CODES or status >= 500
+    current = exc
+    while current is not None:
+        if isinstance(current, (httpx.TransportError, ConnectionError, TimeoutError)):
+            return True
+        if type(current).__name__ in ("APIConnectionError", "APITimeoutError"):
+            return True
+        current = current.__cause__
+    return False
+
+
+class RetryPolicy:
+    """Политика повторных запросов к внешним API.
+
+    Повторяет временные ошибки с экспоненциальной задержкой и случайным разбросом
+    (full jitter), учитывает `Retry-After` и ограничивает общее время ожидания.
+    Если `failover` считает, что ошибка связана с ключом API и есть другой свободный ключ,
+    запрос повторяется сразу, без задержки.
+    """
+
+    def __init__(self,
+                 max_attempts: int = cfg.API_RETRY_MAX_ATTEMPTS,
+                 base_delay: float = cfg.API_RETRY_BASE_DELAY,
+                 max_delay: float = cfg.API_RETRY_MAX_DELAY,
+                 deadline: float = cfg.API_RETRY_DEADLINE,
+                 classifier: Callable[[BaseException], bool] = is_retryable_error,
+                 failover: Optional[Callable[[BaseException], bool]] = None):
+        """Initializes the retry policy.
+
+        Args:
+            max_attempts (int): Maximum number of attempts including the first one.
+            base_delay (float): Base delay for exponential backoff in seconds.
+            max_delay (float): Upper bound for a single delay in seconds.
+            deadline (float): Total time budget for all attempts in seconds.
+            classifier (Callable[[BaseException], bool]): Decides if an error is retryable.
+            failover (Optional[Callable[[BaseException], bool]]): Decides if the request can be repeated
+                at once with another API key.
+        """
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+        self.classifier = classifier
+        self.failover = failover
+
+    def compute_delay(self, attempt: int, exc: BaseException) -> float:
+        """Computes the delay before the next attempt.
+
+        Args:
+            attempt (int): Number of the failed attempt (starting from 1).
+            exc (BaseException): The error of the failed attempt.
+
+        Returns:
+            float: Delay in seconds.
+        """
+        retry_after = get_retry_after(exc)
+        if retry_after is not None:
+            # Сервер сам назвал паузу: соблюдаем её и добавляем небольшой разброс
+            return retry_after + random.uniform(0, self.base_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+    def next_delay(self, attempt: int, exc: BaseException, started: float) -> Optional[float]:
+        """Returns the delay before the next attempt or None if retrying must stop.
+
+        Args:
+            attempt (int): Number of the failed attempt (starting from 1).
+            exc (BaseException): The error of the failed attempt.
+            started (float): `time.monotonic()` value of the first attempt.
+
+        Returns:
+            Optional[float]: Delay in seconds or None.
+        """
+        if attempt >= self.max_attempts:
+            return None
+        if self.failover is not None and self.failover(exc):
+            return 0.0
+        if not self.classifier(exc):
+            return None
+        delay = self.compute_delay(attempt, exc)
+        if time.monotonic() - started + delay > self.deadline:
+            return None
+        return delay
+
+    def run_sync(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """Calls a synchronous function applying the policy.
+
+        The backoff uses `time.sleep`, so sync services must be called from coroutines via
+        `asyncio.to_thread`. Called directly on the event loop thread, the function fails instead of
+        waiting: one rate-limited request must not freeze the whole bot for up to `deadline` seconds.
+
+        Args:
+            func (Callable[..., Any]): Function to call.
+
+        Returns:
+            Any: Result of the function.
+        """
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                return func(*args, **kwargs)
+            except Exception as e:
+                delay = self.next_delay(attempt, e, started)
+                if delay is None:
+                    raise
+                if delay > 0 and on_event_loop():
+                    logger.error(f"Синхронный вызов {getattr(func, '__qualname__', func)} выполняется в цикле "
+                                 f"событий; повтор без блокировки бота невозможен (используйте asyncio.to_thread).")
+                    raise
+                logger.warning(f"Временная ошибка API ({e}), попытка {attempt}/{self.max_attempts}, "
+                               f"повтор через {delay:.1f} сек.")
+                time.sleep(delay)
+
+    async def run_async(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """Awaits an asynchronous function applying the policy.
+
+        Args:
+            func (Callable[..., Any]): Coroutine function to call.
+
+        Returns:
+            Any: Result of the coroutine.
+        """
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                return await func(*args, **kwargs)
+            except Exception as e:
+                delay = self.next_delay(attempt, e, started)
+                if delay is None:
+                    raise
+                logger.warning(f"Временная ошибка API ({e}), попытка {attempt}/{self.max_attempts}, "
+                               f"повтор через {delay:.1f} сек.")
+                await asyncio.sleep(delay)
+
+
+def _should_map(e: Exception, error_cls: Optional[Type[Exception]]) -> bool:
+    """Checks if a final API failure must be converted to the service-specific exception type."""
+    return error_cls is not None and not isinstance(e, (ValueError, error_cls))
+
+
+def async_openai_error_handler(func: Callable[..., Any] = None, *,
+                               error_cls: Optional[Type[Exception]] = None,
+                               policy: Optional[RetryPolicy] = None) -> Callable[..., Any]:
     """Asynchronous decorator to handle OpenAI API errors.
 
+    Retries transient errors according to the policy and maps the final failure
+    to `error_cls`. Input validation errors (ValueError) are re-raised as is.
+
     Args:
         func (Callable[..., Any]): Function to decorate.
+        error_cls (Optional[Type[Exception]]): Service-specific exception type.
+        policy (Optional[RetryPolicy]): Retry policy. Defaults to RetryPolicy().
 
     Returns:
         Callable[..., Any]: Wrapped function.
     """
-    @functools.wraps(func)
-    async def wrapper(*args, **kwargs):
-        try:
-            return await func(*args, **kwargs)
-        except Exception as e:
-            logging.getLogger(__name__).error(f"OpenAI API error: {e}")
-            raise e
-    return wrapper
+    def decorator(f: Callable[..., Any]) -> Callable[..., Any]:
+        @functools.wraps(f)
+        async def wrapper(*args, **kwargs):
+            try:
+                return await (policy or RetryPolicy()).run_async(f, *args, **kwargs)
+            except Exception as e:
+                logger.error(f"OpenAI API error: {e}")
+                if _should_map(e, error_cls):
+                    raise error_cls(str(e)) from e
+                raise
+        return wrapper
+    return decorator(func) if func is not None else decorator
+
 
-def sync_openai_error_handler(func: Callable[..., Any]) -> Callable[..., Any]:
+def sync_openai_error_handler(func: Callable[..., Any] = None, *,
+                              error_cls: Optional[Type[Exception]] = None,
+                              policy: Optional[RetryPolicy] = None) -> Callable[..., Any]:
     """Synchronous decorator to handle OpenAI API errors.
 
+    Retries transient errors according to the policy and maps the final failure
+    to `error_cls`. Input validation errors (ValueError) are re-raised as is.
+
     Args:
         func (Callable[..., Any]): Function to decorate.
+        error_cls (Optional[Type[Exception]]): Service-specific exception type.
+        policy (Optional[RetryPolicy]): Retry policy. Defaults to RetryPolicy().
 
     Returns:
         Callable[..., Any]: Wrapped function.
     """
-    @functools.wraps(func)
-    def wrapper(*args, **kwargs):
-        try:
-            return func(*args, **kwargs)
-        except Exception as e:
-            logging.getLogger(__name__).error(f"OpenAI API error: {e}")
-            raise e
-    return wrapper
+    def decorator(f: Callable[..., Any]) -> Callable[..., Any]:
+        @functools.wraps(f)
+        def wrapper(*args, **kwargs):
+            try:
+                return (policy or RetryPolicy()).run_sync(f, *args, **kwargs)
+            except Exception as e:
+                logger.error(f"OpenAI API error: {e}")
+                if _should_map(e, error_cls):
+                    raise error_cls(str(e)) from e
+                raise
+        return wrapper
+    return decorator(func) if func is not None else decorator
@@ -0,0 +1,112 @@
+# utils/document_utils.py
+import re
+from typing import Iterable, Iterator
+from utils.similarity_utils import split_sentences
+
+# Строка таймкодов субтитров SRT: 00:00:01,000 --> 00:00:02,500
+SRT_TIMESTAMP = re.compile(r"^\d{1,2}:\d{2}:\d{2}[,.]\d{1,3}\s*-->")
+
+
+def iter_blocks(lines: Iterable, extension: str) -> Iterator:
+    """Splits a document into blocks, reading it line by line.
+
+    Paragraphs (consecutive non-empty lines) are translatable; blank lines, line endings,
+    SRT cue numbers and timings and Markdown code blocks are kept as is.
+
+    Args:
+        lines (Iterable[str]): Document lines with their line endings (e.g. an open file).
+        extension (str): Document extension: "txt", "md" or "srt".
+
+    Yields:
+        tuple[str, bool]: Block text and whether it should be translated.
+    """
+    paragraph = []
+    in_code = False
+    for line in lines:
+        body = line.strip()
+        if extension == "md" and body.startswith("```"):
+            in_code = not in_code
+            keep = True
+        else:
+            keep = in_code or not body or (extension == "srt" and (body.isdigit() or SRT_TIMESTAMP.match(body)))
+        if not keep:
+            paragraph.append(line)
+            continue
+        yield from _paragraph_blocks(paragraph)
+        paragraph = []
+        yield line, False
+    yield from _paragraph_blocks(paragraph)
+
+
+def _paragraph_blocks(paragraph: list) -> Iterator:
+    if not paragraph:
+        return
+    text = "".join(paragraph)
+    body = text.rstrip("\r\n")
+    yield body, True
+    yield text[len(body):], False
+
+
+def split_long_block(text: str, max_chars: int) -> Iterator:
+    """Splits an oversized paragraph into translatable chunks at sentence boundaries.
+
+    Args:
+        text (str): Paragraph text.
+        max_chars (int): Maximum chunk length.
+
+    Yields:
+        tuple[str, bool]: Chunks (translatable) and the separators between them (kept as is).
+    """
+    units = []  # (фрагмент не длиннее лимита, разделитель после него)
+    sentences, separators = split_sentences(text)
+    for sentence, separator in zip(sentences, separators + [""]):
+        while len(sentence) > max_chars:
+            # Предложение длиннее лимита режется по последнему пробелу перед лимитом
+            cut = sentence.rfind(" ", 0, max_chars) + 1 or max_chars
+            piece = sentence[:cut].rstrip()
+            units.append((piece, sentence[len(piece):cut]))
+            sentence = sentence[cut:]
+        units.append((sentence, separator))
+
+    chunk, gap = "", ""
+    for unit, separator in units:
+        if chunk and len(chunk) + len(gap) + len(unit) > max_chars:
+            yield chunk, True
+            yield gap, False
+            chunk = unit
+        else:
+            chunk += gap + unit
+        gap = separator
+    if chunk:
+        yield chunk, True
+    if gap:
+        yield gap, False
+
+
+def iter_batches(blocks: Iterable, max_chars: int, max_texts: int = 50) -> Iterator:
+    """Groups document blocks into batches that fit into one translation request.
+
+    Args:
+        blocks (Iterable[tuple[str, bool]]): Blocks from `iter_blocks`.
+        max_chars (int): Maximum number of translatable characters per batch.
+        max_texts (int): Maximum number of translatable blocks per batch.
+
+    Yields:
+        list[tuple[str, bool]]: Consecutive blocks; their concatenation restores the document.
+    """
+    batch, chars, texts = [], 0, 0
+    for text, translatable in blocks:
+        if not translatable:
+            batch.append((text, False))
+            continue
+        pieces = split_long_block(text, max_chars) if len(text) > max_chars else [(text, True)]
+        for piece, piece_translatable in pieces:
+            if piece_translatable and batch and (chars + len(piece) > max_chars or texts >= max_texts):
+                yield batch
+                batch, chars, texts = [], 0, 0
+            batch.append((piece, piece_translatable))
+            if piece_translatable:
+                chars += len(piece)
+                texts += 1
+    if batch:
+        yield batch
@@ -1,5 +1,11 @@
 # utils/file_utils.py
 import os
+from typing import AsyncIterator
+import httpx
+from telegram import File
+
+# Размер порции при потоковом скачивании файлов Telegram
+STREAM_CHUNK_SIZE = 64 * 1024
 
 def ensure_directory(path: str) -> None:
     """Ensures that the directory exists; if not, creates it.
@@ -19,3 +25,28 @@ def get_abs_path(relative_path: str) -> str:
         str: Absolute path.
     """
     return os.path.abspath(relative_path)
+
+async def stream_telegram_file(file: File, chunk_size: int = STREAM_CHUNK_SIZE) -> AsyncIterator[bytes]:
+    """Yields the content of a Telegram file in chunks without saving it to disk.
+
+    Args:
+        file (File): File returned by `Bot.get_file`.
+        chunk_size (int): Chunk size in bytes.
+
+    Yields:
+        bytes: Next chunk of the file.
+
+    Raises:
+        httpx.HTTPError: If the download fails.
+    """
+    if not file.file_path.startswith(("http://", "https://")):
+        # Локальный Bot API сервер возвращает путь к файлу на диске
+        with open(file.file_path, "rb") as source:
+            while chunk := source.read(chunk_size):
+                yield chunk
+        return
+    async with httpx.AsyncClient(timeout=httpx.Timeout(60.0, connect=10.0)) as client:
+        async with client.stream("GET", file.file_path) as response:
+            response.raise_for_status()
+            async for chunk in response.aiter_bytes(chunk_size):
+                yield chunk
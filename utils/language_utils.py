@@ -0,0 +1,66 @@
+# utils/language_utils.py
+import unicodedata
+from typing import Optional
+
+# Письменности, однозначно указывающие на язык из числа поддерживаемых DeepL
+SCRIPT_LANGUAGES = {"HANGUL": "KO", "HIRAGANA": "JA", "KATAKANA": "JA", "CJK": "ZH", "ARABIC": "AR",
+                    "GREEK": "EL", "CYRILLIC": "RU"}
+# Кириллические буквы других языков (украинский, белорусский, сербский, македонский, казахский и др.)
+OTHER_CYRILLIC_LETTERS = set("іїєґўђјљњћџѓќѕәғқңөұүһ")
+# «ъ» внутри слов типичен для болгарского; ы, э, ё в болгарском не встречаются
+RUSSIAN_LETTERS = set("ыэё")
+# Буквы персидского и урду, которых нет в арабском
+NON_ARABIC_LETTERS = set("پچژگکیٹڈڑںے")
+# Доля букв одной письменности, начиная с которой текст считается написанным на ней
+SCRIPT_SHARE = 0.9
+
+
+def get_script(char: str) -> Optional[str]:
+    """Returns the Unicode script of a letter (first word of its Unicode name).
+
+    Args:
+        char (str): Single character.
+
+    Returns:
+        Optional[str]: Script name such as "LATIN" or "CYRILLIC"; None for non-letters.
+    """
+    if not char.isalpha():
+        return None
+    return unicodedata.name(char, "UNKNOWN").split(" ", 1)[0]
+
+
+def guess_language(text: str) -> Optional[str]:
+    """Guesses the language of a text from its alphabet, without any API call.
+
+    Only unambiguous cases are recognized (Korean, Japanese, Chinese, Arabic, Greek, Russian);
+    Latin-script texts always return None.
+
+    Args:
+        text (str): Text to analyze.
+
+    Returns:
+        Optional[str]: DeepL language code or None if the language cannot be determined reliably.
+    """
+    counts = {}
+    letters = 0
+    for char in text:
+        script = get_script(char)
+        if script is not None:
+            counts[script] = counts.get(script, 0) + 1
+            letters += 1
+    if not letters:
+        return None
+    lowered = set(text.lower())
+    # Кана в тексте с иероглифами означает японский
+    if counts.get("HIRAGANA", 0) + counts.get("KATAKANA", 0) > 0 and \
+            counts.get("HIRAGANA", 0) + counts.get("KATAKANA", 0) + counts.get("CJK", 0) >= letters * SCRIPT_SHARE:
+        return "JA"
+    script, count = max(counts.items(), key=lambda item: item[1])
+    if count < letters * SCRIPT_SHARE or script not in SCRIPT_LANGUAGES:
+        return None
+    if script == "CYRILLIC":
+        if lowered & OTHER_CYRILLIC_LETTERS or ("ъ" in lowered and not lowered & RUSSIAN_LETTERS):
+            return None
+    if script == "ARABIC" and lowered & NON_ARABIC_LETTERS:
+        return None
+    return SCRIPT_LANGUAGES[script]
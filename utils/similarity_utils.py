@@ -0,0 +1,167 @@
+# utils/similarity_utils.py
+import random
+import re
+import zlib
+
+# Граница предложения: пробелы после конечного знака препинания, перевод строки;
+# после китайских и японских знаков пробела может не быть
+SENTENCE_BOUNDARY = re.compile(r"((?<=[.!?…])\s+|(?<=[。！？])\s*|\s*\n\s*)")
+NUMBER = re.compile(r"\d+(?:[.,]\d+)*")
+WORD = re.compile(r"\w+")
+# Отрицания меняют смысл предложения, поэтому никогда не считаются опечаткой другого слова
+NEGATIONS = frozenset((
+    "not", "no", "never", "nor", "none", "nothing", "nobody", "nowhere", "neither", "cannot", "without",
+    "не", "ни", "нет", "никогда", "ничего", "никто", "нигде", "без",
+    "nicht", "nichts", "kein", "keine", "keinen", "keinem", "keiner", "keines", "nie", "niemals", "ohne",
+    "ne", "pas", "jamais", "rien", "aucun", "aucune", "sans", "nunca", "nada", "nadie", "sin",
+))
+# Опечаткой считается одна правка (вставка, удаление, замена, перестановка соседних букв)
+# в слове не короче TYPO_MIN_LENGTH букв, начинающемся с той же буквы
+TYPO_MIN_LENGTH = 4
+# Простое число Мерсенна 2^61 - 1 для универсального хэширования
+MERSENNE_PRIME = (1 << 61) - 1
+MAX_HASH = (1 << 32) - 1
+
+
+def split_sentences(text: str) -> tuple:
+    """Splits text into sentences keeping the separators, so it can be reassembled exactly.
+
+    Args:
+        text (str): Source text.
+
+    Returns:
+        tuple[list[str], list[str]]: Sentences and the separators that follow them
+        (one fewer than sentences); `"".join(s + sep)` restores the text.
+    """
+    parts = SENTENCE_BOUNDARY.split(text)
+    return parts[0::2], parts[1::2]
+
+
+def join_sentences(sentences: list, separators: list) -> str:
+    """Reassembles text split by `split_sentences`.
+
+    Args:
+        sentences (list[str]): Sentences.
+        separators (list[str]): Separators between them.
+
+    Returns:
+        str: Joined text.
+    """
+    return "".join(sentence + separator for sentence, separator in zip(sentences, separators + [""]))
+
+
+def normalize(sentence: str) -> str:
+    """Lowercases a sentence and collapses whitespace."""
+    return " ".join(sentence.lower().split())
+
+
+def numbers(sentence: str) -> tuple:
+    """Returns the numbers in a sentence; sentences that differ in numbers are not interchangeable."""
+    return tuple(NUMBER.findall(sentence))
+
+
+def words(sentence: str) -> tuple:
+    """Returns the lowercased words of a sentence in their order, without punctuation."""
+    return tuple(WORD.findall(sentence.lower()))
+
+
+def is_typo(first: str, second: str) -> bool:
+    """Checks whether two different words differ by a single typo.
+
+    Args:
+        first (str): Word.
+        second (str): Another word.
+
+    Returns:
+        bool: True if one insertion, deletion, substitution or swap of adjacent letters turns
+        one word into the other and neither is a number, a negation or a word shorter than TYPO_MIN_LENGTH.
+    """
+    if (min(len(first), len(second)) < TYPO_MIN_LENGTH or first[0] != second[0]
+            or first in NEGATIONS or second in NEGATIONS or NUMBER.search(first) or NUMBER.search(second)):
+        return False
+    if len(first) != len(second):
+        shorter, longer = sorted((first, second), key=len)
+        return len(longer) - len(shorter) == 1 and any(
+            longer[:i] + longer[i + 1:] == shorter for i in range(len(longer)))
+    diff = [i for i, (a, b) in enumerate(zip(first, second)) if a != b]
+    return len(diff) == 1 or (len(diff) == 2 and diff[1] == diff[0] + 1
+                              and first[diff[0]] == second[diff[1]] and first[diff[1]] == second[diff[0]])
+
+
+def same_words(first: tuple, second: tuple) -> bool:
+    """Checks that two sentences consist of the same words up to typos.
+
+    Sentences with a missing, extra or replaced word (for example, an added «not») are different.
+
+    Args:
+        first (tuple[str, ...]): Words of a sentence, see `words`.
+        second (tuple[str, ...]): Words of another sentence.
+
+    Returns:
+        bool: True if the words match pairwise, exactly or by `is_typo`.
+    """
+    return len(first) == len(second) and all(a == b or is_typo(a, b) for a, b in zip(first, second))
+
+
+def shingles(text: str, size: int = 3) -> frozenset:
+    """Returns the set of character n-grams of normalized text.
+
+    Args:
+        text (str): Text.
+        size (int): N-gram length.
+
+    Returns:
+        frozenset[str]: Character n-grams.
+    """
+    text = normalize(text)
+    if len(text) <= size:
+        return frozenset((text,))
+    return frozenset(text[i:i + size] for i in range(len(text) - size + 1))
+
+
+def jaccard(first: frozenset, second: frozenset) -> float:
+    """Returns the Jaccard similarity of two sets."""
+    if not first and not second:
+        return 1.0
+    return len(first & second) / len(first | second)
+
+
+class MinHasher:
+    """MinHash-сигнатуры и LSH-корзины для поиска похожих множеств n-грамм.
+
+    Сигнатура из `num_perm` минимальных хэшей делится на `bands` полос; множества с общей
+    полосой становятся кандидатами. Хэши стабильны между запусками (crc32 и фиксированное зерно).
+    """
+
+    def __init__(self, num_perm: int = 64, bands: int = 16, seed: int = 1):
+        """Initializes the hash permutations.
+
+        Args:
+            num_perm (int): Signature length.
+            bands (int): Number of LSH bands; must divide `num_perm`.
+            seed (int): Seed of the permutation coefficients.
+        """
+        if num_perm % bands:
+            raise ValueError("num_perm должно делиться на bands без остатка.")
+        generator = random.Random(seed)
+        self.rows = num_perm // bands
+        self.bands = bands
+        self.permutations = [(generator.randrange(1, MERSENNE_PRIME), generator.randrange(0, MERSENNE_PRIME))
+                             for _ in range(num_perm)]
+
+    def signature(self, items: frozenset) -> tuple:
+        """Returns the MinHash signature of a set.
+
+        Args:
+            items (frozenset[str]): Set of n-grams.
+
+        Returns:
+            tuple[int, ...]: Signature of length `num_perm`.
+        """
+        hashes = [zlib.crc32(item.encode("utf-8")) for item in items]
+        return tuple(min(((a * h + b) % MERSENNE_PRIME) & MAX_HASH for h in hashes)
+                     for a, b in self.permutations)
+
+    def band_keys(self, signature: tuple) -> list:
+        """Returns LSH bucket keys of a signature, one per band."""
+        return [(band, hash(signature[band * self.rows:(band + 1) * self.rows])) for band in range(self.bands)]
@@ -0,0 +1,83 @@
+# utils/startup_utils.py
+import importlib.util
+import sys
+import time
+from contextlib import contextmanager
+from types import ModuleType
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+def lazy_import(name: str) -> ModuleType:
+    """Returns a module that is actually imported on first attribute access.
+
+    Used for heavy dependencies (openai) so that they do not slow down bot startup.
+
+    Args:
+        name (str): Module name.
+
+    Returns:
+        ModuleType: The module (already imported or lazy).
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError(f"No module named '{name}'", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
+class StartupTimer:
+    """Замеряет длительность этапов запуска бота и выводит отчёт в лог."""
+
+    def __init__(self, started_at: float = None):
+        """Инициализирует таймер.
+
+        Args:
+            started_at (float): perf_counter() value of the process start; defaults to now.
+        """
+        self.started_at = time.perf_counter() if started_at is None else started_at
+        self.phases = []
+
+    def mark(self, name: str, started_at: float) -> None:
+        """Records a phase that began at `started_at` and ends now.
+
+        Args:
+            name (str): Phase name.
+            started_at (float): perf_counter() value when the phase began.
+        """
+        self.phases.append((name, time.perf_counter() - started_at))
+
+    @contextmanager
+    def phase(self, name: str):
+        """Context manager that records the duration of a startup phase.
+
+        Args:
+            name (str): Phase name.
+        """
+        started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.mark(name, started_at)
+
+    def report(self, title: str = "Запуск") -> str:
+        """Logs and returns the per-phase report.
+
+        Args:
+            title (str): Report title.
+
+        Returns:
+            str: Report line.
+        """
+        total = time.perf_counter() - self.started_at
+        phases = ", ".join(f"{name} {duration:.2f} с" for name, duration in self.phases)
+        report = f"{title} за {total:.2f} с: {phases}"
+        logger.info(report)
+        return report
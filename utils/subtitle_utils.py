@@ -0,0 +1,62 @@
+# utils/subtitle_utils.py
+
+def format_timestamp(seconds: float, separator: str = ",") -> str:
+    """Formats seconds as a subtitle timestamp HH:MM:SS,mmm.
+
+    Args:
+        seconds (float): Time in seconds.
+        separator (str): Separator before milliseconds ("," for SRT, "." for WebVTT).
+
+    Returns:
+        str: Formatted timestamp.
+    """
+    milliseconds = max(int(round(seconds * 1000)), 0)
+    hours, milliseconds = divmod(milliseconds, 3_600_000)
+    minutes, milliseconds = divmod(milliseconds, 60_000)
+    secs, milliseconds = divmod(milliseconds, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}{separator}{milliseconds:03d}"
+
+
+def to_srt(segments: list) -> str:
+    """Builds SubRip (SRT) subtitles from transcript segments.
+
+    Args:
+        segments (list[dict]): Segments with "start", "end" and "text" keys.
+
+    Returns:
+        str: SRT document.
+    """
+    blocks = []
+    for index, segment in enumerate(segments, start=1):
+        blocks.append(f"{index}\n"
+                      f"{format_timestamp(segment['start'])} --> {format_timestamp(segment['end'])}\n"
+                      f"{segment['text'].strip()}\n")
+    return "\n".join(blocks)
+
+
+def to_vtt(segments: list) -> str:
+    """Builds WebVTT subtitles from transcript segments.
+
+    Args:
+        segments (list[dict]): Segments with "start", "end" and "text" keys.
+
+    Returns:
+        str: WebVTT document.
+    """
+    blocks = ["WEBVTT\n"]
+    for segment in segments:
+        blocks.append(f"{format_timestamp(segment['start'], '.')} --> {format_timestamp(segment['end'], '.')}\n"
+                      f"{segment['text'].strip()}\n")
+    return "\n".join(blocks)
+
+
+def to_text(segments: list) -> str:
+    """Joins transcript segments into plain text.
+
+    Args:
+        segments (list[dict]): Segments with a "text" key.
+
+    Returns:
+        str: Plain text.
+    """
+    return " ".join(segment["text"].strip() for segment in segments if segment["text"].strip())